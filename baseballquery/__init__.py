@@ -1,10 +1,13 @@
 from pathlib import Path
+import multiprocessing
+import shutil
 from . import download
+from . import event_store
+from . import ingest_metrics
 from . import retrosheet_cwevent_convert
 from . import linear_weights
 from . import stat_calculator   # type: ignore
 from .stat_splits import StatSplits, BattingStatSplits, PitchingStatSplits  # type: ignore
-import h5py # type: ignore
 
 
 current_directory = Path(__file__).parent
@@ -13,25 +16,69 @@ START_YEAR = 1912
 END_YEAR = 2023
 years = [year for year in range(START_YEAR, END_YEAR + 1)]
 
-if not (current_directory / "chadwick.hdf5").exists():
-    print("Chadwick HDF5 event files not generated")
+# Where processes are spawned rather than forked (macOS, Windows), worker processes started by convert_files_to_csv
+# (with the python parser) import this package again. They shouldn't try to build the store themselves
+in_worker = multiprocessing.parent_process() is not None
+
+if not in_worker and not event_store.get_store().exists():
+    ingest_metrics.start()
+    print("Chadwick event files not generated")
     if not (current_directory / "downloads").exists():
         print("Retrosheet files not downloaded. Downloading...")
         download.download_year(2023)
     print("Generating Chadwick event files...")
-    retrosheet_cwevent_convert.convert_files_to_csv()
+    # Without cwevent, the files are parsed in this process. Sending work to the python parser's worker processes needs this package
+    # to be imported, which it isn't yet
+    retrosheet_cwevent_convert.convert_files_to_csv(processes=None if shutil.which("cwevent") else 1)
 
-if not (current_directory / "linear_weights.csv").exists():
+if not in_worker and not (current_directory / "linear_weights.csv").exists():
     print("Linear weights not generated. Generating...")
     linear_weights.calc_all_weights()
+ingest_metrics.print_summary()
+
+
+def update(years: list[int] | None = None, processes: int | None = None, backend: str | None = None, source_dir: Path | str | None = None, parser: str | None = None):
+    """
+    Add seasons to the event store and linear_weights.csv without rebuilding everything else.
+    Only seasons that are missing, or whose retrosheet files changed since they were converted, are converted and have their linear weights recalculated.
+    Prints how long each stage took at the end (see ingest_metrics).
+
+    Parameters:
+    years (list[int] | None): Seasons to add or refresh (e.g. [2024]). Defaults to every season from START_YEAR to END_YEAR that isn't in the event store yet.
+    processes (int | None): Number of files to convert at once. Defaults to the number of CPUs.
+    backend (str | None): 'hdf5', 'parquet' or 'npy' (see event_store). Defaults to the store that already exists, or 'hdf5'.
+    source_dir (Path | str | None): Directory with a local copy of the {year}eve.zip files to use instead of downloading them (see download.download_zips).
+    parser (str | None): 'cwevent' or 'python' (see retrosheet_cwevent_convert.convert_files_to_csv). Defaults to 'cwevent' if it's installed.
+    """
+    ingest_metrics.start()
+    try:
+        stored_years = event_store.get_store(backend).years()
+        if years is None:
+            years = [year for year in range(START_YEAR, END_YEAR + 1) if year not in stored_years]
+
+        if years:
+            print(f"Downloading Retrosheet files for {', '.join(str(year) for year in years)}...")
+            # All at once, so several seasons are downloaded in parallel
+            download.download_zips([f"{download.RETROSHEET_EVENTS_URL}/{year}eve.zip" for year in years], source_dir)
+        hashes = retrosheet_cwevent_convert.read_season_hashes()
+        changed_years: list[int] = []
+        for year in years:
+            season_hash = retrosheet_cwevent_convert.season_hash(current_directory / "downloads", year)
+            if year in stored_years and hashes.get(year) == season_hash:
+                print(f"{year} is already up to date")
+                continue
+            changed_years.append(year)
+
+        if not changed_years:
+            retrosheet_cwevent_convert.delete_downloads()
+            return
+        print(f"Generating Chadwick event files for {', '.join(str(year) for year in changed_years)}...")
+        retrosheet_cwevent_convert.convert_files_to_csv(processes, years=changed_years, backend=backend, parser=parser)
+        print("Calculating linear weights...")
+        linear_weights.calc_all_weights(years=changed_years, backend=backend)
+    finally:
+        # Also stops keeping measurements if the update failed, so queries after it aren't measured as part of it
+        ingest_metrics.print_summary()
+
 
-# with h5py.File(current_directory / "chadwick.hdf5") as f:
-#     years_h5 = list(f.keys())   # type: ignore
-# for year in years:
-#     if f"year_{year}" not in years_h5:
-#         print(f"Downloading Retrosheet files for {year}...")
-#         download.download_year(year)
-#         print(f"Generating Chadwick event files for {year}...")
-#         retrosheet_cwevent_convert.convert_files_to_csv()
- 
 __version__ = "0.0.3"
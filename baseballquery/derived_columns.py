@@ -0,0 +1,157 @@
+"""
+Counting stat columns (PA, AB, H, ER, etc.) and date columns (GAME_DT, year, month, day, DAY_OF_WEEK, GAME_NUMBER) that the stat calculators and StatSplits use. They're computed from the Chadwick fields when events are read
+(see EventStore.read_year) instead of being saved in the event store, and only the ones that are asked for are computed.
+
+To add a new one, call register_derived_column. Since nothing is saved, it works for every season already in the store without converting anything again.
+"""
+
+from typing import Callable
+import pandas as pd  # type: ignore
+
+# Name: (columns the function needs, function). In the order they were registered, so a column can use the ones registered before it
+derived_columns: dict[str, tuple[list[str], Callable[[pd.DataFrame], pd.Series]]] = {}
+
+
+def register_derived_column(name: str, columns: list[str], function: Callable[[pd.DataFrame], pd.Series]):
+    """
+    Add a derived column.
+
+    Parameters:
+    name (str): Name of the column
+    columns (list[str]): Columns the function uses. Chadwick fields, or derived columns that are already registered
+    function (Callable[[pd.DataFrame], pd.Series]): Computes the column from a DataFrame of events that has those columns
+    """
+    derived_columns[name] = (columns, function)
+
+
+def source_columns(columns: list[str]) -> list[str]:
+    """
+    The columns that have to be read from the event store to get these columns. Derived columns are replaced by the Chadwick fields they're computed from.
+    """
+    sources: dict[str, None] = {}  # A dict to keep the order and drop duplicates
+
+    def add(column: str):
+        if column in derived_columns:
+            for dependency in derived_columns[column][0]:
+                add(dependency)
+        else:
+            sources[column] = None
+
+    for column in columns:
+        add(column)
+    return list(sources)
+
+
+def add_derived_columns(df: pd.DataFrame, columns: list[str] | None = None):
+    """
+    Compute derived columns and add them to a DataFrame of events, in place. Columns the DataFrame already has aren't computed again.
+
+    Parameters:
+    df (pd.DataFrame): The events
+    columns (list[str] | None): The columns to add. Any derived columns they use are added too. Defaults to every derived column.
+    """
+    if columns is None:
+        columns = list(derived_columns)
+
+    def add(column: str):
+        if column in df.columns or column not in derived_columns:
+            return
+        dependencies, function = derived_columns[column]
+        for dependency in dependencies:
+            add(dependency)
+        df[column] = function(df)
+
+    for column in columns:
+        add(column)
+
+
+def event_indicator(event_codes: list[int]) -> Callable[[pd.DataFrame], pd.Series]:
+    """
+    1 for events with one of these EVENT_CDs, 0 otherwise
+    """
+    return lambda df: df["EVENT_CD"].isin(event_codes).astype("int8")  # type: ignore
+
+
+def flag_count(flags: list[str]) -> Callable[[pd.DataFrame], pd.Series]:
+    """
+    The number of these flags that are set (e.g. stolen bases by any runner)
+    """
+    return lambda df: sum(df[flag].astype("int8") for flag in flags)  # type: ignore
+
+
+def destination_count(destinations: list[int]) -> Callable[[pd.DataFrame], pd.Series]:
+    """
+    The number of runners (including the batter) whose destination is one of these. 4 and 6 are earned runs, 5 and 7 unearned ones
+    (6 is unearned for the team but earned for the pitcher, 7 the other way around). See https://chadwick.sourceforge.net/doc/cwevent.html
+    """
+    return lambda df: sum(df[f"{runner}_DEST_ID"].isin(destinations).astype("int8") for runner in ["BAT", "RUN1", "RUN2", "RUN3"])  # type: ignore
+
+
+def game_id_column(function: Callable[[pd.Series], pd.Series]) -> Callable[[pd.DataFrame], pd.Series]:
+    """
+    A column computed from GAME_ID, e.g. NYA202304012 is the second game of a doubleheader at NYA on 2023-04-01. function gets a Series of game IDs.
+    GAME_ID is categorical, so function only has to run once for each game instead of for every event
+    """
+
+    def compute(df: pd.DataFrame) -> pd.Series:
+        game_ids = df["GAME_ID"]
+        if not isinstance(game_ids.dtype, pd.CategoricalDtype):
+            game_ids = game_ids.astype("category")  # type: ignore
+        values = function(pd.Series(game_ids.cat.categories)).to_numpy()  # type: ignore
+        return pd.Series(values[game_ids.cat.codes.to_numpy()], index=df.index)  # type: ignore
+
+    return compute
+
+
+baserunning_outcomes_not_pa: list[int] = [4, 5, 6, 7, 8, 9, 10, 11, 12]
+register_derived_column("PA", ["EVENT_CD"], lambda df: (~df["EVENT_CD"].isin(baserunning_outcomes_not_pa + [13])).astype("int8"))  # type: ignore
+register_derived_column("AB", ["AB_FL"], lambda df: df["AB_FL"].astype("int8"))  # type: ignore
+register_derived_column("SH", ["SH_FL"], lambda df: df["SH_FL"].astype("int8"))  # type: ignore
+register_derived_column("SF", ["SF_FL"], lambda df: df["SF_FL"].astype("int8"))  # type: ignore
+register_derived_column("R", ["EVENT_RUNS_CT"], lambda df: df["EVENT_RUNS_CT"].astype("int8"))  # type: ignore
+register_derived_column("RBI", ["RBI_CT"], lambda df: df["RBI_CT"].astype("int8"))  # type: ignore
+register_derived_column("SB", ["RUN1_SB_FL", "RUN2_SB_FL", "RUN3_SB_FL"], flag_count(["RUN1_SB_FL", "RUN2_SB_FL", "RUN3_SB_FL"]))
+register_derived_column("CS", ["RUN1_CS_FL", "RUN2_CS_FL", "RUN3_CS_FL"], flag_count(["RUN1_CS_FL", "RUN2_CS_FL", "RUN3_CS_FL"]))
+# Simple lookup table. Source: https://chadwick.sourceforge.net/doc/cwevent.html
+# SB (4), CS (6), PK (8), WP (9), PB (10), INT (17) and E (18) aren't here since they either depend on the runners or come from flags
+event_code_columns: dict[int, str] = {
+    3: "K",
+    11: "BK",
+    14: "UBB",
+    15: "IBB",
+    16: "HBP",
+    19: "FC",
+    20: "1B",
+    21: "2B",
+    22: "3B",
+    23: "HR",
+}
+for event_code, name in event_code_columns.items():
+    register_derived_column(name, ["EVENT_CD"], event_indicator([event_code]))
+register_derived_column("H", ["EVENT_CD"], event_indicator([20, 21, 22, 23]))
+register_derived_column("DP", ["DP_FL"], lambda df: df["DP_FL"].astype("int8"))  # type: ignore
+register_derived_column("TP", ["TP_FL"], lambda df: df["TP_FL"].astype("int8"))  # type: ignore
+register_derived_column("ROE", ["BAT_SAFE_ERR_FL", "EVENT_CD"], lambda df: (df["BAT_SAFE_ERR_FL"] & df["EVENT_CD"].eq(18)).astype("int8"))  # type: ignore
+register_derived_column("WP", ["WP_FL"], lambda df: df["WP_FL"].astype("int8"))  # type: ignore
+# Pitches are only counted on the event that ends the PA (or scores a run), since the counts are for the whole PA.
+# The counts are int8, so they're added as int16: a long PA's balls and strikes together can be more than int8 holds
+register_derived_column(
+    "P",
+    ["PA_BALL_CT", "PA_STRIKE_CT", "PA_OTHER_BALL_CT", "PA_OTHER_STRIKE_CT", "PA", "R"],
+    lambda df: (df["PA_BALL_CT"].astype("int16") + df["PA_STRIKE_CT"] - df["PA_OTHER_BALL_CT"] - df["PA_OTHER_STRIKE_CT"]) * (df["PA"] | df["R"]),  # type: ignore
+)
+for batted_ball in ["GB", "FB", "LD", "PU"]:
+    register_derived_column(batted_ball, ["BATTEDBALL_CD"], lambda df, code=batted_ball[0]: df["BATTEDBALL_CD"].eq(code).astype("int8"))  # type: ignore
+destination_columns = ["BAT_DEST_ID", "RUN1_DEST_ID", "RUN2_DEST_ID", "RUN3_DEST_ID"]
+register_derived_column("ER", destination_columns, destination_count([4, 6]))
+register_derived_column("T_UER", destination_columns, destination_count([6]))
+register_derived_column("UER", destination_columns, destination_count([5, 7]))
+# year, month and day are lower case since they're also the columns of the stats for the year, month and day splits
+register_derived_column("GAME_DT", ["GAME_ID"], game_id_column(lambda game_ids: pd.to_datetime(game_ids.str.slice(3, 11), format="%Y%m%d")))  # type: ignore
+register_derived_column("year", ["GAME_ID"], game_id_column(lambda game_ids: game_ids.str.slice(3, 7).astype("int16")))  # type: ignore
+register_derived_column("month", ["GAME_ID"], game_id_column(lambda game_ids: game_ids.str.slice(7, 9).astype("int8")))  # type: ignore
+register_derived_column("day", ["GAME_ID"], game_id_column(lambda game_ids: game_ids.str.slice(9, 11).astype("int8")))  # type: ignore
+# 0 is Monday, 6 is Sunday
+register_derived_column("DAY_OF_WEEK", ["GAME_ID"], game_id_column(lambda game_ids: pd.to_datetime(game_ids.str.slice(3, 11), format="%Y%m%d").dt.dayofweek.astype("int8")))  # type: ignore
+# 0 for a single game, 1 or 2 for the games of a doubleheader
+register_derived_column("GAME_NUMBER", ["GAME_ID"], game_id_column(lambda game_ids: game_ids.str.slice(11, 12).astype("int8")))  # type: ignore
@@ -4,44 +4,222 @@ Download and extract all the retrosheet zips including CurrentNames.csv
 https://www.retrosheet.org/Nickname.htm
 https://www.retrosheet.org/BIOFILE.TXT
 https://www.retrosheet.org/game.htm#Regular%20Season%20Games
+
+The zips are streamed to download_cache (and kept there) before they're extracted to downloads.
+download_cache/manifest.json has the sha256, ETag and Last-Modified of each zip, so a zip that didn't change on Retrosheet isn't downloaded again.
+An interrupted download is resumed from where it stopped, unless the zip changed on Retrosheet since (checked with If-Range).
+
+Set the BASEBALLQUERY_MIRROR environment variable (or pass source_dir) to a directory with a copy of the zips to install without internet access.
 """
 
-from io import BytesIO
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
+import json
+import os
+import time
 import zipfile
+import zlib
 import tqdm
 import requests
+from . import ingest_metrics
 
+RETROSHEET_EVENTS_URL = "https://www.retrosheet.org/events"
 
-def download_games():
-    cwd = Path(__file__).parent
-    download_dir = cwd / "downloads"
-    download_dir.mkdir(parents=True, exist_ok=True)
-    decade_zips = [
-        "https://www.retrosheet.org/events/1910seve.zip",
-        "https://www.retrosheet.org/events/1920seve.zip",
-        "https://www.retrosheet.org/events/1930seve.zip",
-        "https://www.retrosheet.org/events/1940seve.zip",
-        "https://www.retrosheet.org/events/1950seve.zip",
-        "https://www.retrosheet.org/events/1960seve.zip",
-        "https://www.retrosheet.org/events/1970seve.zip",
-        "https://www.retrosheet.org/events/1980seve.zip",
-        "https://www.retrosheet.org/events/1990seve.zip",
-        "https://www.retrosheet.org/events/2000seve.zip",
-        "https://www.retrosheet.org/events/2010seve.zip",
-        "https://www.retrosheet.org/events/2020seve.zip",
-    ]
-    for url in tqdm.tqdm(decade_zips, desc=" Retrosheet files downloading"):
-        request = requests.get(url)
-        zip = zipfile.ZipFile(BytesIO(request.content))
-        zip.extractall(download_dir)
-
-
-def download_year(year: int):
+
+def file_hash(file: Path) -> str:
+    sha = hashlib.sha256()
+    with open(file, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def read_manifest(cache_dir: Path) -> dict[str, dict[str, str]]:
+    manifest_file = cache_dir / "manifest.json"
+    if not manifest_file.exists():
+        return {}
+    with open(manifest_file) as f:
+        return json.load(f)
+
+
+def write_manifest(cache_dir: Path, manifest: dict[str, dict[str, str]]):
+    with open(cache_dir / "manifest.json", "w") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+
+
+def part_validator(validator_file: Path) -> str:
+    """
+    The If-Range value for resuming a partial download: its strong ETag, or its Last-Modified. Empty if there's neither, so it isn't resumed
+    """
+    if not validator_file.exists():
+        return ""
+    try:
+        with open(validator_file) as f:
+            validator = json.load(f)
+    except (OSError, ValueError):
+        return ""
+    # Weak ETags can't be used with If-Range
+    if validator.get("etag") and not validator["etag"].startswith("W/"):
+        return validator["etag"]
+    return validator.get("last_modified", "")
+
+
+def valid_zip(file: Path) -> bool:
+    """
+    Whether every file in the zip can be read and matches its CRC. zipfile.is_zipfile only checks the end of the zip,
+    which a partial file of an old version with the end of a new version would pass
+    """
+    try:
+        with zipfile.ZipFile(file) as zip:
+            return zip.testzip() is None
+    except (zipfile.BadZipFile, zlib.error, OSError, EOFError):
+        return False
+
+
+def retryable(error: requests.RequestException) -> bool:
+    """
+    Whether downloading again could work: connection errors, timeouts, downloads that broke off or weren't a valid zip, and 5xx, 408 (Request Timeout)
+    and 429 (Too Many Requests) responses. Other 4xx responses (e.g. 404 for a season Retrosheet doesn't have) and invalid requests won't change
+    """
+    if isinstance(error, requests.HTTPError):
+        status = error.response.status_code if error.response is not None else 500
+        return status >= 500 or status in (408, 429)
+    # e.g. requests.exceptions.InvalidURL
+    return not isinstance(error, ValueError)
+
+
+def fetch_zip(url: str, cache_dir: Path, cached: dict[str, str] | None = None, retries: int = 3) -> dict[str, str]:
+    """
+    Stream a zip to cache_dir, resuming a partial download if there is one. Returns its manifest entry.
+    If the zip is already cached (and its hash matches cached) Retrosheet is only asked whether it changed.
+
+    Parameters:
+    url (str): URL of the zip
+    cache_dir (Path): Directory the zip is saved to
+    cached (dict[str, str] | None): The manifest entry from the last time the zip was downloaded
+    retries (int): Number of attempts before giving up
+    """
+    zip_file = cache_dir / url.split("/")[-1]
+    part_file = zip_file.with_name(zip_file.name + ".part")
+    # The ETag and Last-Modified of the zip the partial file is from, so it's only resumed if the zip didn't change since
+    validator_file = zip_file.with_name(zip_file.name + ".part.json")
+    conditional_headers: dict[str, str] = {}
+    if cached is not None and zip_file.exists() and file_hash(zip_file) == cached["sha256"]:
+        if cached.get("etag"):
+            conditional_headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            conditional_headers["If-Modified-Since"] = cached["last_modified"]
+
+    start = time.perf_counter()
+    downloaded = 0
+    for attempt in range(retries):
+        try:
+            headers = conditional_headers.copy()
+            offset = part_file.stat().st_size if part_file.exists() else 0
+            validator = part_validator(validator_file)
+            if offset and validator:
+                headers["Range"] = f"bytes={offset}-"
+                # The server sends the whole zip instead of the rest of it if it changed
+                headers["If-Range"] = validator
+            with requests.get(url, headers=headers, stream=True, timeout=60) as response:
+                if response.status_code == 304:
+                    ingest_metrics.record("download", zip_file.name, time.perf_counter() - start, bytes=0)
+                    return cached  # type: ignore
+                if response.status_code == 416:
+                    # The partial file is from a different (or complete) version. Start over
+                    part_file.unlink()
+                    validator_file.unlink(missing_ok=True)
+                    continue
+                response.raise_for_status()
+                if response.status_code != 206:
+                    # A new download. Saved before anything is written so an interrupted one can be resumed
+                    with open(validator_file, "w") as f:
+                        json.dump({"etag": response.headers.get("ETag", ""), "last_modified": response.headers.get("Last-Modified", "")}, f)
+                # 206 means the server is resuming. Otherwise it sent the whole file
+                with open(part_file, "ab" if response.status_code == 206 else "wb") as f:
+                    for chunk in response.iter_content(chunk_size=1 << 20):
+                        f.write(chunk)
+                        downloaded += len(chunk)
+                entry = {
+                    "url": url,
+                    "etag": response.headers.get("ETag", ""),
+                    "last_modified": response.headers.get("Last-Modified", ""),
+                }
+            if not valid_zip(part_file):
+                # Corrupted, or resumed onto a partial file of an older version of the zip
+                part_file.unlink()
+                validator_file.unlink(missing_ok=True)
+                raise requests.RequestException(f"{url} is not a valid zip")
+            part_file.replace(zip_file)
+            validator_file.unlink(missing_ok=True)
+            entry["sha256"] = file_hash(zip_file)
+            ingest_metrics.record("download", zip_file.name, time.perf_counter() - start, bytes=downloaded)
+            return entry
+        except requests.RequestException as e:
+            if attempt == retries - 1 or not retryable(e):
+                raise
+            time.sleep(2**attempt)
+    raise requests.RequestException(f"Could not download {url}")
+
+
+def download_zips(urls: list[str], source_dir: Path | str | None = None, workers: int = 4, desc: str = " Retrosheet files downloading"):
+    """
+    Download (or copy from a mirror) the zips and extract them to the downloads directory.
+
+    Parameters:
+    urls (list[str]): URLs of the zips
+    source_dir (Path | str | None): Directory with a local copy of the zips to use instead of downloading them. Defaults to the BASEBALLQUERY_MIRROR environment variable.
+    workers (int): Number of zips to download at once
+    desc (str): Description of the progress bar
+    """
     cwd = Path(__file__).parent
     download_dir = cwd / "downloads"
     download_dir.mkdir(parents=True, exist_ok=True)
-    url = f"https://www.retrosheet.org/events/{year}eve.zip"
-    request = requests.get(url)
-    zip = zipfile.ZipFile(BytesIO(request.content))
-    zip.extractall(download_dir)
+    if source_dir is None:
+        source_dir = os.environ.get("BASEBALLQUERY_MIRROR")
+
+    if source_dir is not None:
+        zip_files = [Path(source_dir) / url.split("/")[-1] for url in urls]
+        for zip_file in zip_files:
+            if not zip_file.exists():
+                raise FileNotFoundError(f"{zip_file.name} not found in {source_dir}")
+    else:
+        cache_dir = cwd / "download_cache"
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        manifest = read_manifest(cache_dir)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(fetch_zip, url, cache_dir, manifest.get(url.split("/")[-1])): url for url in urls}
+            for future in tqdm.tqdm(as_completed(futures), total=len(futures), desc=desc):
+                manifest[futures[future].split("/")[-1]] = future.result()
+                # Saved after every zip so a failed run still remembers the zips it finished
+                write_manifest(cache_dir, manifest)
+        zip_files = [cache_dir / url.split("/")[-1] for url in urls]
+
+    for zip_file in zip_files:
+        with ingest_metrics.measure("extract", zip_file.name) as measurement, zipfile.ZipFile(zip_file) as zip:
+            zip.extractall(download_dir)
+            measurement["bytes"] = sum(info.file_size for info in zip.infolist())
+
+
+def download_games(source_dir: Path | str | None = None, workers: int = 4):
+    """
+    Download and extract the event files of every decade.
+
+    Parameters:
+    source_dir (Path | str | None): Directory with a local copy of the decade zips (1910seve.zip, ...). See download_zips
+    workers (int): Number of zips to download at once
+    """
+    decade_zips = [f"{RETROSHEET_EVENTS_URL}/{decade}seve.zip" for decade in range(1910, 2030, 10)]
+    download_zips(decade_zips, source_dir, workers)
+
+
+def download_year(year: int, source_dir: Path | str | None = None):
+    """
+    Download and extract the event files of one year.
+
+    Parameters:
+    year (int): The year
+    source_dir (Path | str | None): Directory with a local copy of {year}eve.zip. See download_zips
+    """
+    download_zips([f"{RETROSHEET_EVENTS_URL}/{year}eve.zip"], source_dir, desc=f" Retrosheet {year} downloading")
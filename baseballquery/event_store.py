@@ -0,0 +1,954 @@
+"""
+Where the converted events are stored. There are three backends:
+- hdf5: chadwick.hdf5 with one table per year (year_1912, year_1913, ...). This is the default.
+- parquet: a chadwick_parquet directory partitioned by year (chadwick_parquet/year=1912/part-0.parquet, ...).
+  Only the columns that are asked for are read, and each row group keeps min/max statistics so rows can be skipped when filtering.
+  Needs pyarrow (pip install baseballquery[parquet])
+- npy: a chadwick_npy directory with a file of raw NumPy data for each column, which is memory-mapped instead of read (see NpyEventStore).
+  Processes reading it share one copy of it in memory. Meant to be built from another store with copy_store("npy").
+
+get_store() uses the BASEBALLQUERY_BACKEND environment variable if it's set, then the npy or parquet store if one exists, otherwise the HDF5 one.
+
+Only the Chadwick fields are saved. The counting stat columns (PA, H, ER, etc.) are added when a year is read (see derived_columns).
+
+Reads can be limited to the events matching predicates like ("OUTS_CT", "in", [1, 2]). They're pushed down to the backend when possible
+(HDF5 where expressions on its data columns, Parquet filters), so rows that don't match are never loaded.
+
+Seasons that are read are kept in season_cache (1 GB by default, see SeasonCache) so reading them again doesn't touch the disk.
+While it's on, whole seasons are read and the predicates are applied in memory.
+
+Every time a year is written it gets a new version (see EventStore.version), which result_cache uses to tell if a saved result is out of date.
+When a year is written its indexes are saved too (see indexes): the rows each player is in (chadwick.hdf5_players/1912.npz, ...) and the rows and summary of each game
+(chadwick.hdf5_games/1912.npz, ...). PLAYER_ID and GAME_ID predicates use them to read only those rows.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+import numpy as np
+import pandas as pd  # type: ignore
+import h5py  # type: ignore
+from tqdm import tqdm
+from . import ingest_metrics
+from .derived_columns import derived_columns, source_columns, add_derived_columns
+
+BACKENDS = ["hdf5", "parquet", "npy"]
+
+# (column, "==" or "in", value). For "in", value is a list. The column can be "PLAYER_ID", which matches any of player_columns (see EventStore.player_rows)
+Predicate = tuple[str, str, Any]
+# Columns HDF5 stores as data columns so that where expressions can select rows by them. These are the columns StatSplits filters by
+data_columns = [
+    "RESP_BAT_ID", "RESP_PIT_ID", "RESP_BAT_HAND_CD", "RESP_PIT_HAND_CD", "RESP_BAT_START_FL", "RESP_PIT_START_FL", "BAT_LINEUP_ID", "BAT_FLD_CD",
+    "AWAY_TEAM_ID", "HOME_TEAM_ID", "BAT_TEAM_ID", "FLD_TEAM_ID", "INN_CT", "OUTS_CT", "BALLS_CT", "STRIKES_CT", "AWAY_SCORE_CT", "HOME_SCORE_CT", "START_BASES_CD",
+]
+
+# Columns in each group share the same categories so they can be compared to each other (e.g. HOME_TEAM_ID == BAT_TEAM_ID)
+categorical_column_groups: list[list[str]] = [
+    ["RESP_BAT_ID", "RESP_PIT_ID", "BASE1_RUN_ID", "BASE2_RUN_ID", "BASE3_RUN_ID", "RUN1_RESP_PIT_ID", "RUN2_RESP_PIT_ID", "RUN3_RESP_PIT_ID"],
+    ["AWAY_TEAM_ID", "HOME_TEAM_ID", "BAT_TEAM_ID", "FLD_TEAM_ID"],
+    ["GAME_ID"],
+    ["RESP_BAT_HAND_CD", "RESP_PIT_HAND_CD"],
+    ["BATTEDBALL_CD"],
+    ["BATTEDBALL_LOC_TX"],
+]
+# Every column with a player in it (batter, pitcher, baserunners and the pitchers responsible for them). The player index of each year maps players to the rows they're in
+player_columns = categorical_column_groups[0]
+
+
+def categorize_events(df: pd.DataFrame):
+    """
+    Convert the ID and code columns of a DataFrame of events to categoricals, in place.
+    Columns that are already categorical get their categories unified with the rest of their group.
+    """
+    for columns in categorical_column_groups:
+        columns = [column for column in columns if column in df.columns]
+        if not columns:
+            continue
+        categories: set[str] = set()
+        for column in columns:
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                categories.update(df[column].cat.categories)  # type: ignore
+            else:
+                categories.update(df[column].dropna().unique())  # type: ignore
+        dtype = pd.CategoricalDtype(sorted(categories))
+        for column in columns:
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                df[column] = df[column].cat.set_categories(dtype.categories)  # type: ignore
+            else:
+                df[column] = df[column].astype(dtype)  # type: ignore
+
+
+def concat_events(events_list: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate DataFrames of events (e.g. multiple years) while keeping the categorical columns categorical.
+    pd.concat would turn them back into objects whenever the categories differ. The DataFrames are modified in place.
+    """
+    if len(events_list) == 1:
+        return events_list[0]
+    for columns in categorical_column_groups:
+        columns = [column for column in columns if all(column in events.columns for events in events_list)]
+        if not columns or not all(isinstance(events[column].dtype, pd.CategoricalDtype) for events in events_list for column in columns):
+            continue
+        categories: set[str] = set()
+        for events in events_list:
+            for column in columns:
+                categories.update(events[column].cat.categories)  # type: ignore
+        dtype = pd.CategoricalDtype(sorted(categories))
+        for events in events_list:
+            for column in columns:
+                events[column] = events[column].cat.set_categories(dtype.categories)  # type: ignore
+    return pd.concat(events_list, ignore_index=True)  # type: ignore
+
+
+def predicate_mask(df: pd.DataFrame, predicates: list[Predicate]) -> np.ndarray:
+    """
+    Boolean mask of the events that match every predicate
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for column, operator, value in predicates:
+        assert operator in ["==", "in"], f"Invalid operator {operator}. Valid operators are '==', 'in'"
+        if column == "PLAYER_ID":
+            values = [value] if operator == "==" else value
+            mask &= np.logical_or.reduce([df[column].isin(values).to_numpy(dtype=bool, na_value=False) for column in player_columns if column in df.columns])  # type: ignore
+            continue
+        mask &= (df[column] == value if operator == "==" else df[column].isin(value)).to_numpy(dtype=bool, na_value=False)  # type: ignore
+    return mask
+
+
+def predicate_columns(predicates: list[Predicate]) -> list[str]:
+    """
+    The columns predicates use
+    """
+    return list(dict.fromkeys(column for predicate in predicates for column in (player_columns if predicate[0] == "PLAYER_ID" else [predicate[0]])))
+
+
+def player_index(df: pd.DataFrame) -> dict[str, np.ndarray]:
+    """
+    The rows of the events each player is in (in any of player_columns), as players, offsets and rows: the rows of players[i] are rows[offsets[i]:offsets[i + 1]], in order
+    """
+    columns = [column for column in player_columns if column in df.columns]
+    players: set[str] = set()
+    for column in columns:
+        players.update(df[column].cat.categories if isinstance(df[column].dtype, pd.CategoricalDtype) else df[column].dropna().unique())  # type: ignore
+    categories = pd.Index(sorted(players))
+    column_codes: list[np.ndarray] = [np.zeros(0, dtype=np.int64)]
+    for column in columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            # Not astype, which leaves the codes alone when the categories are only in a different order (as they are in the npy store)
+            recode = categories.get_indexer(df[column].cat.categories)  # type: ignore
+            codes = df[column].cat.codes.to_numpy(dtype=np.int64)  # type: ignore
+            column_codes.append(np.where(codes >= 0, recode[codes], -1))
+        else:
+            column_codes.append(categories.get_indexer(df[column]).astype(np.int64))  # type: ignore
+    codes = np.concatenate(column_codes)
+    rows = np.tile(np.arange(len(df), dtype=np.int64), len(columns))
+    # Sorted by player and then row, without the rows a player is in more than once (e.g. a pitcher charged with a runner)
+    keys = np.unique(codes[codes >= 0] * max(len(df), 1) + rows[codes >= 0])
+    codes, rows = np.divmod(keys, max(len(df), 1))
+    counts = np.bincount(codes, minlength=len(categories))
+    return {
+        "players": categories.to_numpy(dtype=str)[counts > 0],  # type: ignore
+        "offsets": np.concatenate([[0], np.cumsum(counts[counts > 0])]),
+        "rows": rows.astype(np.int32),
+    }
+
+
+# Columns game_index uses
+game_columns = ["GAME_ID", "HOME_TEAM_ID", "AWAY_TEAM_ID", "BAT_TEAM_ID", "HOME_SCORE_CT", "AWAY_SCORE_CT", "EVENT_RUNS_CT", "RESP_PIT_ID"]
+
+
+def game_index(df: pd.DataFrame) -> dict[str, np.ndarray]:
+    """
+    Each game in the events, in order, with the rows it's in (start to stop, since the events of a game are next to each other), its date, teams, final score and starting pitchers
+    """
+    game_ids = df["GAME_ID"].to_numpy(dtype=str)
+    # Where the game changes from one event to the next
+    changes = np.flatnonzero(game_ids[1:] != game_ids[:-1]) + 1
+    starts = np.concatenate([[0], changes]) if len(df) else np.zeros(0, dtype=np.int64)
+    stops = np.concatenate([changes, [len(df)]]) if len(df) else np.zeros(0, dtype=np.int64)
+    if len(set(game_ids[starts])) != len(starts):
+        raise ValueError("The events of each game have to be next to each other")
+    last = stops - 1
+    home_batting = df["BAT_TEAM_ID"].to_numpy(dtype=str) == df["HOME_TEAM_ID"].to_numpy(dtype=str)
+    runs = df["EVENT_RUNS_CT"].to_numpy()
+    games = np.repeat(np.arange(len(starts)), stops - starts)
+    pitchers = df["RESP_PIT_ID"].to_numpy(dtype=str)
+    start_pitchers: dict[str, np.ndarray] = {}
+    for name, fielding in [("HOME_START_PIT_ID", ~home_batting), ("AWAY_START_PIT_ID", home_batting)]:
+        # The pitcher of the first event each team was in the field for
+        rows = np.flatnonzero(fielding)
+        first_games, first = np.unique(games[rows], return_index=True)
+        start_pitchers[name] = np.full(len(starts), "", dtype=pitchers.dtype)
+        start_pitchers[name][first_games] = pitchers[rows[first]]
+    return {
+        "GAME_ID": game_ids[starts],
+        "start": starts.astype(np.int64),
+        "stop": stops.astype(np.int64),
+        "GAME_DT": pd.to_datetime(pd.Series(game_ids[starts], dtype=object).str.slice(3, 11), format="%Y%m%d").to_numpy(),  # type: ignore
+        "HOME_TEAM_ID": df["HOME_TEAM_ID"].to_numpy(dtype=str)[starts],
+        "AWAY_TEAM_ID": df["AWAY_TEAM_ID"].to_numpy(dtype=str)[starts],
+        # The score before the last event, plus the runs scored on it
+        "HOME_SCORE": df["HOME_SCORE_CT"].to_numpy()[last] + np.where(home_batting[last], runs[last], 0),
+        "AWAY_SCORE": df["AWAY_SCORE_CT"].to_numpy()[last] + np.where(home_batting[last], 0, runs[last]),
+        **start_pitchers,
+    }
+
+
+# The indexes saved for each year when it's written (see EventStore.index): name: (columns it's built from, function that builds it)
+indexes: dict[str, tuple[list[str], Callable[[pd.DataFrame], dict[str, np.ndarray]]]] = {
+    "players": (player_columns, player_index),
+    "games": (game_columns, game_index),
+}
+
+
+def hdf5_condition(predicate: Predicate) -> str:
+    """
+    A predicate as an HDF5 where expression, e.g. ("OUTS_CT", "in", [1, 2]) -> "OUTS_CT = [1, 2]"
+    """
+    column, operator, value = predicate
+    values = value if operator == "in" else [value]
+    # repr of numpy scalars isn't a literal the expression parser understands
+    values = [value.item() if isinstance(value, np.generic) else value for value in values]
+    return f"{column} = {values!r}"
+
+
+def drop_derived_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The DataFrame without its derived columns (see derived_columns). Only copied if it has any
+    """
+    columns = [column for column in derived_columns if column in df.columns]
+    if not columns:
+        return df
+    return df.drop(columns=columns)
+
+
+class SeasonCache:
+    """
+    Seasons that were read from an event store, kept in memory (shared by every StatSplits in the process) so they don't have to be read again.
+    Every event of a season is kept, but only the columns that were asked for. Columns read later are added to the season that's cached.
+    When the cache is over its budget the seasons that were used least recently are dropped.
+    Seasons that won't fit in the budget (on their own, or with the other seasons of a read_years) aren't read whole just to be dropped.
+    Only their events that match the predicates are read, so the store can push them down, and they aren't cached.
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        Parameters:
+        max_bytes (int): Memory budget. 0 turns the cache off
+        """
+        self.max_bytes = max_bytes
+        # (store path, year): (events, whether they have every stored column). In order of use, the least recent first
+        self.seasons: OrderedDict[tuple[str, int], tuple[pd.DataFrame, bool]] = OrderedDict()
+        self.sizes: dict[tuple[str, int], int] = {}
+        # Bytes per row of each column, from the events that were read, to tell whether a season fits before it's read
+        self.row_bytes: dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def read(self, store: "EventStore", year: int, columns: list[str] | None = None, predicates: list[Predicate] | None = None, rows: np.ndarray | None = None, cache: bool = True) -> pd.DataFrame:
+        """
+        The same as store.read_stored_year, but read from the cache if the season (and columns) are there.
+        The DataFrame shares its columns with the cache rather than copying them. Columns can be added to it or replaced, but don't change their values in place.
+        If rows is given only those rows are read (see EventStore.read_stored_rows), and they aren't added to the cache when the season isn't there.
+        If cache is False a season that isn't cached is read with the predicates pushed down, and isn't added to the cache.
+        """
+        key = (str(store.path), year)
+        if columns is not None:
+            columns = list(dict.fromkeys(columns + predicate_columns(predicates or [])))
+        with self.lock:
+            events, complete = self.seasons.get(key, (None, False))
+            if columns is None or events is None:
+                missing = not complete
+            else:
+                missing = not complete and not set(columns) <= set(events.columns)
+            if missing:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.seasons.move_to_end(key)
+        if missing:
+            if rows is not None:
+                # Reading the few rows is faster than reading the season to cache it
+                return store.read_stored_rows(year, rows, columns, predicates)
+            cached_columns = None if columns is None else columns if events is None else list(dict.fromkeys(list(events.columns) + columns))
+            size = self.estimate(store, year, cached_columns)
+            if not cache or (size is not None and size > self.max_bytes):
+                # add would drop it straight away, or it would push out the other seasons being read
+                events = store.read_stored_year(year, columns, predicates)
+                self.learn(events)
+                return events if columns is None else events.reindex(columns=columns)  # type: ignore
+            if columns is None or events is None:
+                events = store.read_stored_year(year, columns)
+            else:
+                new_events = store.read_stored_year(year, [column for column in columns if column not in events.columns])
+                events = pd.concat([events, new_events], axis=1, copy=False)  # type: ignore
+                # The two reads may have different categories for columns that share them (see categorical_column_groups)
+                categorize_events(events)
+            self.add(key, events, columns is None)  # type: ignore
+        if rows is not None:
+            events = events.iloc[rows].reset_index(drop=True)  # type: ignore
+        if predicates:
+            return events.loc[predicate_mask(events, predicates), columns if columns is not None else slice(None)].reset_index(drop=True)  # type: ignore
+        if columns is None:
+            return events.copy(deep=False)  # type: ignore
+        return pd.DataFrame({column: events[column] for column in columns}, copy=False)  # type: ignore
+
+    def fits(self, store: "EventStore", years: list[int], columns: list[str] | None) -> bool:
+        """
+        Whether these seasons (with these columns) fit in the cache together. True if their size can't be told without reading them
+        """
+        sizes = [self.estimate(store, year, columns) for year in years]
+        return any(size is None for size in sizes) or sum(sizes) <= self.max_bytes  # type: ignore
+
+    def estimate(self, store: "EventStore", year: int, columns: list[str] | None) -> int | None:
+        """
+        The bytes a season would take in the cache with these columns, or None if it can't be told without reading it
+        """
+        if columns is None:
+            return None
+        rows = store.year_rows(year)
+        if rows is None:
+            return None
+        # Columns that haven't been read yet are guessed to be 8 bytes a row (like an int64 or an object)
+        return int(rows * sum(self.row_bytes.get(column, 8) for column in columns))
+
+    def learn(self, events: pd.DataFrame):
+        if not len(events):
+            return
+        usage = events.memory_usage(index=False)  # type: ignore
+        with self.lock:
+            for column in events.columns:
+                self.row_bytes[column] = float(usage[column]) / len(events)
+
+    def add(self, key: tuple[str, int], events: pd.DataFrame, complete: bool):
+        self.learn(events)
+        size = int(events.memory_usage(index=False).sum())  # type: ignore
+        with self.lock:
+            self.seasons.pop(key, None)
+            self.sizes.pop(key, None)
+            if size > self.max_bytes:
+                return
+            self.seasons[key] = (events, complete)
+            self.sizes[key] = size
+            while sum(self.sizes.values()) > self.max_bytes:
+                oldest = next(iter(self.seasons))
+                del self.seasons[oldest]
+                del self.sizes[oldest]
+                self.evictions += 1
+
+    def discard(self, path: str, year: int):
+        """
+        Drop a season from the cache (e.g. because it was written again)
+        """
+        with self.lock:
+            self.seasons.pop((path, year), None)
+            self.sizes.pop((path, year), None)
+
+    def clear(self):
+        with self.lock:
+            self.seasons.clear()
+            self.sizes.clear()
+
+    def info(self) -> dict[str, int]:
+        """
+        Hits, misses (reads that needed the disk, including ones that only had some columns missing), evictions, and the seasons and bytes that are cached
+        """
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "seasons": len(self.seasons),
+                "bytes": sum(self.sizes.values()),
+                "max_bytes": self.max_bytes,
+            }
+
+
+# Set BASEBALLQUERY_SEASON_CACHE_MB (or season_cache.max_bytes) to change the budget. 0 turns it off
+season_cache = SeasonCache(int(float(os.environ.get("BASEBALLQUERY_SEASON_CACHE_MB", "1024")) * 1_000_000))
+
+
+class EventStore:
+    """
+    Parent class. Use get_store() instead of instantiating the subclasses directly
+    """
+
+    backend = ""
+    # Whether reads go through season_cache
+    cached = True
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def years(self) -> list[int]:
+        """
+        The years in the store, in order
+        """
+        raise NotImplementedError
+
+    def read_year(self, year: int, columns: list[str] | None = None, predicates: list[Predicate] | None = None, cache: bool = True) -> pd.DataFrame:
+        """
+        Read the events of one year, with the derived columns (see derived_columns) added.
+
+        Parameters:
+        year (int): The year
+        columns (list[str] | None): Only read these columns. They can be derived columns, in which case only the columns they're computed from are read. Defaults to every column.
+        predicates (list[Predicate] | None): Only read the events that match all of these, e.g. [("OUTS_CT", "in", [1, 2])]. They can only use saved columns, not derived ones.
+            PLAYER_ID and GAME_ID predicates are looked up in the player and game indexes (see player_rows and game_rows), so only the rows of those players or games are read.
+        cache (bool): Whether the season can be kept in season_cache if it has to be read from disk (see SeasonCache.read)
+        """
+        rows = None
+        for column, operator, value in predicates or []:
+            if column in ["PLAYER_ID", "GAME_ID"]:
+                values = [value] if operator == "==" else value
+                index_rows = self.player_rows(year, values) if column == "PLAYER_ID" else self.game_rows(year, values)
+                rows = index_rows if rows is None else np.intersect1d(rows, index_rows)
+        if rows is not None:
+            predicates = [predicate for predicate in predicates or [] if predicate[0] not in ["PLAYER_ID", "GAME_ID"]]
+        # Read from the season cache if it's on
+        if self.cached and season_cache.max_bytes > 0:
+            df = season_cache.read(self, year, None if columns is None else source_columns(columns), predicates, rows, cache)
+        elif rows is not None:
+            df = self.read_stored_rows(year, rows, None if columns is None else source_columns(columns), predicates)
+        else:
+            df = self.read_stored_year(year, None if columns is None else source_columns(columns), predicates)
+        return self.add_derived_columns(df, columns, str(year))
+
+    def add_derived_columns(self, df: pd.DataFrame, columns: list[str] | None, key: str) -> pd.DataFrame:
+        """
+        Add the derived columns to events read from the store, and only keep these columns (in this order)
+        """
+        if columns is None:
+            # Stores written before the derived columns were computed on read still have them saved. They're computed again so they're always up to date
+            df = drop_derived_columns(df)
+        if ingest_metrics.ingesting():
+            with ingest_metrics.measure("derived", key) as measurement:
+                add_derived_columns(df, columns)
+                measurement["rows"] = len(df)
+        else:
+            # Queries aren't part of an ingest, so they don't go to the metrics log or hooks
+            add_derived_columns(df, columns)
+        if columns is None:
+            return df
+        # A new DataFrame with the same columns rather than df[columns], which copies them (and which pandas treats as a view of df and warns about when columns are added to it later)
+        return pd.DataFrame({column: df[column] for column in columns}, index=df.index, copy=False)
+
+    def year_rows(self, year: int) -> int | None:
+        """
+        The number of events in a year, if the backend can tell without reading them
+        """
+        return None
+
+    def read_stored_year(self, year: int, columns: list[str] | None = None, predicates: list[Predicate] | None = None) -> pd.DataFrame:
+        """
+        Read the events of one year as they're saved, without the derived columns.
+
+        Parameters:
+        year (int): The year
+        columns (list[str] | None): Only read these columns. The columns of predicates that can't be pushed down to the backend may be included too. Defaults to every column.
+        predicates (list[Predicate] | None): Only read the events that match all of these (see read_year)
+        """
+        raise NotImplementedError
+
+    def read_stored_rows(self, year: int, rows: np.ndarray, columns: list[str] | None = None, predicates: list[Predicate] | None = None) -> pd.DataFrame:
+        """
+        Read some rows of a year as they're saved (see read_stored_year). Backends that can read rows without reading the whole year override this.
+
+        Parameters:
+        year (int): The year
+        rows (np.ndarray): The positions of the rows in the year, in order
+        columns (list[str] | None): Only read these columns. Defaults to every column.
+        predicates (list[Predicate] | None): Only keep the rows that match all of these
+        """
+        if columns is not None:
+            columns = list(dict.fromkeys(columns + predicate_columns(predicates or [])))
+        df = self.read_stored_year(year, columns).iloc[rows].reset_index(drop=True)  # type: ignore
+        if predicates:
+            df = df[predicate_mask(df, predicates)].reset_index(drop=True)
+        return df
+
+    def write_year(self, year: int, df: pd.DataFrame):
+        """
+        Save the events of one year, replacing that year if it's already in the store. Derived columns aren't saved.
+        """
+        raise NotImplementedError
+
+    def read_years(self, years: list[int], columns: list[str] | None = None, predicates: list[Predicate] | None = None) -> pd.DataFrame:
+        """
+        Read and concatenate the events of several years (see read_year).
+        If the years don't fit in season_cache together, the ones that aren't cached are read with the predicates pushed down instead of being cached, since they'd push each other out.
+        """
+        cache = not (self.cached and season_cache.max_bytes > 0) or season_cache.fits(self, years, None if columns is None else source_columns(columns))
+        return concat_events([self.read_year(year, columns, predicates, cache) for year in years])
+
+    def versions_file(self) -> Path:
+        return self.path.with_name(self.path.name + "_versions.json")
+
+    def year_versions(self) -> dict[int, str]:
+        """
+        The version of each year, which changes every time the year is written (see written)
+        """
+        if not self.versions_file().exists():
+            return {}
+        with open(self.versions_file()) as f:
+            return {int(year): version for year, version in json.load(f).items()}
+
+    def written(self, year: int, df: pd.DataFrame):
+        """
+        Called by write_year once a year is written. Drops the year from season_cache, gives it a new version and saves its indexes
+        """
+        season_cache.discard(str(self.path), year)
+        versions = self.year_versions()
+        versions[year] = uuid.uuid4().hex
+        temp_file = self.versions_file().with_suffix(".tmp")
+        with open(temp_file, "w") as f:
+            json.dump({str(year): version for year, version in sorted(versions.items())}, f, indent=4)
+        temp_file.replace(self.versions_file())
+        for name in indexes:
+            self.write_index(name, year, df, versions[year])
+
+    def index_file(self, name: str, year: int) -> Path:
+        return self.path.with_name(f"{self.path.name}_{name}") / f"{year}.npz"
+
+    def write_index(self, name: str, year: int, df: pd.DataFrame, version: str):
+        """
+        Save one of the indexes of a year (see indexes), along with the version of the year it was built from
+        """
+        arrays = indexes[name][1](df)
+        file = self.index_file(name, year)
+        file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = file.with_suffix(".tmp")
+        with open(temp_file, "wb") as f:
+            np.savez(f, **arrays, version=np.array(version))
+        temp_file.replace(file)
+
+    def index(self, name: str, year: int) -> dict[str, np.ndarray]:
+        """
+        One of the indexes of a year (see indexes), saved when the year was written. Years written before there was an index (or since it was saved) get it built now.
+        """
+        version = self.year_versions().get(year, "")
+        file = self.index_file(name, year)
+        if file.exists():
+            with np.load(file) as npz:
+                if str(npz["version"]) == version:
+                    return {key: npz[key] for key in npz.files if key != "version"}
+        self.write_index(name, year, self.read_stored_year(year, indexes[name][0]), version)
+        return self.index(name, year)
+
+    def player_rows(self, year: int, players: list[str]) -> np.ndarray:
+        """
+        The positions of the rows of a year that any of these players are in (in any of player_columns), in order. Looked up in the player index (see player_index)
+        """
+        index = self.index("players", year)
+        index_players, offsets, rows = index["players"], index["offsets"], index["rows"]
+        positions = np.searchsorted(index_players, players)
+        slices = [rows[offsets[i] : offsets[i + 1]] for player, i in zip(players, positions) if i < len(index_players) and index_players[i] == player]
+        if len(slices) == 1:
+            return slices[0]
+        return np.unique(np.concatenate(slices or [np.zeros(0, dtype=np.int32)]))
+
+    def game_rows(self, year: int, game_ids: list[str]) -> np.ndarray:
+        """
+        The positions of the rows of these games in a year, in order. Looked up in the game index (see game_index)
+        """
+        index = self.index("games", year)
+        positions = pd.Index(index["GAME_ID"]).get_indexer(game_ids)  # type: ignore
+        positions = np.unique(positions[positions >= 0])
+        return np.concatenate([np.arange(index["start"][i], index["stop"][i], dtype=np.int32) for i in positions] or [np.zeros(0, dtype=np.int32)])
+
+    def games(self, years: list[int]) -> pd.DataFrame:
+        """
+        Every game of these years: its GAME_ID, date, teams, final score and starting pitchers, and the rows of its year it's in (start to stop). Read from the game index (see game_index)
+        """
+        games: list[pd.DataFrame] = []
+        for year in years:
+            index = self.index("games", year)
+            df = pd.DataFrame({column: index[column] for column in ["GAME_ID", "GAME_DT", "HOME_TEAM_ID", "AWAY_TEAM_ID", "HOME_SCORE", "AWAY_SCORE", "HOME_START_PIT_ID", "AWAY_START_PIT_ID"]})
+            df["year"] = np.int16(year)
+            df["start"] = index["start"]
+            df["stop"] = index["stop"]
+            games.append(df)
+        if not games:
+            return pd.DataFrame()
+        return pd.concat(games, ignore_index=True)  # type: ignore
+
+    def version(self, years: list[int]) -> str:
+        """
+        A hash that changes whenever any of these years is written, e.g. to tell if results calculated from them are out of date.
+        Years written before versions were recorded use the time the store was last changed instead.
+        """
+        versions = self.year_versions()
+        sha = hashlib.sha256(f"{self.backend}|{self.path}".encode())
+        for year in years:
+            sha.update(f"|{year}:{versions.get(year) or self.path.stat().st_mtime_ns}".encode())
+        return sha.hexdigest()
+
+
+class HDF5EventStore(EventStore):
+    backend = "hdf5"
+
+    def years(self) -> list[int]:
+        if not self.exists():
+            return []
+        with h5py.File(self.path) as f:
+            return sorted(int(key[-4:]) for key in f.keys())  # type: ignore
+
+    def year_rows(self, year: int) -> int | None:
+        with pd.HDFStore(self.path, "r") as store:
+            return store.get_storer(f"year_{year}").nrows  # type: ignore
+
+    def read_stored_year(self, year: int, columns: list[str] | None = None, predicates: list[Predicate] | None = None) -> pd.DataFrame:
+        with pd.HDFStore(self.path, "r") as store:
+            key = f"year_{year}"
+            # Years written before data_columns existed can't be selected by where, so those predicates are applied after reading
+            stored_data_columns: list[str] = store.get_storer(key).data_columns  # type: ignore
+            where = [predicate for predicate in predicates or [] if predicate[0] in stored_data_columns and (predicate[1] == "==" or len(predicate[2]) > 0)]
+            rest = [predicate for predicate in predicates or [] if predicate not in where]
+            if columns is not None:
+                columns = columns + [predicate[0] for predicate in rest if predicate[0] not in columns]
+            df: pd.DataFrame = store.select(key, columns=columns, where=[hdf5_condition(predicate) for predicate in where] or None)  # type: ignore
+        if rest:
+            df = df[predicate_mask(df, rest)]
+        if predicates:
+            # Like an unfiltered read, and so the derived columns are added to a new DataFrame rather than a slice of one
+            df = df.reset_index(drop=True)
+        return df
+
+    def read_stored_rows(self, year: int, rows: np.ndarray, columns: list[str] | None = None, predicates: list[Predicate] | None = None) -> pd.DataFrame:
+        if columns is not None:
+            columns = list(dict.fromkeys(columns + predicate_columns(predicates or [])))
+        with pd.HDFStore(self.path, "r") as store:
+            if len(rows):
+                # An array of positions selects those rows
+                df: pd.DataFrame = store.select(f"year_{year}", columns=columns, where=rows).reset_index(drop=True)  # type: ignore
+            else:
+                # An empty array would select every row
+                df = store.select(f"year_{year}", columns=columns, start=0, stop=0)  # type: ignore
+        if predicates:
+            df = df[predicate_mask(df, predicates)].reset_index(drop=True)
+        return df
+
+    def write_year(self, year: int, df: pd.DataFrame):
+        df = drop_derived_columns(df)
+        df.to_hdf(self.path, key=f"year_{year}", format="table", data_columns=[column for column in data_columns if column in df.columns])  # type: ignore
+        self.written(year, df)
+
+
+class ParquetEventStore(EventStore):
+    backend = "parquet"
+    # Small enough that the min/max statistics of each row group can rule out a good part of a year
+    row_group_size = 50_000
+
+    def year_file(self, year: int) -> Path:
+        return self.path / f"year={year}" / "part-0.parquet"
+
+    def years(self) -> list[int]:
+        if not self.exists():
+            return []
+        return sorted(int(directory.name[5:]) for directory in self.path.glob("year=*") if (directory / "part-0.parquet").exists())
+
+    def year_rows(self, year: int) -> int | None:
+        import pyarrow.parquet as pq  # type: ignore
+
+        return pq.ParquetFile(self.year_file(year)).metadata.num_rows  # type: ignore
+
+    def read_stored_year(self, year: int, columns: list[str] | None = None, predicates: list[Predicate] | None = None) -> pd.DataFrame:
+        import pyarrow.parquet as pq  # type: ignore
+
+        # The min/max statistics of each row group are used to skip the ones that can't match
+        df: pd.DataFrame = pq.read_table(self.year_file(year), columns=columns, filters=predicates or None).to_pandas()  # type: ignore
+        # Parquet only keeps the categories that are used by each column, so put the shared ones back
+        categorize_events(df)
+        return df
+
+    def read_stored_rows(self, year: int, rows: np.ndarray, columns: list[str] | None = None, predicates: list[Predicate] | None = None) -> pd.DataFrame:
+        import pyarrow.parquet as pq  # type: ignore
+
+        if columns is not None:
+            columns = list(dict.fromkeys(columns + predicate_columns(predicates or [])))
+        parquet_file = pq.ParquetFile(self.year_file(year))  # type: ignore
+        starts = np.cumsum([0] + [parquet_file.metadata.row_group(i).num_rows for i in range(parquet_file.num_row_groups)])  # type: ignore
+        # Only the row groups with the rows in them are read
+        groups = np.searchsorted(starts, rows, side="right") - 1
+        read_groups = np.unique(groups)
+        read_starts = np.cumsum([0] + [starts[group + 1] - starts[group] for group in read_groups])
+        positions = rows - starts[groups] + read_starts[np.searchsorted(read_groups, groups)]
+        table = parquet_file.read_row_groups(read_groups.tolist(), columns=columns)  # type: ignore
+        df: pd.DataFrame = table.take(positions).to_pandas()  # type: ignore
+        categorize_events(df)
+        if predicates:
+            df = df[predicate_mask(df, predicates)].reset_index(drop=True)
+        return df
+
+    def write_year(self, year: int, df: pd.DataFrame):
+        import pyarrow as pa  # type: ignore
+        import pyarrow.parquet as pq  # type: ignore
+
+        file = self.year_file(year)
+        file.parent.mkdir(parents=True, exist_ok=True)
+        # Written next to the old file and then swapped in so an interrupted write doesn't leave a broken year behind
+        temp_file = file.with_suffix(".tmp")
+        df = drop_derived_columns(df)
+        table = pa.Table.from_pandas(df, preserve_index=False)  # type: ignore
+        pq.write_table(table, temp_file, row_group_size=self.row_group_size, compression="zstd", write_statistics=True)  # type: ignore
+        temp_file.replace(file)
+        self.written(year, df)
+
+
+def codes_dtype(categories: int) -> str:
+    """
+    The dtype pandas uses for the codes of a categorical with this many categories (so codes saved with it can be used without being copied)
+    """
+    for dtype in ["int8", "int16", "int32"]:
+        if categories < np.iinfo(dtype).max:
+            return dtype
+    return "int64"
+
+
+class NpyEventStore(EventStore):
+    """
+    Each column is one file of raw NumPy data (chadwick_npy/RESP_BAT_ID.bin, ...) with every year one after the other. The files are memory-mapped
+    instead of read, so nothing is copied into the process and every process using the store shares the OS page cache. Years that are next to each other
+    are a slice of the same arrays, so reading several of them doesn't copy anything either.
+    manifest.json has the rows of each year, the dtype of each column, and the categories of each group of categorical columns (see categorical_column_groups),
+    which are saved as their codes. New categories are added after the old ones, so writing a year never moves the codes already written. They're sorted
+    when they're read, like the other backends' are.
+
+    Years are appended. Writing a year that's already in the store (or one before the last year) writes the whole store again, so it's best to build it
+    in order, e.g. with copy_store("npy").
+    """
+
+    backend = "npy"
+    # The page cache already keeps it in memory (once for every process), while the season cache would copy it into each process
+    cached = False
+
+    def __init__(self, path: Path):
+        super().__init__(path)
+        # (mtime of manifest.json, manifest, CategoricalDtype of each group, memory-mapped column files, sorted code of each stored code of each group),
+        # so they're only loaded again when the store changes
+        self._manifest: tuple[int, dict[str, Any], dict[str, pd.CategoricalDtype], dict[str, np.ndarray], dict[str, np.ndarray | None]] | None = None
+
+    def manifest(self) -> tuple[dict[str, Any], dict[str, pd.CategoricalDtype]]:
+        """
+        manifest.json and the dtypes of the categorical columns, with their categories sorted
+        """
+        manifest_file = self.path / "manifest.json"
+        if not manifest_file.exists():
+            return {"rows": 0, "years": {}, "columns": {}, "categories": {}}, {}
+        mtime = manifest_file.stat().st_mtime_ns
+        if self._manifest is None or self._manifest[0] != mtime:
+            with open(manifest_file) as f:
+                manifest = json.load(f)
+            dtypes: dict[str, pd.CategoricalDtype] = {}
+            recodes: dict[str, np.ndarray | None] = {}
+            for group, categories in manifest["categories"].items():
+                order = sorted(range(len(categories)), key=categories.__getitem__)
+                dtypes[group] = pd.CategoricalDtype([categories[code] for code in order])
+                # None when they were stored in order. The last one is for -1 (NA)
+                recodes[group] = None
+                if order != list(range(len(categories))):
+                    recode = np.empty(len(categories) + 1, dtype=codes_dtype(len(categories)))
+                    recode[order] = np.arange(len(categories))
+                    recode[-1] = -1
+                    recodes[group] = recode
+            self._manifest = (mtime, manifest, dtypes, {}, recodes)
+        return self._manifest[1], self._manifest[2]
+
+    def categorical(self, group: str, codes: np.ndarray) -> pd.Categorical:
+        """
+        The values of a categorical column of a group from the codes in its file, with the group's categories sorted
+        """
+        _, dtypes = self.manifest()
+        recode = self._manifest[4][group]  # type: ignore
+        return pd.Categorical.from_codes(codes if recode is None else recode[codes], dtype=dtypes[group], validate=False)  # type: ignore
+
+    def array(self, column: str) -> np.ndarray:
+        """
+        The memory-mapped file of a column (codes for categorical columns)
+        """
+        manifest, _ = self.manifest()
+        arrays = self._manifest[3]  # type: ignore
+        if column not in arrays:
+            arrays[column] = np.memmap(self.path / f"{column}.bin", dtype=manifest["columns"][column]["dtype"], mode="r", shape=(manifest["rows"],))
+        return arrays[column]
+
+    def years(self) -> list[int]:
+        manifest, _ = self.manifest()
+        return sorted(int(year) for year in manifest["years"])
+
+    def read_rows(self, start: int, stop: int, columns: list[str] | None = None, predicates: list[Predicate] | None = None) -> pd.DataFrame:
+        """
+        Rows start to stop of the store (see read_stored_year). They're slices of the memory-mapped files, unless predicates are given
+        """
+        manifest, _ = self.manifest()
+        if columns is None:
+            columns = list(manifest["columns"])
+        else:
+            columns = list(dict.fromkeys(columns + [predicate[0] for predicate in predicates or []]))
+        data: dict[str, Any] = {}
+        for column in columns:
+            values = self.array(column)[start:stop]
+            group = manifest["columns"][column]["categories"]
+            data[column] = values if group is None else self.categorical(group, values)
+        df = pd.DataFrame(data, copy=False)
+        if predicates:
+            df = df[predicate_mask(df, predicates)].reset_index(drop=True)
+        return df
+
+    def read_stored_year(self, year: int, columns: list[str] | None = None, predicates: list[Predicate] | None = None) -> pd.DataFrame:
+        manifest, _ = self.manifest()
+        start, stop = manifest["years"][str(year)]
+        return self.read_rows(start, stop, columns, predicates)
+
+    def read_stored_rows(self, year: int, rows: np.ndarray, columns: list[str] | None = None, predicates: list[Predicate] | None = None) -> pd.DataFrame:
+        manifest, _ = self.manifest()
+        start = manifest["years"][str(year)][0]
+        if columns is None:
+            columns = list(manifest["columns"])
+        else:
+            columns = list(dict.fromkeys(columns + predicate_columns(predicates or [])))
+        data: dict[str, Any] = {}
+        for column in columns:
+            # Only these rows are copied out of the memory-mapped file
+            values = self.array(column)[start + rows]
+            group = manifest["columns"][column]["categories"]
+            data[column] = values if group is None else self.categorical(group, values)
+        df = pd.DataFrame(data, copy=False)
+        if predicates:
+            df = df[predicate_mask(df, predicates)].reset_index(drop=True)
+        return df
+
+    def read_years(self, years: list[int], columns: list[str] | None = None, predicates: list[Predicate] | None = None) -> pd.DataFrame:
+        manifest, _ = self.manifest()
+        ranges = [manifest["years"][str(year)] for year in years]
+        # Reads of players' or games' rows are done one year at a time, since each year has its own indexes
+        if not ranges or any(predicate[0] in ["PLAYER_ID", "GAME_ID"] for predicate in predicates or []) or any(previous[1] != following[0] for previous, following in zip(ranges, ranges[1:])):
+            return super().read_years(years, columns, predicates)
+        # The years are next to each other in the files, so they're read as one slice instead of being concatenated
+        df = self.read_rows(ranges[0][0], ranges[-1][1], None if columns is None else source_columns(columns), predicates)
+        return self.add_derived_columns(df, columns, f"{years[0]}-{years[-1]}")
+
+    def write_year(self, year: int, df: pd.DataFrame):
+        df = drop_derived_columns(df)
+        if self.years() and year <= self.years()[-1]:
+            self.rewrite(year, df)
+            self.written(year, df)
+            return
+        manifest = copy.deepcopy(self.manifest()[0])
+        rows: int = manifest["rows"]
+        if manifest["columns"] and set(manifest["columns"]) != set(df.columns):
+            raise ValueError(f"The columns of {year} don't match the columns of the years already in the store")
+        # Add the new categories of every column first, since the dtype of the codes depends on the number of categories of the whole group
+        groups: dict[str, str] = {}
+        for column in df.columns:
+            if isinstance(df[column].dtype, pd.CategoricalDtype) or df[column].dtype == object:
+                group = next((group[0] for group in categorical_column_groups if column in group), column)
+                categories: list[str] = manifest["categories"].setdefault(group, [])
+                column_categories = df[column].cat.categories if isinstance(df[column].dtype, pd.CategoricalDtype) else pd.Index(df[column].dropna().unique())  # type: ignore
+                # After the old ones, so the codes already written stay the same
+                categories.extend(column_categories[~column_categories.isin(categories)])  # type: ignore
+                groups[column] = group
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        for column in df.columns:
+            file = self.path / f"{column}.bin"
+            if column in groups:
+                categories = manifest["categories"][groups[column]]
+                # Not astype(CategoricalDtype(categories)), which keeps the year's own codes when it has the same categories in another order
+                array = pd.Index(categories).get_indexer(df[column].astype(object))  # type: ignore
+                info = {"dtype": codes_dtype(len(categories)), "categories": groups[column]}
+            else:
+                array = df[column].to_numpy()
+                info = {"dtype": manifest["columns"].get(column, {"dtype": str(array.dtype)})["dtype"], "categories": None}
+            old_dtype = manifest["columns"].get(column, info)["dtype"]
+            if rows and old_dtype != info["dtype"]:
+                # More categories than the old dtype of the codes can hold
+                np.fromfile(file, dtype=old_dtype, count=rows).astype(info["dtype"]).tofile(file.with_suffix(".tmp"))
+                file.with_suffix(".tmp").replace(file)
+            with open(file, "ab") as f:
+                # Anything after the rows in the manifest is from a write that was interrupted
+                f.truncate(rows * np.dtype(info["dtype"]).itemsize)
+                f.write(array.astype(info["dtype"], copy=False).tobytes())
+            manifest["columns"][column] = info
+        manifest["years"][str(year)] = [rows, rows + len(df)]
+        manifest["rows"] = rows + len(df)
+        # Replaced at once, so the store is never seen half written
+        temp_file = self.path / "manifest.tmp"
+        with open(temp_file, "w") as f:
+            json.dump(manifest, f)
+        temp_file.replace(self.path / "manifest.json")
+        self.written(year, df)
+
+    def rewrite(self, year: int, df: pd.DataFrame):
+        """
+        Write the whole store again with the events of a year replaced (or added)
+        """
+        temp_store = NpyEventStore(self.path.with_name(self.path.name + "_tmp"))
+        if temp_store.exists():
+            shutil.rmtree(temp_store.path)
+        for stored_year in tqdm(sorted(set(self.years()) | {year}), desc=f"Writing {self.path.name} again"):
+            temp_store.write_year(stored_year, df if stored_year == year else self.read_stored_year(stored_year))
+        # Processes that have the old files memory-mapped keep reading them until they're done with them
+        old_path = self.path.with_name(self.path.name + "_old")
+        self.path.rename(old_path)
+        temp_store.path.rename(self.path)
+        shutil.rmtree(old_path)
+        temp_store.versions_file().unlink(missing_ok=True)
+        # The other years' rows are the same, so their indexes are still right
+        for name in indexes:
+            shutil.rmtree(temp_store.index_file(name, year).parent, ignore_errors=True)
+        self._manifest = None
+
+
+def get_store(backend: str | None = None) -> EventStore:
+    """
+    Get the event store.
+
+    Parameters:
+    backend (str | None): 'hdf5', 'parquet' or 'npy'. Defaults to the BASEBALLQUERY_BACKEND environment variable, then 'npy' if chadwick_npy exists, 'parquet' if chadwick_parquet exists and 'hdf5' otherwise.
+    """
+    cwd = Path(__file__).parent
+    npy_store = NpyEventStore(cwd / "chadwick_npy")
+    parquet_store = ParquetEventStore(cwd / "chadwick_parquet")
+    if backend is None:
+        backend = os.environ.get("BASEBALLQUERY_BACKEND")
+    if backend is None:
+        backend = "npy" if npy_store.exists() else "parquet" if parquet_store.exists() else "hdf5"
+    backend = backend.lower()
+    assert backend in BACKENDS, f"Invalid backend {backend}. Valid backends are 'hdf5', 'parquet', 'npy'"
+    if backend == "npy":
+        return npy_store
+    if backend == "parquet":
+        return parquet_store
+    return HDF5EventStore(cwd / "chadwick.hdf5")
+
+
+def copy_store(backend: str):
+    """
+    Copy every year of the current event store into another backend, e.g. copy_store("parquet") to start using Parquet without converting the retrosheet files again.
+    The old store is kept. Delete it yourself once you don't need it anymore.
+
+    Parameters:
+    backend (str): 'hdf5', 'parquet' or 'npy'
+    """
+    source = get_store()
+    destination = get_store(backend)
+    if source.backend == destination.backend:
+        return
+    if isinstance(destination, NpyEventStore) and destination.exists():
+        # Built again from the start, since replacing its years one at a time would write the whole store again for each of them
+        shutil.rmtree(destination.path)
+    for year in tqdm(source.years(), desc=f"Copying events to {destination.backend}"):
+        destination.write_year(year, source.read_stored_year(year))
@@ -0,0 +1,125 @@
+"""
+Timings and throughput of each stage of building the event store, so you can tell where the time goes:
+- download: each zip fetched from Retrosheet (bytes downloaded)
+- extract: each zip extracted to downloads (bytes extracted)
+- parse: each event file read by cwevent or the python parser (rows)
+- categorize: each year's ID columns converted to categoricals (rows)
+- write: each year saved to the event store (bytes of the DataFrame that was written)
+- derived: the derived columns computed when a year is read during an ingest, e.g. for the linear weights (rows). Reads by queries aren't measured
+- linear_weights: each year's linear weights (rows)
+
+Every measurement is a dict like {"stage": "parse", "key": "2023NYA.EVA", "seconds": 0.41, "rows": 6312, ...}. It's passed to each hook (see add_hook),
+and if the BASEBALLQUERY_METRICS_LOG environment variable is set, appended to that file as a line of JSON.
+While an ingest is running (baseballquery.update or the first import) the measurements are also kept so that a summary can be printed at the end.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+import json
+import os
+import threading
+import time
+import pandas as pd  # type: ignore
+
+hooks: list[Callable[[dict[str, Any]], None]] = []
+# None when no ingest is running, so nothing piles up while querying
+measurements: list[dict[str, Any]] | None = None
+# Downloads are measured from several threads
+lock = threading.Lock()
+
+
+def add_hook(hook: Callable[[dict[str, Any]], None]):
+    """
+    Call a function with every measurement (e.g. to send them to a monitoring system)
+
+    Parameters:
+    hook (Callable[[dict[str, Any]], None]): Gets the measurement dict
+    """
+    hooks.append(hook)
+
+
+def remove_hook(hook: Callable[[dict[str, Any]], None]):
+    hooks.remove(hook)
+
+
+def record(stage: str, key: str, seconds: float, **counts: Any):
+    """
+    Record a measurement.
+
+    Parameters:
+    stage (str): The stage (download, parse, write, etc.)
+    key (str): What was measured, e.g. the file name or year
+    seconds (float): How long it took
+    counts: Anything else to include, usually rows and/or bytes
+    """
+    measurement: dict[str, Any] = {"stage": stage, "key": key, "seconds": seconds, **counts, "time": time.time()}
+    with lock:
+        if measurements is not None:
+            measurements.append(measurement)
+        log_file = os.environ.get("BASEBALLQUERY_METRICS_LOG")
+        if log_file:
+            with open(log_file, "a") as f:
+                f.write(json.dumps(measurement) + "\n")
+        for hook in hooks:
+            hook(measurement)
+
+
+@contextmanager
+def measure(stage: str, key: str) -> Iterator[dict[str, Any]]:
+    """
+    Time the code in the with block and record it (see record). Set counts like rows or bytes on the dict it gives you.
+    Nothing is recorded if the block raises an exception.
+    """
+    counts: dict[str, Any] = {}
+    start = time.perf_counter()
+    yield counts
+    record(stage, key, time.perf_counter() - start, **counts)
+
+
+def start():
+    """
+    Start keeping the measurements for summary(). Any that were kept before are dropped
+    """
+    global measurements
+    with lock:
+        measurements = []
+
+
+def ingesting() -> bool:
+    """
+    Whether an ingest is running (between start() and print_summary())
+    """
+    return measurements is not None
+
+
+def summary() -> pd.DataFrame:
+    """
+    The totals of each stage since start(): count, seconds, rows, bytes, rows per second and MB per second.
+    Seconds are added up over every file, so stages that run in parallel (download, parse) can add up to more than the time that passed.
+    """
+    df = pd.DataFrame(measurements or [], columns=["stage", "key", "seconds", "rows", "bytes"])
+    # min_count keeps stages that don't count rows or bytes as NaN instead of 0
+    totals = df.groupby("stage", sort=False).agg(  # type: ignore
+        count=("key", "count"),
+        seconds=("seconds", "sum"),
+        rows=("rows", lambda values: values.sum(min_count=1)),  # type: ignore
+        bytes=("bytes", lambda values: values.sum(min_count=1)),  # type: ignore
+    )
+    totals["rows_per_second"] = totals["rows"] / totals["seconds"]
+    totals["mb_per_second"] = totals["bytes"] / 1_000_000 / totals["seconds"]
+    return totals
+
+
+def print_summary():
+    """
+    Print summary() and stop keeping measurements
+    """
+    global measurements
+    if not measurements:
+        measurements = None
+        return
+    totals = summary()
+    with lock:
+        measurements = None
+    print("Ingest summary:")
+    print(totals.to_string(float_format=lambda value: f"{value:,.1f}", na_rep=""))  # type: ignore
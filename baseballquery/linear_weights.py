@@ -1,8 +1,16 @@
 from tqdm import tqdm
 import pandas as pd  # type: ignore
 from pathlib import Path
-import h5py  # type: ignore
 import numpy as np
+from . import ingest_metrics
+from .event_store import get_store
+
+# The only columns calc_linear_weights uses, so the rest don't have to be read
+linear_weights_columns = [
+    "PA", "AB", "1B", "2B", "3B", "HR", "UBB", "IBB", "HBP", "SF", "SH", "K", "SB", "CS", "FC", "R",
+    "EVENT_CD", "EVENT_OUTS_CT", "OUTS_CT", "START_BASES_CD", "END_BASES_CD", "EVENT_RUNS_CT", "FATE_RUNS_CT",
+    "BAT_DEST_ID", "RUN1_DEST_ID", "RUN2_DEST_ID", "RUN3_DEST_ID", "FB", "PU",
+]
 
 
 def calc_average_stats(events: pd.DataFrame):
@@ -246,24 +254,39 @@ def calc_linear_weights(events: pd.DataFrame):
     return run_expectancy_avg
 
 
-def calc_all_weights():
-    cwd = Path(__file__).parent
-    chadwick_file = cwd / "chadwick.hdf5"
+def calc_all_weights(years: list[int] | None = None, backend: str | None = None):
+    """
+    Calculate the linear weights for each year in the event store and save them to linear_weights.csv
 
+    Parameters:
+    years (list[int] | None): Only calculate these years, keeping the other rows of linear_weights.csv as they are. Defaults to every year.
+    backend (str | None): 'hdf5', 'parquet' or 'npy' (see event_store). Defaults to the store that exists.
+    """
+    cwd = Path(__file__).parent
     linear_weights_dir = cwd
     linear_weights_dir.mkdir(parents=True, exist_ok=True)
 
-    with h5py.File(chadwick_file) as f: # type: ignore
-        years: list[str] = list(f.keys())   # type: ignore
+    store = get_store(backend)
+    stored_years = store.years()
+    if years is not None:
+        stored_years = [year for year in stored_years if year in years]
+    if not stored_years:
+        return
 
     weights_pd_list = []
-    for year in tqdm(years, desc="Years", position=0, leave=True):
-        events = pd.read_hdf(chadwick_file, year)  # type: ignore
-        weights = calc_linear_weights(events)  # type: ignore
-        weights["year"] = int(year[-4:])
+    for year in tqdm(stored_years, desc="Years", position=0, leave=True):
+        events = store.read_year(year, columns=linear_weights_columns)
+        with ingest_metrics.measure("linear_weights", str(year)) as measurement:
+            weights = calc_linear_weights(events)  # type: ignore
+            measurement["rows"] = len(events)
+        weights["year"] = year
         weights_pd = pd.DataFrame(weights)
         weights_pd_list.append(weights_pd)  # type: ignore
 
     weights_pd = pd.concat(weights_pd_list, ignore_index=True)  # type: ignore
     weights_pd.set_index("year", inplace=True)  # type: ignore
+    if years is not None and (linear_weights_dir / "linear_weights.csv").exists():
+        # Replace the rows for the recalculated years and keep the rest
+        old_weights_pd = pd.read_csv(linear_weights_dir / "linear_weights.csv", index_col="year")  # type: ignore
+        weights_pd = pd.concat([old_weights_pd.drop(weights_pd.index, errors="ignore"), weights_pd]).sort_index()  # type: ignore
     _ = weights_pd.to_csv(linear_weights_dir / f"linear_weights.csv")  # type: ignore
@@ -0,0 +1,117 @@
+"""
+Stats calculated by StatSplits.calculate_stats are saved to disk, so asking for the same split again (even in another process) is just a file read.
+Each result is saved under a hash of the query (the calculator, years, split, find, split_by and filters) and the version of the data it was calculated from:
+the version of each year in the event store (see EventStore.version), linear_weights.csv and the code that calculates the stats.
+Writing a season to the event store changes its version, so results calculated from the old data are never used again, and they're deleted once the cache is full.
+
+The cache keeps up to BASEBALLQUERY_RESULT_CACHE_MB megabytes of results (256 by default), deleting the ones that were used least recently first. 0 turns it off.
+"""
+
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any
+import pandas as pd  # type: ignore
+
+
+class ResultCache:
+    def __init__(self, directory: Path, max_bytes: int):
+        """
+        Parameters:
+        directory (Path): Where the results are saved
+        max_bytes (int): Results are deleted once the files add up to more than this
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def file(self, key: str) -> Path:
+        return self.directory / f"{key}.pkl"
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        """
+        The result saved under key, or None if there isn't one
+        """
+        file = self.file(key)
+        try:
+            stats: pd.DataFrame = pd.read_pickle(file)  # type: ignore
+        except FileNotFoundError:
+            with self.lock:
+                self.misses += 1
+            return None
+        except Exception:
+            # Left half written or by an incompatible version of pandas
+            file.unlink(missing_ok=True)
+            with self.lock:
+                self.misses += 1
+            return None
+        try:
+            # The modification time is when the result was last used, so the least recently used are evicted first
+            os.utime(file)
+        except FileNotFoundError:
+            pass
+        with self.lock:
+            self.hits += 1
+        return stats
+
+    def put(self, key: str, stats: pd.DataFrame):
+        """
+        Save a result under key, then evict the least recently used results if the cache is over max_bytes
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Written to a temporary file first so other processes never read a half written result
+        temp_file = self.directory / f"{key}.{uuid.uuid4().hex}.tmp"
+        stats.to_pickle(temp_file)  # type: ignore
+        temp_file.replace(self.file(key))
+        self.evict()
+
+    def files(self) -> list[tuple[Path, os.stat_result]]:
+        files: list[tuple[Path, os.stat_result]] = []
+        if not self.directory.exists():
+            return files
+        for file in self.directory.glob("*.pkl"):
+            try:
+                files.append((file, file.stat()))
+            except FileNotFoundError:
+                # Evicted by another process
+                pass
+        return files
+
+    def evict(self):
+        files = sorted(self.files(), key=lambda file: file[1].st_mtime_ns)
+        size = sum(stat.st_size for _, stat in files)
+        for file, stat in files:
+            if size <= self.max_bytes:
+                break
+            file.unlink(missing_ok=True)
+            size -= stat.st_size
+            with self.lock:
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Delete every saved result
+        """
+        for file, _ in self.files():
+            file.unlink(missing_ok=True)
+
+    def info(self) -> dict[str, Any]:
+        """
+        Hits, misses and evictions of this process, and the number of results and bytes saved
+        """
+        files = self.files()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "results": len(files),
+            "bytes": sum(stat.st_size for _, stat in files),
+            "max_bytes": self.max_bytes,
+        }
+
+
+result_cache = ResultCache(Path(__file__).parent / "result_cache", int(float(os.environ.get("BASEBALLQUERY_RESULT_CACHE_MB", "256")) * 1_000_000))
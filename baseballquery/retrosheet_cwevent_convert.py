@@ -2,189 +2,199 @@ import subprocess
 from pathlib import Path
 from tqdm import tqdm
 import os
+import shutil
 import pandas as pd  # type: ignore
-from collections import defaultdict
-
-chadwick_dtypes = {
-    "GAME_ID": "object",
-    "AWAY_TEAM_ID": "object",
-    "INN_CT": "int64",
-    "OUTS_CT": "int64",
-    "BALLS_CT": "int64",
-    "STRIKES_CT": "int64",
-    "AWAY_SCORE_CT": "int64",
-    "HOME_SCORE_CT": "int64",
-    "RESP_BAT_ID": "object",
-    "RESP_BAT_HAND_CD": "object",
-    "RESP_PIT_ID": "object",
-    "RESP_PIT_HAND_CD": "object",
-    "BASE1_RUN_ID": "object",
-    "BASE2_RUN_ID": "object",
-    "BASE3_RUN_ID": "object",
-    "BAT_FLD_CD": "int64",
-    "BAT_LINEUP_ID": "int64",
-    "EVENT_CD": "int64",
-    "AB_FL": "bool",
-    "H_CD": "int64",
-    "SH_FL": "bool",
-    "SF_FL": "bool",
-    "EVENT_OUTS_CT": "int64",
-    "DP_FL": "bool",
-    "TP_FL": "bool",
-    "RBI_CT": "int64",
-    "WP_FL": "bool",
-    "PB_FL": "bool",
-    "BATTEDBALL_CD": "object",
-    "BAT_DEST_ID": "int64",
-    "RUN1_DEST_ID": "int64",
-    "RUN2_DEST_ID": "int64",
-    "RUN3_DEST_ID": "int64",
-    "RUN1_SB_FL": "bool",
-    "RUN2_SB_FL": "bool",
-    "RUN3_SB_FL": "bool",
-    "RUN1_CS_FL": "bool",
-    "RUN2_CS_FL": "bool",
-    "RUN3_CS_FL": "bool",
-    "RUN1_PK_FL": "bool",
-    "RUN2_PK_FL": "bool",
-    "RUN3_PK_FL": "bool",
-    "RUN1_RESP_PIT_ID": "object",
-    "RUN2_RESP_PIT_ID": "object",
-    "RUN3_RESP_PIT_ID": "object",
-    "HOME_TEAM_ID": "object",
-    "BAT_TEAM_ID": "object",
-    "FLD_TEAM_ID": "object",
-    "PA_TRUNC_FL": "bool",
-    "START_BASES_CD": "int64",
-    "END_BASES_CD": "int64",
-    "PIT_START_FL": "bool",
-    "RESP_PIT_START_FL": "bool",
-    "PA_BALL_CT": "int64",
-    "PA_OTHER_BALL_CT": "int64",
-    "PA_STRIKE_CT": "int64",
-    "PA_OTHER_STRIKE_CT": "int64",
-    "EVENT_RUNS_CT": "int64",
-    "BAT_SAFE_ERR_FL": "bool",
-    "FATE_RUNS_CT": "int64",
-    "BAT_START_FL": "bool",
-    "RESP_BAT_START_FL": "bool",
-}
-
-
-def convert_files_to_csv():
+from collections import defaultdict, deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor
+from itertools import islice
+from typing import Callable
+import hashlib
+import json
+import time
+from . import ingest_metrics
+from .event_store import get_store, categorize_events
+from .retrosheet_parser import chadwick_dtypes, read_event_file
+
+# cwevent: Chadwick's cwevent, which has to be installed. python: retrosheet_parser, which gives the same output without Chadwick
+PARSERS = ["cwevent", "python"]
+
+
+def read_cwevent(file: Path, chunksize: int = 100_000) -> pd.DataFrame:
+    """
+    Run cwevent on a single retrosheet event file and parse its output straight from the pipe into a typed DataFrame.
+    Nothing is written to disk. cwevent is run from the directory of the event file so it can find the TEAM and roster files
+    without changing the working directory of this process (so this is safe to run in parallel).
+
+    Parameters:
+    file (Path): The .EVN or .EVA file
+    chunksize (int): Number of rows parsed at a time from cwevent's output
+    """
+    with subprocess.Popen(
+        [
+            "cwevent",
+            "-q",
+            "-f",
+            "0-2,4-6,8-9,12-13,16-17,26-28,32-34,36-45,47,50,58-61,66-77",
+            "-x",
+            "0-2,12-16,19-20,33,38-39,44-45,50,55",
+            f"-y",
+            f"{file.stem[:4]}",
+            f"-n",
+            f"{file.name}",
+        ],
+        stdout=subprocess.PIPE,
+        cwd=file.parent,
+    ) as process:
+        chunks: list[pd.DataFrame] = list(pd.read_csv(process.stdout, true_values=["t", "T"], false_values=["f", "F"], dtype=chadwick_dtypes, chunksize=chunksize))  # type: ignore
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, process.args)
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks, ignore_index=True)  # type: ignore
+
+
+def season_hash(download_dir: Path, year: int) -> str:
+    """
+    Hash of all the downloaded retrosheet files (events, rosters and teams) for a year. Used to tell if Retrosheet changed a season since it was converted.
+    """
+    sha = hashlib.sha256()
+    for file in sorted(download_dir.iterdir()):
+        if str(year) in file.name:
+            sha.update(file.name.encode())
+            sha.update(file.read_bytes())
+    return sha.hexdigest()
+
+
+def read_season_hashes() -> dict[int, str]:
+    """
+    The hash of the retrosheet files each year in the event store was converted from (see season_hash)
+    """
+    hashes_file = Path(__file__).parent / "chadwick_seasons.json"
+    if not hashes_file.exists():
+        return {}
+    with open(hashes_file) as f:
+        return {int(year): sha for year, sha in json.load(f).items()}
+
+
+def write_season_hashes(hashes: dict[int, str]):
+    hashes_file = Path(__file__).parent / "chadwick_seasons.json"
+    with open(hashes_file, "w") as f:
+        json.dump({str(year): sha for year, sha in sorted(hashes.items())}, f, indent=4)
+
+
+def timed_read(read_file: Callable[[Path], pd.DataFrame], file: Path) -> tuple[pd.DataFrame, float]:
+    """
+    read_file(file) and how many seconds it took. Timed in the worker so the time a file waits for a free worker isn't counted
+    """
+    start = time.perf_counter()
+    df = read_file(file)
+    return df, time.perf_counter() - start
+
+
+def convert_files_to_csv(processes: int | None = None, years: list[int] | None = None, backend: str | None = None, parser: str | None = None):
+    """
+    Convert the downloaded retrosheet event files and save them to the event store.
+    Each year is written (and dropped from memory) as soon as all of its files are converted. Years already in the store are overwritten.
+
+    Parameters:
+    processes (int | None): Number of files to convert at once. Defaults to the number of CPUs. 1 converts the files one at a time.
+    years (list[int] | None): Only convert these years. Defaults to every year that was downloaded.
+    backend (str | None): 'hdf5', 'parquet' or 'npy' (see event_store). Defaults to the store that already exists, or 'hdf5'.
+    parser (str | None): 'cwevent' or 'python' (see retrosheet_parser). Defaults to 'cwevent' if it's installed and 'python' otherwise.
+    """
     cwd = Path(__file__).parent
     download_dir: Path = cwd / "downloads"
     if not download_dir.exists():
         raise FileNotFoundError("Retrosheet files not downloaded")
+    if parser is None:
+        parser = "cwevent" if shutil.which("cwevent") else "python"
+    assert parser in PARSERS, f"Invalid parser {parser}. Valid parsers are 'cwevent', 'python'"
+
+    # Sorted so that the files for each year are always read (and concatenated) in the same order
+    year_files: dict[str, list[Path]] = defaultdict(list)
+    for file in sorted(download_dir.iterdir()):
+        if file.name[-4:] in (".EVN", ".EVA"):
+            if years is not None and int(file.name[:4]) not in years:
+                continue
+            year_files[file.name[:4]].append(file)
+
+    store = get_store(backend)
+    hashes = read_season_hashes()
+    executor: Executor
+    read_file = read_cwevent if parser == "cwevent" else read_event_file
+    if parser == "cwevent" or processes == 1:
+        # Threads are enough here since cwevent does its work in its own process and pandas releases the GIL while tokenizing its output.
+        # This also avoids starting new python processes, which would import this package again
+        executor = ThreadPoolExecutor(max_workers=processes or os.cpu_count())
+    else:
+        # The python parser holds the GIL, so it needs worker processes to parse files in parallel
+        executor = ProcessPoolExecutor(max_workers=processes or os.cpu_count())
+    # Files are submitted in order, up to this many ahead of the one being waited for, so the workers go on to the next year's files
+    # while a year is categorized and written, without keeping every parsed file in memory
+    window = 2 * (processes or os.cpu_count() or 1)
+    queued_files = iter([file for files in year_files.values() for file in files])
+    pending: deque[tuple[Path, Future[tuple[pd.DataFrame, float]]]] = deque()
+
+    def submit_ahead():
+        for queued_file in islice(queued_files, window - len(pending)):
+            pending.append((queued_file, executor.submit(timed_read, read_file, queued_file)))
 
-    outdir = cwd / "chadwick"
-    outdir.mkdir(parents=True, exist_ok=True)
-    os.chdir(download_dir)
-
-    for file in tqdm(
-        list(download_dir.iterdir()), desc="Converting retrosheet to Chadwick"
-    ):
-        if not file.name[-4:] in (".EVN", ".EVA"):
-            continue
-        with open(outdir / f"{file.name}.csv", "w") as f:
-            _ = subprocess.run(
-                [
-                    "cwevent",
-                    "-q",
-                    "-f",
-                    "0-2,4-6,8-9,12-13,16-17,26-28,32-34,36-45,47,50,58-61,66-77",
-                    "-x",
-                    "0-2,12-14,16,19-20,33,38-39,44-45,55",
-                    f"-y",
-                    f"{file.stem[:4]}",
-                    f"-n",
-                    f"{file}",
-                ],
-                stdout=f,
-            )
-    os.chdir(cwd)
-
-    years: dict[str, pd.DataFrame] = defaultdict(pd.DataFrame)
-    for file in tqdm(list(outdir.iterdir()), desc="Converting Chadwick CSVs to HDF5"):
-        df: pd.DataFrame = pd.read_csv(file, true_values=["t", "T"], false_values=["f", "F"], dtype=chadwick_dtypes)  # type: ignore
-        # df = df[chadwick_dtypes.keys()]
-        year: str = file.name[:4]
-        years[year] = pd.concat([years[year], df])  # type: ignore
-
-    baserunning_outcomes_not_pa: list[int] = [4, 5, 6, 7, 8, 9, 10, 11, 12]
-    fields: dict[int, str] = {
-        3: "K",
-        # 4: "SB",
-        # 6: "CS",
-        # 8: "PK",
-        # 9: "WP",
-        # 10: "PB",
-        11: "BK",
-        14: "UBB",
-        15: "IBB",
-        16: "HBP",
-        # 17: "INT",
-        # 18: "E",
-        19: "FC",
-        20: "1B",
-        21: "2B",
-        22: "3B",
-        23: "HR",
-    }
-    for year, df in tqdm(years.items(), desc="Saving HDF5 file"):
-        df["PA"] = (~df["EVENT_CD"].isin(baserunning_outcomes_not_pa + [13])).astype(int)  # type: ignore
-        df["AB"] = df["AB_FL"].astype(int)  # type: ignore
-        df["SH"] = df["SH_FL"].astype(int)  # type: ignore
-        df["SF"] = df["SF_FL"].astype(int)  # type: ignore
-        df["R"] = df["EVENT_RUNS_CT"].astype(int)  # type: ignore
-        df["RBI"] = df["RBI_CT"].astype(int)  # type: ignore
-        df["SB"] = df["RUN1_SB_FL"].astype(int) + df["RUN2_SB_FL"].astype(int) + df["RUN3_SB_FL"].astype(int)  # type: ignore
-        df["CS"] = df["RUN1_CS_FL"].astype(int) + df["RUN2_CS_FL"].astype(int) + df["RUN3_CS_FL"].astype(int)  # type: ignore
-        for field, name in fields.items():
-            df[name] = df["EVENT_CD"].eq(field).astype(int)  # type: ignore
-        df["H"] = df["EVENT_CD"].isin([20, 21, 22, 23]).astype(int)  # type: ignore
-        df["DP"] = df["DP_FL"].astype(int)  # type: ignore
-        df["TP"] = df["TP_FL"].astype(int)  # type: ignore
-        df["ROE"] = (df["BAT_SAFE_ERR_FL"] & df["EVENT_CD"].eq(18)).astype(int)  # type: ignore
-        df["WP"] = df["WP_FL"].astype(int)  # type: ignore
-        df["P"] = (
-            df["PA_BALL_CT"]
-            + df["PA_STRIKE_CT"]
-            - df["PA_OTHER_BALL_CT"]
-            - df["PA_OTHER_STRIKE_CT"]
-        ) * (df["PA"] | df["R"])
-        df["GB"] = df["BATTEDBALL_CD"].eq("G").astype(int)  # type: ignore
-        df["FB"] = df["BATTEDBALL_CD"].eq("F").astype(int)  # type: ignore
-        df["LD"] = df["BATTEDBALL_CD"].eq("L").astype(int)  # type: ignore
-        df["PU"] = df["BATTEDBALL_CD"].eq("P").astype(int)  # type: ignore
-        df["ER"] = (
-            df["BAT_DEST_ID"].isin([4, 6]).astype(int)  # type: ignore
-            + df["RUN1_DEST_ID"].isin([4, 6]).astype(int)  # type: ignore
-            + df["RUN2_DEST_ID"].isin([4, 6]).astype(int)  # type: ignore
-            + df["RUN3_DEST_ID"].isin([4, 6]).astype(int)  # type: ignore
-        )
-        df["T_UER"] = (
-            df["BAT_DEST_ID"].eq(6).astype(int)  # type: ignore
-            + df["RUN1_DEST_ID"].eq(6).astype(int)  # type: ignore
-            + df["RUN2_DEST_ID"].eq(6).astype(int)  # type: ignore
-            + df["RUN3_DEST_ID"].eq(6).astype(int)  # type: ignore
-        )
-
-        df["UER"] = (
-            df["BAT_DEST_ID"].isin([5, 7]).astype(int)  # type: ignore
-            + df["RUN1_DEST_ID"].isin([5, 7]).astype(int)  # type: ignore
-            + df["RUN2_DEST_ID"].isin([5, 7]).astype(int)  # type: ignore
-            + df["RUN3_DEST_ID"].isin([5, 7]).astype(int)  # type: ignore
-        )
-
-        df.to_hdf(cwd / "chadwick.hdf5", key=f"year_{year}", format="table")  # type: ignore
+    with executor:
+        for year, files in tqdm(year_files.items(), desc=f"Converting retrosheet to {store.backend}"):
+            file_dfs: list[pd.DataFrame] = []
+            for _ in files:
+                submit_ahead()
+                # The pending files are in the same order as year_files, so these are this year's
+                file, future = pending.popleft()
+                file_df, seconds = future.result()
+                ingest_metrics.record("parse", file.name, seconds, rows=len(file_df), parser=parser)
+                file_dfs.append(file_df)
+            # Before this year is categorized and written, so the next files are parsed in the meantime
+            submit_ahead()
+            # Concatenating once avoids copying the year over and over
+            df = pd.concat(file_dfs, ignore_index=True)  # type: ignore
+            del file_dfs, file_df
+            with ingest_metrics.measure("categorize", year) as measurement:
+                categorize_events(df)
+                measurement["rows"] = len(df)
+            with ingest_metrics.measure("write", year) as measurement:
+                store.write_year(int(year), df)
+                measurement["rows"] = len(df)
+                measurement["bytes"] = int(df.memory_usage().sum())  # type: ignore
+            del df
+            # Saved after every year so an interrupted conversion still knows which years are done
+            hashes[int(year)] = season_hash(download_dir, int(year))
+            write_season_hashes(hashes)
 
     print("Cleaning up...")
-    print("Deleting Chadwick CSVs...")
-    for child in outdir.iterdir():
-        child.unlink()
-    outdir.rmdir()
+    delete_downloads()
+
+
+def validate_parser(files: list[Path] | None = None) -> list[Path]:
+    """
+    Check that the python parser (retrosheet_parser.read_event_file) gives exactly the same DataFrame as cwevent. Needs cwevent to be installed.
+    Returns the files that don't match.
 
+    Parameters:
+    files (list[Path] | None): Event files to check. Defaults to every downloaded .EVN and .EVA file.
+    """
+    if files is None:
+        download_dir: Path = Path(__file__).parent / "downloads"
+        files = [file for file in sorted(download_dir.iterdir()) if file.name[-4:] in (".EVN", ".EVA")]
+    mismatches: list[Path] = []
+    for file in tqdm(files, desc="Comparing the python parser to cwevent"):
+        try:
+            pd.testing.assert_frame_equal(read_cwevent(file), read_event_file(file))  # type: ignore
+        except AssertionError as e:
+            print(f"{file.name} doesn't match cwevent: {e}")
+            mismatches.append(file)
+    return mismatches
+
+
+def delete_downloads():
+    download_dir: Path = Path(__file__).parent / "downloads"
+    if not download_dir.exists():
+        return
     print("Deleting retrosheet files...")
     for child in download_dir.iterdir():
         child.unlink()
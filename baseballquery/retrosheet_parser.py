@@ -0,0 +1,1675 @@
+"""
+Read retrosheet event files (.EVN and .EVA) without Chadwick's cwevent.
+
+This is a port of the parts of Chadwick (https://github.com/chadwickbureau/chadwick) that convert_files_to_csv needs:
+the play parser (cwlib/parse.c), the game state (cwlib/gameiter.c) and the cwevent fields that are selected with -f and -x.
+Quirks of Chadwick are kept on purpose so read_event_file gives exactly the same DataFrame as retrosheet_cwevent_convert.read_cwevent
+(retrosheet_cwevent_convert.validate_parser checks that).
+"""
+
+import re
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+import pandas as pd  # type: ignore
+
+# The fields convert_files_to_csv gets from cwevent (-f 0-2,4-6,8-9,12-13,16-17,26-28,32-34,36-45,47,50,58-61,66-77 -x 0-2,12-16,19-20,33,38-39,44-45,50,55), in the order cwevent outputs them.
+# Counts and codes are all small enough for int8 (scores get int16 just in case).
+# The string columns are read as objects and then turned into categoricals by categorize_events once a whole year is read
+chadwick_dtypes = {
+    "GAME_ID": "object",
+    "AWAY_TEAM_ID": "object",
+    "INN_CT": "int8",
+    "OUTS_CT": "int8",
+    "BALLS_CT": "int8",
+    "STRIKES_CT": "int8",
+    "AWAY_SCORE_CT": "int16",
+    "HOME_SCORE_CT": "int16",
+    "RESP_BAT_ID": "object",
+    "RESP_BAT_HAND_CD": "object",
+    "RESP_PIT_ID": "object",
+    "RESP_PIT_HAND_CD": "object",
+    "BASE1_RUN_ID": "object",
+    "BASE2_RUN_ID": "object",
+    "BASE3_RUN_ID": "object",
+    "BAT_FLD_CD": "int8",
+    "BAT_LINEUP_ID": "int8",
+    "EVENT_CD": "int8",
+    "AB_FL": "bool",
+    "H_CD": "int8",
+    "SH_FL": "bool",
+    "SF_FL": "bool",
+    "EVENT_OUTS_CT": "int8",
+    "DP_FL": "bool",
+    "TP_FL": "bool",
+    "RBI_CT": "int8",
+    "WP_FL": "bool",
+    "PB_FL": "bool",
+    "BATTEDBALL_CD": "object",
+    "BATTEDBALL_LOC_TX": "object",
+    "BAT_DEST_ID": "int8",
+    "RUN1_DEST_ID": "int8",
+    "RUN2_DEST_ID": "int8",
+    "RUN3_DEST_ID": "int8",
+    "RUN1_SB_FL": "bool",
+    "RUN2_SB_FL": "bool",
+    "RUN3_SB_FL": "bool",
+    "RUN1_CS_FL": "bool",
+    "RUN2_CS_FL": "bool",
+    "RUN3_CS_FL": "bool",
+    "RUN1_PK_FL": "bool",
+    "RUN2_PK_FL": "bool",
+    "RUN3_PK_FL": "bool",
+    "RUN1_RESP_PIT_ID": "object",
+    "RUN2_RESP_PIT_ID": "object",
+    "RUN3_RESP_PIT_ID": "object",
+    "HOME_TEAM_ID": "object",
+    "BAT_TEAM_ID": "object",
+    "FLD_TEAM_ID": "object",
+    "PA_TRUNC_FL": "bool",
+    "START_BASES_CD": "int8",
+    "END_BASES_CD": "int8",
+    "BAT_START_FL": "bool",
+    "RESP_BAT_START_FL": "bool",
+    "PIT_START_FL": "bool",
+    "RESP_PIT_START_FL": "bool",
+    "PA_BALL_CT": "int8",
+    "PA_OTHER_BALL_CT": "int8",
+    "PA_STRIKE_CT": "int8",
+    "PA_OTHER_STRIKE_CT": "int8",
+    "EVENT_RUNS_CT": "int8",
+    "BAT_SAFE_ERR_FL": "bool",
+    "FATE_RUNS_CT": "int8",
+}
+
+# EVENT_CD values
+GENERIC_OUT = 2
+STRIKEOUT = 3
+STOLEN_BASE = 4
+INDIFFERENCE = 5
+CAUGHT_STEALING = 6
+PICKOFF_ERROR = 7
+PICKOFF = 8
+WILD_PITCH = 9
+PASSED_BALL = 10
+BALK = 11
+OTHER_ADVANCE = 12
+FOUL_ERROR = 13
+WALK = 14
+INTENTIONAL_WALK = 15
+HIT_BY_PITCH = 16
+INTERFERENCE = 17
+ERROR = 18
+FIELDERS_CHOICE = 19
+SINGLE = 20
+DOUBLE = 21
+TRIPLE = 22
+HOME_RUN = 23
+
+# Hit locations that are recognized in flags (e.g. /G56 or /L7LD)
+locations = {
+    "1", "13", "15", "1S", "2", "2F", "23", "23F", "25", "25F",
+    "3SF", "3F", "3DF", "3S", "3", "3D", "34S", "34", "34D",
+    "4S", "4", "4D", "4MS", "4M", "4MD",
+    "6MS", "6M", "6MD", "6S", "6", "6D",
+    "56S", "56", "56D", "5S", "5", "5D", "5SF", "5F", "5DF",
+    "7LSF", "7LS", "7S", "78S", "8S", "89S", "9S", "9LS", "9LSF",
+    "7LF", "7L", "7", "78", "8", "89", "9", "9L", "9LF",
+    "7LDF", "7LD", "7D", "78D", "8D", "89D", "9D", "9LD", "9LDF",
+    "78XD", "8XD", "89XD",
+    # Nonstandard or archaic, but they appear in retrosheet files
+    "13S", "15S", "2LF", "2RF", "2L", "2R", "3L", "46", "5L",
+    "7LDW", "7DW", "78XDW", "8XDW", "89XDW", "9DW", "9LDW",
+    "7LMF", "7LM", "7M", "78M", "8LM", "8M", "8RM", "89M", "9M", "9LM", "9LMF",
+    "8LS", "8RS", "8LD", "8RD", "8LXD", "8RXD", "8LXDW", "8RXDW",
+}
+
+throw_flags = {"TH", "TH1", "TH2", "TH3", "THH"}
+
+uppercase = str.maketrans("abcdefghijklmnopqrstuvwxyz", "ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+
+
+class EventData:
+    """
+    What happened on a play, parsed from its event text. Only has the parts of Chadwick's CWEventData that are used for the cwevent fields.
+    Bases are indexed 0 (batter) to 3. advance is the base each runner ended up on: 0 is out (or didn't move), 4 scored, 5 scored unearned (UR) and 6 scored team unearned (TUR).
+    """
+
+    __slots__ = (
+        "event_type", "advance", "rbi_flag", "fc_flag", "muff_flag", "play", "sb_flag", "cs_flag", "po_flag",
+        "sh_flag", "sf_flag", "dp_flag", "gdp_flag", "tp_flag", "wp_flag", "pb_flag", "foul_flag", "bunt_flag", "force_flag",
+        "errors", "batted_ball_type", "hit_location",
+    )
+
+    def __init__(self):
+        self.event_type = 0
+        self.advance = [0, 0, 0, 0]
+        # 1 is an RBI, 2 is an explicit (RBI) and -1 means no RBI is possible because of an error
+        self.rbi_flag = [0, 0, 0, 0]
+        self.fc_flag = [0, 0, 0, 0]
+        self.muff_flag = [0, 0, 0, 0]
+        # The fielders who made the play on each runner ("64", "E6", ...). Nonempty without an E means the runner is out
+        self.play = ["", "", "", ""]
+        self.sb_flag = [0, 0, 0, 0]
+        self.cs_flag = [0, 0, 0, 0]
+        self.po_flag = [0, 0, 0, 0]
+        self.sh_flag = False
+        self.sf_flag = False
+        self.dp_flag = False
+        self.gdp_flag = False
+        self.tp_flag = False
+        self.wp_flag = False
+        self.pb_flag = False
+        self.foul_flag = False
+        self.bunt_flag = False
+        self.force_flag = False
+        self.errors: list[int] = []
+        self.batted_ball_type = " "
+        self.hit_location = ""
+
+    def is_batter(self) -> bool:
+        return self.event_type == GENERIC_OUT or self.event_type == STRIKEOUT or WALK <= self.event_type <= HOME_RUN
+
+    def is_official_ab(self) -> bool:
+        if not self.is_batter() or self.sh_flag or self.sf_flag:
+            return False
+        return self.event_type not in (WALK, INTENTIONAL_WALK, HIT_BY_PITCH, INTERFERENCE)
+
+    def runner_put_out(self, base: int) -> bool:
+        return self.play[base] != "" and "E" not in self.play[base]
+
+    def outs_on_play(self) -> int:
+        return sum(play != "" and "E" not in play for play in self.play)
+
+    def runs_on_play(self) -> int:
+        return sum(advance >= 4 for advance in self.advance)
+
+    def rbi_on_play(self) -> int:
+        return sum(rbi > 0 for rbi in self.rbi_flag)
+
+
+def is_fielder(sym: str) -> bool:
+    # '?' is accepted as an unknown fielder
+    return "1" <= sym <= "9" or sym == "?"
+
+
+class EventParser:
+    """
+    Recursive descent parser for the event text of a play (e.g. 64(1)3/GDP.3-H). A port of Chadwick's cwlib/parse.c.
+    Each parse_* method returns False if the text is invalid. Like Chadwick, whatever was parsed up to that point is kept.
+    """
+
+    def __init__(self, text: str, event: EventData):
+        # Only ASCII letters are uppercased, like toupper in C
+        text = text.translate(uppercase)
+        # SBH and CSH are read as SB4 and CS4
+        index = text.find("SBH")
+        if index >= 0:
+            text = text[: index + 2] + "4" + text[index + 3 :]
+        index = text.find("CSH")
+        if index >= 0 and "FCSH" not in text:
+            text = text[: index + 2] + "4" + text[index + 3 :]
+        self.text = text
+        # A NUL is used for the end of the text, like in C
+        self.chars = text + "\0"
+        self.sym = self.chars[0]
+        self.pos = 1
+        self.token = ""
+        self.event = event
+
+    def nextsym(self) -> str:
+        chars = self.chars
+        if self.pos >= len(chars):
+            self.sym = "\0"
+            return self.sym
+        # The uncertain play (#) and great play (!) characters are ignored
+        sym = chars[self.pos]
+        self.pos += 1
+        while sym == "#" or sym == "!":
+            sym = chars[self.pos]
+            self.pos += 1
+        self.sym = sym
+        return sym
+
+    def primary_event(self):
+        """
+        Read a run of letters into token
+        """
+        token = ""
+        while "A" <= self.sym <= "Z":
+            token += self.sym
+            self.nextsym()
+        self.token = token
+
+    def fielding_credit(self, prev: str) -> bool:
+        """
+        Read a fielding credit (e.g. 643 or 6E4) into token. prev is the fielder who made the previous putout, as in 64(1)3.
+        Returns True if the runner is safe because of an error.
+        """
+        event = self.event
+        if self.sym == "E":
+            self.nextsym()
+            if not is_fielder(self.sym):
+                return False
+            if self.sym != "?" and event.event_type != INTERFERENCE:
+                # C.B-1(E2) shouldn't generate a second error
+                event.errors.append(int(self.sym))
+            self.token = "E" + self.sym
+            self.nextsym()
+            return True
+
+        last = self.sym
+        play = prev if prev != " " and prev != self.sym else ""
+        play += self.sym
+        while True:
+            self.nextsym()
+            sym = self.sym
+            if "1" <= sym <= "9" or sym == "?":
+                if sym != "?":
+                    play += sym
+                last = sym
+            elif sym == "E":
+                play += "E"
+                self.nextsym()
+                if not "0" <= self.sym <= "9":
+                    self.token = play
+                    return False
+                event.errors.append(int(self.sym))
+                self.token = play + self.sym
+                self.nextsym()
+                return True
+            else:
+                self.token = play
+                return False
+
+    def flag(self):
+        """
+        Read one flag (without its slash) into token
+        """
+        token = ""
+        while True:
+            self.nextsym()
+            if self.sym in "/.()#!+-\0":
+                break
+            token += self.sym
+        self.token = token
+
+    def flags(self):
+        """
+        Read the flags after a play (/SH, /GDP, /G56, ...) up to the advances
+        """
+        event = self.event
+        while True:
+            flag = "/"
+            while True:
+                self.nextsym()
+                if self.sym in "/.#!+-\0":
+                    break
+                flag += self.sym
+
+            if flag == "/SH" or flag == "/SAC":
+                event.sh_flag = True
+                event.bunt_flag = True
+            elif flag == "/SF":
+                event.sf_flag = True
+                # A sac fly is a fly ball unless it says otherwise, even on the few errors like E4/SF where an infielder dropped a fly
+                if event.batted_ball_type == " " or (event.event_type == ERROR and event.batted_ball_type == "G"):
+                    event.batted_ball_type = "F"
+            elif flag == "/DP":
+                event.dp_flag = True
+            elif flag == "/GDP":
+                event.dp_flag = True
+                event.gdp_flag = True
+                event.batted_ball_type = "G"
+            elif flag == "/LDP":
+                event.dp_flag = True
+                event.batted_ball_type = "L"
+            elif flag == "/FDP":
+                event.dp_flag = True
+                event.batted_ball_type = "F"
+            elif flag == "/BGDP":
+                event.bunt_flag = True
+                event.dp_flag = True
+                event.gdp_flag = True
+                event.batted_ball_type = "G"
+            elif flag == "/BPDP":
+                event.bunt_flag = True
+                event.dp_flag = True
+                event.batted_ball_type = "P"
+            elif flag == "/BFDP":
+                # Bunt foul double play
+                event.bunt_flag = True
+                event.dp_flag = True
+                event.batted_ball_type = "P"
+                event.foul_flag = True
+            elif flag == "/TP":
+                event.tp_flag = True
+            elif flag == "/GTP":
+                event.tp_flag = True
+                event.batted_ball_type = "G"
+            elif flag == "/LTP":
+                event.tp_flag = True
+                event.batted_ball_type = "L"
+            elif flag == "/FL":
+                event.foul_flag = True
+            elif flag == "/FO":
+                event.force_flag = True
+                if event.batted_ball_type == " ":
+                    event.batted_ball_type = "G"
+            elif flag[1:] in throw_flags and event.event_type in (ERROR, PICKOFF_ERROR):
+                pass
+            elif flag == "/B":
+                event.bunt_flag = True
+            elif flag == "/BG":
+                event.bunt_flag = True
+                event.batted_ball_type = "G"
+            elif flag == "/BP":
+                event.bunt_flag = True
+                event.batted_ball_type = "P"
+            elif flag == "/BF":
+                event.bunt_flag = True
+                event.batted_ball_type = "F"
+            elif flag == "/BL":
+                event.bunt_flag = True
+                event.batted_ball_type = "L"
+            elif flag == "/P":
+                event.batted_ball_type = "P"
+            elif flag == "/F":
+                event.batted_ball_type = "F"
+            elif flag == "/G":
+                event.batted_ball_type = "G"
+            elif flag == "/L":
+                event.batted_ball_type = "L"
+            elif flag == "/IF":
+                # An infield fly is a popup
+                event.batted_ball_type = "P"
+            elif len(flag) >= 3:
+                self.hit_location(flag[1:])
+            elif flag[1:] in locations:
+                event.hit_location = flag[1:]
+
+            if self.sym == "." or self.sym == "\0":
+                break
+
+    def hit_location(self, flag: str):
+        """
+        Read a flag with a hit location and maybe a trajectory and bunt (e.g. G56, L7LD or BP2F)
+        """
+        event = self.event
+        bunt = flag[0] == "B"
+        trajectory = flag[1] if bunt else flag[0]
+        if trajectory in ("G", "F", "P", "L"):
+            location = flag[2:] if bunt else flag[1:]
+            if location in locations:
+                event.batted_ball_type = trajectory
+        else:
+            location = flag[1:] if bunt else flag
+        if location in locations:
+            event.hit_location = location
+            if location[-1] == "F":
+                event.foul_flag = True
+            if bunt:
+                event.bunt_flag = True
+
+    def advance_modifier(self, safe: bool, base_from: int, base_to: int) -> bool:
+        """
+        Read what's in the parentheses after a runner advance, e.g. the (UR) in 3-H(UR) or the (E5/TH) in 1-3(E5/TH)
+        """
+        event = self.event
+        if is_fielder(self.sym) or self.sym == "E":
+            if self.fielding_credit(" "):
+                if not safe:
+                    safe = True
+                    event.muff_flag[base_from] = 1
+                    # (UR) already implies the runner is safe, as in 3XH(UR)(5E2)
+                    if event.advance[base_from] < 5:
+                        event.advance[base_from] = base_to
+                    for base in range(base_from, -1, -1):
+                        event.rbi_flag[base] = -1
+
+            if self.token[:1] != "E":
+                event.play[base_from] = self.token
+            else:
+                for base in range(base_from, -1, -1):
+                    event.rbi_flag[base] = -1
+
+            if self.sym == "/":
+                self.flag()
+                if self.token not in throw_flags and self.token not in ("INT", "BINT", "OBS", "G", "U", "AP", "BR", "FO"):
+                    return False
+
+            if self.sym == "(":
+                self.nextsym()
+                if not self.advance_modifier(safe, base_from, base_to):
+                    return False
+
+            # Tolerates oddities like 2XH(9S)
+            while self.sym != ")" and self.sym != "\0":
+                self.nextsym()
+        else:
+            self.primary_event()
+            token = self.token
+            if token == "NR" or token == "NORBI":
+                event.rbi_flag[base_from] = 0
+            elif token == "RBI" and event.advance[base_from] >= 4:
+                event.rbi_flag[base_from] = 2
+            elif token == "UR":
+                event.advance[base_from] = 5
+            elif token == "TUR":
+                event.advance[base_from] = 6
+            elif token == "WP":
+                event.wp_flag = True
+                event.rbi_flag[base_from] = 0
+            elif token == "PB":
+                event.pb_flag = True
+                event.rbi_flag[base_from] = 0
+            elif token == "TH":
+                if "1" <= self.sym <= "3":
+                    self.nextsym()
+            elif token == "THH" or token == "INT":
+                pass
+            else:
+                return False
+
+        if self.sym == ")":
+            self.nextsym()
+            return True
+        return False
+
+    def runner_advance(self) -> bool:
+        """
+        Read one runner advance, e.g. 1-3 or BXH(92)
+        """
+        event = self.event
+        if not ("1" <= self.sym <= "3" or self.sym == "B"):
+            return False
+        base_from = 0 if self.sym == "B" else int(self.sym)
+
+        self.nextsym()
+        if self.sym != "-" and self.sym != "X":
+            return False
+        safe = self.sym == "-"
+
+        self.nextsym()
+        if not ("1" <= self.sym <= "3" or self.sym == "H"):
+            return False
+        base_to = 4 if self.sym == "H" else int(self.sym)
+
+        if safe:
+            # The advance can already be implied and marked unearned, as in CSH(1E2)(UR).3-H
+            if base_to < 4 or event.advance[base_from] < 4:
+                event.advance[base_from] = base_to
+            if (
+                base_to == 4
+                and event.is_batter()
+                and not event.gdp_flag
+                and (event.event_type != ERROR or base_from == 3)
+                and event.event_type != STRIKEOUT
+                and event.rbi_flag[base_from] != -1
+            ):
+                event.rbi_flag[base_from] = 1
+        else:
+            event.advance[base_from] = 0
+            if event.event_type == FIELDERS_CHOICE:
+                event.fc_flag[base_from] = 1
+
+        self.nextsym()
+        while self.sym == "(":
+            self.nextsym()
+            if not self.advance_modifier(safe, base_from, base_to):
+                return False
+        return True
+
+    def advances(self) -> bool:
+        """
+        Read the advances after the '.'
+        """
+        while True:
+            self.nextsym()
+            if not self.runner_advance():
+                return False
+            if self.sym != ";":
+                break
+        return self.sym == "\0"
+
+    def out_base(self) -> int:
+        """
+        Read the base of a force out, e.g. the (1) in 64(1)3. Returns -1 if it's invalid
+        """
+        self.nextsym()
+        if self.sym not in ("1", "2", "3", "B"):
+            return -1
+        base = 0 if self.sym == "B" else int(self.sym)
+        self.nextsym()
+        if self.sym != ")":
+            return -1
+        self.nextsym()
+        return base
+
+    def parse_balk(self, flags: bool) -> bool:
+        while flags and self.sym == "/":
+            self.flag()
+        return True
+
+    def parse_stolen_base(self, flags: bool) -> bool:
+        event = self.event
+        if self.sym == "2" or self.sym == "3":
+            runner = int(self.sym) - 1
+            event.sb_flag[runner] = 1
+            event.advance[runner] = runner + 1
+            self.nextsym()
+        elif self.sym == "4":
+            event.sb_flag[3] = 1
+            event.advance[3] = 4
+            self.nextsym()
+            # Archaic SBH(UR) and SBH(TUR)
+            if self.sym == "(":
+                event.advance[3] = 5
+                self.nextsym()
+                if self.sym == "T":
+                    event.advance[3] = 6
+                    self.nextsym()
+                for expected in "UR)":
+                    if self.sym != expected:
+                        return False
+                    self.nextsym()
+        else:
+            return False
+
+        if self.sym == ";":
+            self.nextsym()
+            self.primary_event()
+            # Under modern rules there can't be a SB and a CS on the same play, but it happened early on
+            if self.token == "SB":
+                self.parse_stolen_base(False)
+            elif self.token == "CS":
+                self.parse_caught_stealing(False)
+            else:
+                return False
+
+        while flags and self.sym == "/":
+            self.flag()
+        return True
+
+    def parse_caught_stealing(self, flags: bool) -> bool:
+        event = self.event
+        if "2" <= self.sym <= "4":
+            runner = int(self.sym) - 1
+            event.cs_flag[runner] = 1
+        else:
+            return False
+
+        while self.nextsym() == "(":
+            self.nextsym()
+            if is_fielder(self.sym) or self.sym == "E":
+                error = self.sym == "E"
+                if self.fielding_credit(" ") or error:
+                    # Safe on an error
+                    event.advance[runner] = runner + 1
+                    event.muff_flag[runner] = 1
+                    event.play[runner] = self.token
+                    if self.sym == "/":
+                        self.flag()
+                        if self.token not in throw_flags and self.token != "INT":
+                            return False
+                else:
+                    event.play[runner] = self.token
+            elif "A" <= self.sym <= "Z":
+                self.primary_event()
+                if self.token == "UR" and event.advance[runner] == 4:
+                    event.advance[runner] = 5
+                elif self.token == "TUR" and event.advance[runner] == 4:
+                    event.advance[runner] = 6
+                else:
+                    return False
+                if self.sym != ")":
+                    return False
+
+        if self.sym == ";":
+            # Two caught stealings (or a CS and a SB) on the same play
+            self.nextsym()
+            self.primary_event()
+            if self.token == "CS":
+                self.parse_caught_stealing(False)
+            elif self.token == "SB":
+                self.parse_stolen_base(False)
+            else:
+                return False
+
+        while flags and self.sym == "/":
+            self.flag()
+            if self.token == "DP":
+                event.dp_flag = True
+        return True
+
+    def parse_safe_on_error(self, flags: bool) -> bool:
+        event = self.event
+        event.advance[0] = 1
+        if not "0" <= self.sym <= "9":
+            return False
+        event.errors.append(int(self.sym))
+        # Infielders are assumed to make errors on grounders and outfielders on flies
+        event.batted_ball_type = "G" if self.sym <= "6" else "F"
+        self.nextsym()
+        if self.sym == "?":
+            self.nextsym()
+        if flags and self.sym == "/":
+            self.flags()
+        return True
+
+    def parse_fielders_choice(self, flags: bool) -> bool:
+        event = self.event
+        event.advance[0] = 1
+        event.batted_ball_type = "G"
+        if is_fielder(self.sym):
+            self.nextsym()
+        if flags and self.sym == "/":
+            self.flags()
+        return True
+
+    def parse_foul_error(self, flags: bool) -> bool:
+        if not "1" <= self.sym <= "9":
+            return False
+        self.event.errors.append(int(self.sym))
+        self.nextsym()
+        if flags and self.sym == "/":
+            self.flags()
+        return True
+
+    def parse_generic_out(self, flags: bool) -> bool:
+        event = self.event
+        # The fielder who made the previous putout, to get plays like 54(1)3/GDP right
+        last_fielder = " "
+        # Whether the first out was a force out of a runner (1) or the batter (0)
+        force_play = -1
+        event.advance[0] = 1
+
+        while is_fielder(self.sym):
+            safe = self.fielding_credit(last_fielder)
+            if self.sym == "(":
+                base = self.out_base()
+                if base < 0:
+                    return False
+                if force_play == -1:
+                    force_play = 1 if base > 0 else 0
+                event.advance[base] = base + 1 if safe else 0
+                if safe:
+                    event.muff_flag[base] = 1
+                event.fc_flag[base] = 1
+                if event.batted_ball_type == " ":
+                    # More than one fielder is a ground ball (unless a flag says otherwise), and so is getting the first out on a runner
+                    if len(self.token) > 1 or base > 0:
+                        event.batted_ball_type = "G"
+                    elif len(self.token) == 1:
+                        event.batted_ball_type = "F"
+                event.play[base] = self.token
+                last_fielder = self.token[-1:] or " "
+            else:
+                event.batted_ball_type = "G" if len(self.token) > 1 or last_fielder != " " else "F"
+                event.play[0] = self.token
+                event.advance[0] = 1 if safe else 0
+                if safe:
+                    event.muff_flag[0] = 1
+                break
+
+        # Hard and soft hit modifiers are ignored
+        if self.sym == "+" or self.sym == "-":
+            self.nextsym()
+
+        if flags and self.sym == "/":
+            self.flags()
+
+        # If the first out is the batter the ball was probably caught in the air, so responsibility for the runners isn't handed off (except on reverse force GDPs)
+        if force_play == 0 and "/GDP" not in self.text:
+            event.fc_flag[1] = event.fc_flag[2] = event.fc_flag[3] = 0
+        return True
+
+    def parse_hit_by_pitch(self, flags: bool) -> bool:
+        self.event.advance[0] = 1
+        while flags and self.sym == "/":
+            self.flag()
+        return True
+
+    def parse_interference(self, flags: bool) -> bool:
+        event = self.event
+        event.advance[0] = 1
+        # C/E1, C/4E1 and C/E3 are interference by someone other than the catcher
+        while self.sym == "/":
+            self.flag()
+            token = self.token
+            if token[:1] == "E" and event.errors:
+                return False
+            if token in ("E1", "E2", "E3", "E4", "E6"):
+                event.errors.append(int(token[1]))
+            elif token == "4E1":
+                event.errors.append(1)
+            elif token == "INT":
+                pass
+            elif token == "G":
+                event.batted_ball_type = "G"
+            elif len(token) >= 2:
+                self.hit_location(token)
+            elif token in locations:
+                event.hit_location = token
+        if not event.errors:
+            event.errors.append(2)
+        return True
+
+    def parse_indifference(self, flags: bool) -> bool:
+        return True
+
+    def parse_other_advance(self, flags: bool) -> bool:
+        event = self.event
+        while flags and self.sym == "/":
+            self.flag()
+            if self.token == "DP":
+                event.dp_flag = True
+            elif self.token == "TP":
+                event.tp_flag = True
+            elif self.token not in ("BINT", "INT", "AP", "MREV", "UREV", "NDP", "OBS") and self.token[:1] != "R":
+                return False
+        return True
+
+    def parse_passed_ball(self, flags: bool) -> bool:
+        event = self.event
+        event.pb_flag = True
+        while flags and self.sym == "/":
+            self.flag()
+            if self.token == "DP":
+                event.dp_flag = True
+        return True
+
+    def parse_wild_pitch(self, flags: bool) -> bool:
+        event = self.event
+        event.wp_flag = True
+        while flags and self.sym == "/":
+            self.flag()
+            if self.token == "DP":
+                event.dp_flag = True
+        return True
+
+    def parse_pickoff_caught_stealing(self, flags: bool) -> bool:
+        runner = ord(self.sym) - ord("1")
+        if 0 <= runner <= 3:
+            self.event.po_flag[runner] = 1
+        return self.parse_caught_stealing(flags)
+
+    def parse_pickoff(self, flags: bool) -> bool:
+        event = self.event
+        if "1" <= self.sym <= "3":
+            runner = int(self.sym)
+        else:
+            return False
+        event.po_flag[runner] = 1
+
+        if self.nextsym() != "(":
+            return False
+        self.nextsym()
+        if is_fielder(self.sym):
+            self.fielding_credit(" ")
+            event.play[runner] = self.token
+        elif self.sym == "E":
+            self.fielding_credit(" ")
+            event.play[runner] = self.token
+            if self.sym == "/":
+                self.flag()
+                if self.token not in throw_flags:
+                    return False
+        else:
+            return False
+
+        if self.sym != ")":
+            return False
+        self.nextsym()
+        if flags and self.sym == "/":
+            self.flags()
+        return True
+
+    def parse_base_hit(self, flags: bool) -> bool:
+        # Fielders after the hit (e.g. S8 or D79)
+        while is_fielder(self.sym) or self.sym == "0":
+            self.nextsym()
+        if flags and self.sym == "/":
+            self.flags()
+        return True
+
+    def parse_ground_rule_double(self, flags: bool) -> bool:
+        while "1" <= self.sym <= "9":
+            self.nextsym()
+        if flags and self.sym == "/":
+            self.flags()
+        return True
+
+    def parse_strikeout(self, flags: bool) -> bool:
+        event = self.event
+        if "1" <= self.sym <= "9":
+            safe = self.fielding_credit(" ")
+            event.advance[0] = 1 if safe else 0
+            event.muff_flag[0] = 1 if safe else 0
+            event.play[0] = self.token
+        else:
+            event.play[0] = "2"
+
+        if self.sym == "+":
+            # Something else happened on the strikeout, e.g. K+WP or K+SB2
+            self.nextsym()
+            self.primary_event()
+            token = self.token
+            if token == "WP":
+                event.wp_flag = True
+            elif token == "PB":
+                event.pb_flag = True
+            elif token == "PO":
+                self.parse_pickoff(False)
+            elif token == "POCS":
+                self.parse_pickoff_caught_stealing(False)
+            elif token == "POSB" or token == "SB":
+                self.parse_stolen_base(False)
+            elif token == "CS":
+                self.parse_caught_stealing(False)
+            elif token in ("DI", "OA", "OBA"):
+                pass
+            elif token == "E":
+                if not "1" <= self.sym <= "9":
+                    return False
+                event.errors.append(int(self.sym))
+                self.nextsym()
+            else:
+                return False
+
+        while flags and self.sym == "/":
+            self.flag()
+            token = self.token
+            if token == "DP":
+                event.dp_flag = True
+            elif token == "TP":
+                event.tp_flag = True
+            elif token in ("B", "BF", "BG", "BP"):
+                event.bunt_flag = True
+            elif token == "FL":
+                event.foul_flag = True
+        return True
+
+    def parse_strikeout_error(self, flags: bool) -> bool:
+        # KE is archaic
+        if not "1" <= self.sym <= "9":
+            return False
+        self.event.errors.append(int(self.sym))
+        self.event.play[0] = "E" + self.sym
+        self.nextsym()
+        return True
+
+    def parse_walk(self, flags: bool) -> bool:
+        event = self.event
+        event.advance[0] = 1
+
+        if self.sym == "+":
+            # Something else happened on the walk, e.g. W+WP or W+SB2
+            self.nextsym()
+            self.primary_event()
+            token = self.token
+            if token == "WP":
+                event.wp_flag = True
+            elif token == "PB":
+                event.pb_flag = True
+            elif token == "PO":
+                if not self.parse_pickoff(False):
+                    return False
+            elif token == "POSB" or token == "SB":
+                if not self.parse_stolen_base(False):
+                    return False
+            elif token == "POCS":
+                if not self.parse_pickoff_caught_stealing(False):
+                    return False
+            elif token == "CS":
+                if not self.parse_caught_stealing(False):
+                    return False
+            elif token == "E":
+                if not "1" <= self.sym <= "9":
+                    return False
+                event.errors.append(int(self.sym))
+                self.nextsym()
+
+        while flags and self.sym == "/":
+            self.flag()
+            token = self.token
+            if token in throw_flags and event.errors:
+                pass
+            elif token == "DP":
+                event.dp_flag = True
+            elif token not in ("BOOT", "MREV", "UREV", "UINT", "COUR") and token[:1] != "R":
+                return False
+        return True
+
+    def sanity_check(self):
+        """
+        Fill in what's implied by the play once it's been read
+        """
+        event = self.event
+        event_type = event.event_type
+        if SINGLE <= event_type <= HOME_RUN and event.advance[0] == 0 and event.play[0] == "":
+            event.advance[0] = event_type - SINGLE + 1
+            if event_type == HOME_RUN:
+                event.rbi_flag[0] = 1
+
+        if event_type == STRIKEOUT and event.play[0] == "2" and event.advance[0] > 0:
+            # The batter reached on the strikeout
+            event.play[0] = ""
+
+        if event_type == WALK:
+            event.rbi_flag[0] = event.rbi_flag[1] = event.rbi_flag[2] = 0
+
+        if event_type == FOUL_ERROR:
+            event.foul_flag = True
+            if event.batted_ball_type == " ":
+                event.batted_ball_type = "F" if event.errors and event.errors[0] >= 7 else "P"
+
+        for base in range(4):
+            if event.rbi_flag[base] == -1:
+                event.rbi_flag[base] = 0
+            # Patches up plays like BXH(832)(E8)
+            if event.play[base] != "" and "E" not in event.play[base]:
+                event.advance[base] = 0
+
+        # Default batted ball types from the fielding credits
+        if event_type == GENERIC_OUT and event.batted_ball_type == " ":
+            if len(event.play[0]) == 1 and not event.dp_flag and not event.tp_flag and not event.bunt_flag:
+                event.batted_ball_type = "F"
+            elif len(event.play[0]) >= 1:
+                event.batted_ball_type = "G"
+
+        if event_type == SINGLE and event.bunt_flag and event.batted_ball_type == " ":
+            event.batted_ball_type = "G"
+
+        if event.sh_flag:
+            event.batted_ball_type = "G"
+
+    def parse(self) -> bool:
+        event = self.event
+        self.primary_event()
+        if self.token == "":
+            event.event_type = GENERIC_OUT
+            if not self.parse_generic_out(True):
+                return False
+        else:
+            if self.token not in primary_events:
+                return False
+            event.event_type, parse_function = primary_events[self.token]
+            if not parse_function(self, True):
+                return False
+
+        if self.sym == ".":
+            if not self.advances():
+                return False
+
+        if self.sym == "+" or self.sym == "-" or self.sym == "#":
+            self.nextsym()
+
+        if self.sym != "\0":
+            return False
+
+        self.sanity_check()
+        return True
+
+
+primary_events = {
+    "BK": (BALK, EventParser.parse_balk),
+    "C": (INTERFERENCE, EventParser.parse_interference),
+    "CS": (CAUGHT_STEALING, EventParser.parse_caught_stealing),
+    "D": (DOUBLE, EventParser.parse_base_hit),
+    "DGR": (DOUBLE, EventParser.parse_ground_rule_double),
+    "DI": (INDIFFERENCE, EventParser.parse_indifference),
+    "E": (ERROR, EventParser.parse_safe_on_error),
+    "FC": (FIELDERS_CHOICE, EventParser.parse_fielders_choice),
+    "FLE": (FOUL_ERROR, EventParser.parse_foul_error),
+    "H": (HOME_RUN, EventParser.parse_base_hit),
+    "HP": (HIT_BY_PITCH, EventParser.parse_hit_by_pitch),
+    "HR": (HOME_RUN, EventParser.parse_base_hit),
+    "I": (INTENTIONAL_WALK, EventParser.parse_walk),
+    "IW": (INTENTIONAL_WALK, EventParser.parse_walk),
+    "K": (STRIKEOUT, EventParser.parse_strikeout),
+    "KE": (STRIKEOUT, EventParser.parse_strikeout_error),
+    "OA": (OTHER_ADVANCE, EventParser.parse_other_advance),
+    "PB": (PASSED_BALL, EventParser.parse_passed_ball),
+    "PO": (PICKOFF, EventParser.parse_pickoff),
+    "POCS": (PICKOFF, EventParser.parse_pickoff_caught_stealing),
+    "POSB": (STOLEN_BASE, EventParser.parse_stolen_base),
+    "S": (SINGLE, EventParser.parse_base_hit),
+    "SB": (STOLEN_BASE, EventParser.parse_stolen_base),
+    "T": (TRIPLE, EventParser.parse_base_hit),
+    "W": (WALK, EventParser.parse_walk),
+    "WP": (WILD_PITCH, EventParser.parse_wild_pitch),
+}
+
+
+def parse_event(text: str) -> EventData:
+    """
+    Parse the event text of a play. If the text is invalid, what could be parsed is returned (like cwevent does).
+
+    Parameters:
+    text (str): The event text, e.g. S8/G.2-H
+    """
+    event = EventData()
+    EventParser(text, event).parse()
+    return event
+
+
+def tokenize(line: str) -> list[str]:
+    """
+    Split a line of a retrosheet file into fields the way Chadwick's cw_strtok does (quotes are removed, a trailing empty field is dropped)
+    """
+    if '"' not in line and " " not in line and "\t" not in line:
+        # Nearly every line. Same result as below, just faster
+        had_cr = False
+        if line.endswith("\n"):
+            line = line[:-1]
+        if line.endswith("\r"):
+            line = line[:-1]
+            had_cr = True
+        if "\r" not in line and "\n" not in line:
+            tokens = line.split(",")
+            if not had_cr and tokens[-1] == "":
+                tokens.pop()
+            return tokens
+
+    tokens: list[str] = []
+    i = 0
+    n = len(line)
+    while i < n:
+        while i < n and line[i] in " \t\n":
+            i += 1
+        if i >= n:
+            break
+        if line[i] == '"':
+            i += 1
+            start = i
+            while i < n and line[i] not in '"\n\r':
+                i += 1
+            tokens.append(line[start:i])
+            i += 1
+            # A comma right after a quote is skipped
+            if i < n and line[i] == ",":
+                i += 1
+        else:
+            start = i
+            while i < n and line[i] not in ",\n\r":
+                i += 1
+            tokens.append(line[start:i])
+            i += 1
+    return tokens
+
+
+def atoi(value: str) -> int:
+    """
+    Read the integer at the start of value. Like Chadwick, anything that isn't a number is -1
+    """
+    try:
+        return int(value)
+    except ValueError:
+        match = re.match(r"\s*[+-]?\d+", value)
+        return int(match.group()) if match else -1
+
+
+class Play:
+    """
+    A play record along with the records that go with it (subs after it and badj, padj and radj before it)
+    """
+
+    __slots__ = ("inning", "batting_team", "batter", "count", "pitches", "text", "subs", "batter_hand", "pitcher_hand", "runner_id", "runner_base")
+
+    def __init__(self, inning: int, batting_team: int, batter: str, count: str, pitches: str, text: str):
+        self.inning = inning
+        self.batting_team = batting_team
+        self.batter = batter
+        self.count = count
+        self.pitches = pitches
+        self.text = text
+        # (player_id, team, slot, position)
+        self.subs: list[tuple[str, int, int, int]] = []
+        self.batter_hand = " "
+        self.pitcher_hand = " "
+        # Runner placed on base before the play (the extra innings runner)
+        self.runner_id = ""
+        self.runner_base = 0
+
+
+class Game:
+    __slots__ = ("game_id", "info", "starters", "plays")
+
+    def __init__(self, game_id: str):
+        self.game_id = game_id
+        self.info: dict[str, str] = {}
+        # (player_id, team, slot, position)
+        self.starters: list[tuple[str, int, int, int]] = []
+        self.plays: list[Play] = []
+
+
+def read_games(file: Path) -> list[Game]:
+    """
+    Read the games in a retrosheet event file.
+
+    Parameters:
+    file (Path): The .EVN or .EVA file
+    """
+    with open(file, encoding="latin-1", newline="") as f:
+        lines = f.read().split("\n")
+    # Chadwick ignores a last line that doesn't end with a newline. If the file ends with a newline this is just an empty string
+    lines.pop()
+
+    games: list[Game] = []
+    game = None
+    batter_hand = " "
+    hand_batter = ""
+    pitcher_hand = " "
+    runner_id = ""
+    runner_base = 0
+    for line in lines:
+        tokens = tokenize(line + "\n")
+        if game is None:
+            # Skip anything before the first game
+            if not tokens or tokens[0] != "id":
+                continue
+        elif not tokens:
+            # Chadwick stops reading the file at a blank line
+            break
+        record = tokens[0]
+        if record == "id":
+            if len(tokens) < 2:
+                break
+            game = Game(tokens[1])
+            games.append(game)
+            batter_hand = pitcher_hand = " "
+            hand_batter = runner_id = ""
+            runner_base = 0
+        elif record == "play":
+            if len(tokens) >= 7:
+                play = Play(atoi(tokens[1]), atoi(tokens[2]), tokens[3], tokens[4], tokens[5], tokens[6])
+                game.plays.append(play)  # type: ignore
+            elif game.plays:  # type: ignore
+                # Chadwick skips an incomplete play record but still gives its adjustments to the play before it
+                play = game.plays[-1]  # type: ignore
+            else:
+                continue
+            # A badj lasts until the batter changes, the other adjustments only apply to the next play
+            if batter_hand != " " and hand_batter == (tokens[3] if len(tokens) >= 4 else ""):
+                play.batter_hand = batter_hand
+            else:
+                batter_hand = " "
+                hand_batter = ""
+            if pitcher_hand != " ":
+                play.pitcher_hand = pitcher_hand
+                pitcher_hand = " "
+            if runner_base != 0:
+                play.runner_id = runner_id
+                play.runner_base = runner_base
+                runner_id = ""
+                runner_base = 0
+        elif record == "sub":
+            if len(tokens) >= 6 and game.plays:  # type: ignore
+                game.plays[-1].subs.append((tokens[1], atoi(tokens[3]), atoi(tokens[4]), atoi(tokens[5])))  # type: ignore
+        elif record == "info":
+            if len(tokens) >= 2:
+                game.info[tokens[1]] = tokens[2] if len(tokens) >= 3 else ""  # type: ignore
+        elif record == "start":
+            if len(tokens) >= 6:
+                game.starters.append((tokens[1], atoi(tokens[3]), atoi(tokens[4]), atoi(tokens[5])))  # type: ignore
+        elif record == "badj":
+            if len(tokens) >= 3:
+                hand_batter = tokens[1]
+                batter_hand = tokens[2][:1] or "\0"
+        elif record == "padj":
+            if len(tokens) >= 3:
+                pitcher_hand = tokens[2][:1] or "\0"
+        elif record == "cw:itb" or record == "radj":
+            if len(tokens) >= 3:
+                runner_id = tokens[1]
+                runner_base = atoi(tokens[2])
+    return games
+
+
+def read_rosters(directory: str, year: str) -> dict[str, dict[str, tuple[str, str]]]:
+    """
+    Read the bats and throws of every player from the TEAMyyyy and .ROS files of a year. Returns {team: {player: (bats, throws)}}
+    They're only read again when the files change (e.g. Retrosheet corrections were downloaded), not for every event file of the year.
+
+    Parameters:
+    directory (str): Directory with the files
+    year (str): The year
+    """
+    roster_files = tuple(
+        (file.name, file.stat().st_mtime_ns, file.stat().st_size)
+        for file in sorted(Path(directory).iterdir())
+        if file.name in (f"TEAM{year}", f"team{year}") or file.name.upper().endswith(f"{year}.ROS")
+    )
+    return load_rosters(directory, year, roster_files)
+
+
+@lru_cache(maxsize=16)
+def load_rosters(directory: str, year: str, roster_files: tuple[tuple[str, int, int], ...]) -> dict[str, dict[str, tuple[str, str]]]:
+    """
+    read_rosters, cached by the name, modification time and size of the files (roster_files)
+    """
+    team_file = Path(directory) / f"TEAM{year}"
+    if not team_file.exists():
+        team_file = Path(directory) / f"team{year}"
+    if not team_file.exists():
+        raise FileNotFoundError(f"Can't find TEAM{year} in {directory}")
+
+    rosters: dict[str, dict[str, tuple[str, str]]] = {}
+    with open(team_file, encoding="latin-1", newline="") as f:
+        for line in f.read().split("\n"):
+            tokens = tokenize(line + "\n")
+            if len(tokens) < 4 or tokens[0] in rosters:
+                continue
+            players: dict[str, tuple[str, str]] = {}
+            rosters[tokens[0]] = players
+            roster_file = Path(directory) / f"{tokens[0]}{year}.ROS"
+            if not roster_file.exists():
+                # Unknown players get ? for their hands
+                continue
+            with open(roster_file, encoding="latin-1", newline="") as roster:
+                for roster_line in roster.read().split("\n"):
+                    player = tokenize(roster_line + "\n")
+                    if len(player) >= 5 and player[0] not in players:
+                        players[player[0]] = (player[3][:1] or "\0", player[4][:1] or "\0")
+    return rosters
+
+
+class GameState:
+    """
+    The state of a game before each play: outs, score, runners, lineups and who's in the field. A port of Chadwick's CWGameState (cwlib/gameiter.c).
+    Teams are 0 (visitors) and 1 (home).
+    """
+
+    def __init__(self, game: Game):
+        self.inning = 1
+        self.batting_team = 1 if game.info.get("htbf") == "true" else 0
+        self.outs = 0
+        self.score = [0, 0]
+        self.ph_flag = False
+        self.runners = ["", "", "", ""]
+        # The pitcher responsible for each runner. pitchers[0] is for the batter
+        self.pitchers = ["", "", "", ""]
+        # lineups[team][slot] is [player, position]. Slot 0 is the pitcher when there's a DH
+        self.lineups: list[list[list]] = [[[None, 0] for _ in range(10)] for _ in range(2)]
+        self.fielders = [[""] * 10 for _ in range(2)]
+        self.dh_slot = [0, 0]
+        # The pitcher charged with a walk when the pitcher was changed during the plate appearance, and the batter charged with a strikeout when the batter was
+        self.walk_pitcher: str | None = None
+        self.strikeout_batter: str | None = None
+        for player_id, team, slot, position in game.starters:
+            self.lineups[team][slot] = [player_id, position]
+            if position <= 9:
+                self.fielders[team][position] = player_id
+            elif position == 10:
+                self.dh_slot[team] = slot
+
+    def pitcher(self) -> str:
+        return self.fielders[1 - self.batting_team][1]
+
+    def charged_batter(self, batter: str, event: EventData) -> str:
+        if event.event_type == STRIKEOUT and self.strikeout_batter is not None:
+            return self.strikeout_batter
+        return batter
+
+    def charged_pitcher(self, event: EventData) -> str:
+        if (event.event_type == WALK or event.event_type == INTENTIONAL_WALK) and self.walk_pitcher is not None:
+            return self.walk_pitcher
+        return self.pitcher()
+
+    def lineup_slot(self, team: int, player_id: str) -> int:
+        for slot, (player, _) in enumerate(self.lineups[team]):
+            if player == player_id:
+                return slot
+        return -1
+
+    def player_position(self, team: int, player_id: str) -> int:
+        lineup = self.lineups[team]
+        for slot in range(1, 10):
+            player, position = lineup[slot]
+            if player == player_id:
+                if position > 10 and self.dh_slot[team] == slot:
+                    # A pinch hitter for the DH is the DH right away
+                    return 10
+                elif position > 10 and not self.ph_flag:
+                    # Pinch hitters and runners have no position if they bat again in the same inning
+                    return 0
+                return position
+        # The pitcher can bat with the DH in effect
+        if lineup[0][0] == player_id:
+            return lineup[0][1]
+        return -1
+
+    def responsible_pitcher(self, event: EventData, base: int) -> str:
+        """
+        The pitcher responsible for the runner on base. On plays like 32(3)/FO.2-H(E2) the run is charged to the pitcher who put the runner on third on
+        """
+        if self.runners[base] == "":
+            return ""
+        if base == 3:
+            return self.pitchers[3]
+        lead_runner_forced = event.runner_put_out(3) and event.fc_flag[3]
+        if base == 2:
+            if lead_runner_forced and event.advance[2] >= 4:
+                return self.pitchers[3]
+            return self.pitchers[2]
+        if lead_runner_forced and event.advance[2] >= 4:
+            return self.pitchers[2]
+        elif lead_runner_forced and self.runners[2] == "" and event.advance[1] >= 4:
+            return self.pitchers[3]
+        return self.pitchers[1]
+
+    def push_pitchers(self, base: int):
+        """
+        A runner was forced out, so the runners behind him (and the batter) take over his responsible pitcher
+        """
+        for behind in range(base - 1, 0, -1):
+            if self.runners[behind] != "":
+                self.push_pitchers(behind)
+                self.pitchers[behind] = self.pitchers[base]
+                return
+        self.pitchers[0] = self.pitchers[base]
+
+    def process_advance(self, batter: str, event: EventData):
+        runners = self.runners
+        pitchers = self.pitchers
+        advance = event.advance
+        if (event.event_type == WALK or event.event_type == INTENTIONAL_WALK) and self.walk_pitcher is not None:
+            pitchers[0] = self.walk_pitcher
+        else:
+            pitchers[0] = self.pitcher()
+
+        if advance[3] >= 4 or event.runner_put_out(3):
+            if event.fc_flag[3] and event.runner_put_out(3):
+                self.push_pitchers(3)
+            runners[3] = pitchers[3] = ""
+        if advance[2] == 3:
+            runners[3] = runners[2]
+            pitchers[3] = pitchers[2]
+        if advance[2] >= 3 or event.runner_put_out(2):
+            if event.fc_flag[2] and event.runner_put_out(2):
+                self.push_pitchers(2)
+            runners[2] = pitchers[2] = ""
+        if advance[1] == 2:
+            runners[2] = runners[1]
+            pitchers[2] = pitchers[1]
+        elif advance[1] == 3:
+            runners[3] = runners[1]
+            pitchers[3] = pitchers[1]
+        if advance[1] >= 2 or event.runner_put_out(1):
+            if event.fc_flag[1] and event.runner_put_out(1):
+                pitchers[0] = pitchers[1]
+            runners[1] = pitchers[1] = ""
+
+        # Runners going backwards, after the forward advances so they don't get overwritten
+        if advance[3] == 2:
+            runners[2] = runners[3]
+            pitchers[2] = pitchers[3]
+            runners[3] = pitchers[3] = ""
+        elif advance[3] == 1:
+            runners[1] = runners[3]
+            pitchers[1] = pitchers[3]
+            runners[3] = pitchers[3] = ""
+        if advance[2] == 1:
+            runners[1] = runners[2]
+            pitchers[1] = pitchers[2]
+            runners[2] = pitchers[2] = ""
+
+        if 1 <= advance[0] <= 3:
+            runners[advance[0]] = batter
+            pitchers[advance[0]] = pitchers[0]
+
+    def update(self, batter: str, event: EventData):
+        """
+        Apply a play to the state
+        """
+        self.score[self.batting_team] += event.runs_on_play()
+        self.outs += event.outs_on_play()
+        self.process_advance(batter, event)
+        if event.is_batter():
+            self.ph_flag = False
+            self.walk_pitcher = None
+            self.strikeout_batter = None
+
+    def substitute(self, batter: str, count: str, player_id: str, team: int, slot: int, position: int):
+        lineup = self.lineups[team]
+        removed = lineup[slot][0]
+        lineup[slot] = [player_id, position]
+        if len(count) == 2 and count[0] != "?" and count[1] != "?":
+            # The old pitcher is charged with the walk if he left behind in the count, the old batter with the strikeout if he left with two strikes
+            if position == 1 and (count == "20" or count == "21" or count[0] == "3"):
+                self.walk_pitcher = self.fielders[team][1]
+            elif position == 11 and self.strikeout_batter is None and count[1] == "2":
+                self.strikeout_batter = batter
+
+        if position <= 9:
+            self.fielders[team][position] = player_id
+            if position == 1 and slot > 0 and lineup[0][0] is not None:
+                # The pitcher went into the batting order, so there's no more DH
+                lineup[0] = [None, 0]
+                self.dh_slot[team] = 0
+        elif position == 11:
+            self.ph_flag = True
+        elif position == 12:
+            for base in range(1, 4):
+                if self.runners[base] == removed:
+                    self.runners[base] = player_id
+                    break
+
+        if slot > 0 and lineup[0][0] is not None and lineup[0][0] == player_id:
+            lineup[0] = [None, 0]
+            self.dh_slot[team] = 0
+
+    def change_sides(self, play: Play):
+        self.inning = play.inning
+        self.batting_team = play.batting_team
+        self.outs = 0
+        self.ph_flag = False
+        self.runners = ["", "", "", ""]
+        self.pitchers = ["", "", "", ""]
+        # Pinch hitters and runners for the DH become the DH without a sub record
+        for team in range(2):
+            if self.dh_slot[team] > 0 and self.lineups[team][self.dh_slot[team]][1] > 10:
+                self.lineups[team][self.dh_slot[team]][1] = 10
+
+
+def hand(roster: dict[str, tuple[str, str]], player_id: str, throws: bool) -> str:
+    if player_id not in roster:
+        return "?"
+    return roster[player_id][throws]
+
+
+def opposite_hand(pitcher_hand: str) -> str:
+    """
+    The side a switch hitter bats from against a pitcher
+    """
+    if pitcher_hand == "L":
+        return "R"
+    elif pitcher_hand == "R":
+        return "L"
+    return "?"
+
+
+ball_pitches = "BHIPV"
+strike_pitches = "CFKLMOQRSTXY"
+
+
+class EventFileReader:
+    """
+    Converts the games of an event file to the cwevent fields, writing each field straight into a preallocated NumPy array.
+    """
+
+    def __init__(self, games: list[Game], rosters: dict[str, dict[str, tuple[str, str]]]):
+        self.games = games
+        self.rosters = rosters
+        size = sum(play.text != "NP" for game in games for play in game.plays)
+        self.columns = {column: np.empty(size, dtype=dtype) for column, dtype in chadwick_dtypes.items()}
+        # Each half inning gets its own number so the rest of the half inning can be looked at for PA_TRUNC_FL and FATE_RUNS_CT
+        self.half_innings = np.empty(size, dtype=np.int64)
+        self.is_batter = np.empty(size, dtype=bool)
+        self.row = 0
+        self.half_inning = 0
+        self.starters: set[str] = set()
+        self.starting_pitchers: list[str | None] = [None, None]
+
+    def write_row(self, game: Game, play: Play, state: GameState, event: EventData):
+        c = self.columns
+        row = self.row
+        info = game.info
+        visiting_team = info.get("visteam", "")
+        home_team = info.get("hometeam", "")
+        offense = self.rosters.get(home_team if play.batting_team == 1 else visiting_team, {})
+        defense = self.rosters.get(visiting_team if play.batting_team == 1 else home_team, {})
+        batting_team = state.batting_team
+        fielding_team = 1 - batting_team
+        batter = state.charged_batter(play.batter, event)
+        pitcher = state.charged_pitcher(event)
+        count = play.count
+        event_type = event.event_type
+        advance = event.advance
+
+        c["GAME_ID"][row] = game.game_id
+        c["AWAY_TEAM_ID"][row] = visiting_team or np.nan
+        c["INN_CT"][row] = play.inning
+        c["OUTS_CT"][row] = state.outs
+        if len(count) >= 2 and count[0] != "?" and count[1] != "?":
+            c["BALLS_CT"][row] = int(count[0])
+            c["STRIKES_CT"][row] = int(count[1])
+        else:
+            c["BALLS_CT"][row] = 0
+            c["STRIKES_CT"][row] = 0
+        c["AWAY_SCORE_CT"][row] = state.score[0]
+        c["HOME_SCORE_CT"][row] = state.score[1]
+        c["RESP_BAT_ID"][row] = batter or np.nan
+        batter_hand = play.batter_hand if play.batter_hand != " " else hand(offense, batter, False)
+        if batter_hand == "B":
+            batter_hand = opposite_hand(hand(defense, pitcher, True))
+        c["RESP_BAT_HAND_CD"][row] = batter_hand
+        c["RESP_PIT_ID"][row] = pitcher or np.nan
+        c["RESP_PIT_HAND_CD"][row] = play.pitcher_hand if play.pitcher_hand != " " else hand(defense, pitcher, True)
+        c["BASE1_RUN_ID"][row] = state.runners[1] or np.nan
+        c["BASE2_RUN_ID"][row] = state.runners[2] or np.nan
+        c["BASE3_RUN_ID"][row] = state.runners[3] or np.nan
+        c["BAT_FLD_CD"][row] = state.player_position(batting_team, play.batter)
+        c["BAT_LINEUP_ID"][row] = state.lineup_slot(batting_team, play.batter)
+        c["EVENT_CD"][row] = event_type
+        c["AB_FL"][row] = event.is_official_ab()
+        c["H_CD"][row] = event_type - SINGLE + 1 if SINGLE <= event_type <= HOME_RUN else 0
+        c["SH_FL"][row] = event.sh_flag
+        c["SF_FL"][row] = event.sf_flag
+        c["EVENT_OUTS_CT"][row] = event.outs_on_play()
+        c["DP_FL"][row] = event.dp_flag
+        c["TP_FL"][row] = event.tp_flag
+        c["RBI_CT"][row] = event.rbi_on_play()
+        c["WP_FL"][row] = event.wp_flag
+        c["PB_FL"][row] = event.pb_flag
+        c["BATTEDBALL_CD"][row] = event.batted_ball_type if event.batted_ball_type != " " else np.nan
+        c["BATTEDBALL_LOC_TX"][row] = event.hit_location or np.nan
+        c["BAT_DEST_ID"][row] = advance[0]
+        c["RUN1_DEST_ID"][row] = advance[1]
+        c["RUN2_DEST_ID"][row] = advance[2]
+        c["RUN3_DEST_ID"][row] = advance[3]
+        c["RUN1_SB_FL"][row] = event.sb_flag[1]
+        c["RUN2_SB_FL"][row] = event.sb_flag[2]
+        c["RUN3_SB_FL"][row] = event.sb_flag[3]
+        c["RUN1_CS_FL"][row] = event.cs_flag[1]
+        c["RUN2_CS_FL"][row] = event.cs_flag[2]
+        c["RUN3_CS_FL"][row] = event.cs_flag[3]
+        c["RUN1_PK_FL"][row] = event.po_flag[1]
+        c["RUN2_PK_FL"][row] = event.po_flag[2]
+        c["RUN3_PK_FL"][row] = event.po_flag[3]
+        c["RUN1_RESP_PIT_ID"][row] = state.responsible_pitcher(event, 1) or np.nan
+        c["RUN2_RESP_PIT_ID"][row] = state.responsible_pitcher(event, 2) or np.nan
+        c["RUN3_RESP_PIT_ID"][row] = state.responsible_pitcher(event, 3) or np.nan
+        c["HOME_TEAM_ID"][row] = home_team or np.nan
+        c["BAT_TEAM_ID"][row] = (home_team if batting_team == 1 else visiting_team) or np.nan
+        c["FLD_TEAM_ID"][row] = (visiting_team if batting_team == 1 else home_team) or np.nan
+        c["START_BASES_CD"][row] = (state.runners[3] != "") * 4 + (state.runners[2] != "") * 2 + (state.runners[1] != "")
+        c["END_BASES_CD"][row] = (3 in advance) * 4 + (2 in advance) * 2 + (1 in advance)
+        c["BAT_START_FL"][row] = play.batter in self.starters
+        c["RESP_BAT_START_FL"][row] = batter in self.starters
+        starting_pitcher = self.starting_pitchers[fielding_team]
+        c["PIT_START_FL"][row] = starting_pitcher == state.pitcher()
+        c["RESP_PIT_START_FL"][row] = starting_pitcher == pitcher
+        pitches = play.pitches
+        c["PA_BALL_CT"][row] = sum(pitches.count(pitch) for pitch in ball_pitches)
+        c["PA_OTHER_BALL_CT"][row] = pitches.count("V")
+        c["PA_STRIKE_CT"][row] = sum(pitches.count(pitch) for pitch in strike_pitches)
+        c["PA_OTHER_STRIKE_CT"][row] = pitches.count("K")
+        c["EVENT_RUNS_CT"][row] = event.runs_on_play()
+        c["BAT_SAFE_ERR_FL"][row] = event_type == ERROR or (event_type == GENERIC_OUT and event.muff_flag[0] != 0)
+        self.half_innings[row] = self.half_inning
+        self.is_batter[row] = event.is_batter()
+        self.row += 1
+
+    def read_game(self, game: Game):
+        """
+        Go through the plays of a game like Chadwick's game iterator (cw_gameiter_next) and write a row for each one (except NP)
+        """
+        plays = game.plays
+        if not plays:
+            return
+        state = GameState(game)
+        self.half_inning += 1
+        self.starters = {starter[0] for starter in game.starters}
+        self.starting_pitchers = [
+            next((starter[0] for starter in game.starters if starter[1] == team and starter[3] == 1), None) for team in range(2)
+        ]
+        event = parse_event(plays[0].text) if plays[0].text != "NP" else EventData()
+        for index, play in enumerate(plays):
+            if play.text != "NP":
+                self.write_row(game, play, state, event)
+                state.update(play.batter, event)
+            for sub in play.subs:
+                state.substitute(play.batter, play.count, *sub)
+
+            if index + 1 == len(plays):
+                break
+            play = plays[index + 1]
+            if state.inning != play.inning or state.batting_team != play.batting_team:
+                state.change_sides(play)
+                self.half_inning += 1
+            if 1 <= play.runner_base <= 3:
+                state.runners[play.runner_base] = play.runner_id
+                state.pitchers[play.runner_base] = state.pitcher()
+            if play.text != "NP":
+                # An NP keeps the event of the play before it, like Chadwick
+                event = parse_event(play.text)
+                for base in range(1, 4):
+                    if event.advance[base] == 0 and state.runners[base] != "" and not event.runner_put_out(base):
+                        event.advance[base] = base
+                if event.event_type == ERROR and state.outs == 2 and event.rbi_flag[3] == 1:
+                    # No RBI on an error with two outs
+                    event.rbi_flag[3] = 0
+                elif (event.event_type == WALK or event.event_type == INTENTIONAL_WALK) and (state.runners[2] == "" or state.runners[1] == ""):
+                    # The runner on third wasn't forced in
+                    event.rbi_flag[3] = 0
+                event.rbi_flag = [1 if rbi == 2 else rbi for rbi in event.rbi_flag]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        c = self.columns
+        half_innings = self.half_innings
+        # The last row of each half inning (rows of a half inning are always next to each other)
+        ends = np.searchsorted(half_innings, half_innings, side="right") - 1
+        runs = np.cumsum(c["EVENT_RUNS_CT"], dtype=np.int64)
+        c["FATE_RUNS_CT"][:] = runs[ends] - runs
+        batters = np.cumsum(self.is_batter, dtype=np.int64)
+        # A plate appearance that didn't finish because the half inning ended on a play like a caught stealing
+        c["PA_TRUNC_FL"][:] = ~self.is_batter & (batters[ends] == batters)
+        return pd.DataFrame(c)
+
+
+def read_event_file(file: Path) -> pd.DataFrame:
+    """
+    Read a retrosheet event file into the same DataFrame as retrosheet_cwevent_convert.read_cwevent, without cwevent.
+    The TEAMyyyy and .ROS files of the year have to be in the same directory.
+
+    Parameters:
+    file (Path): The .EVN or .EVA file
+    """
+    file = Path(file)
+    rosters = read_rosters(str(file.parent), file.stem[:4])
+    reader = EventFileReader(read_games(file), rosters)
+    for game in reader.games:
+        reader.read_game(game)
+    return reader.to_dataframe()
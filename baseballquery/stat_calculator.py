@@ -1,18 +1,101 @@
 import pandas as pd  # type: ignore
-from tqdm import tqdm
 import warnings
 from pandas.errors import SettingWithCopyWarning  # type: ignore
 from typing_extensions import override
+from pandas.core.groupby import DataFrameGroupBy  # type: ignore
 import numpy as np
+from .derived_columns import add_derived_columns
+
+
+class StatAccumulator:
+    def __init__(self, stats: pd.DataFrame, key_columns: list[str]):
+        """
+        Rows of stats that can be looked up by their key and appended to without copying the whole DataFrame each time.
+        The columns are NumPy arrays with room for more rows, which double in size when they're full, and the rows are found through a dict from key to row.
+        frame() turns them back into a DataFrame.
+
+        Parameters:
+        stats (pd.DataFrame): The rows to start with
+        key_columns (list[str]): The columns that identify a row. NA matches NA
+        """
+        self.key_columns = key_columns
+        self.size = len(stats)
+        capacity = max(16, 2 * self.size)
+        self.columns: dict[str, np.ndarray] = {}
+        for column in stats.columns:
+            values = stats[column].to_numpy()
+            self.columns[column] = np.empty(capacity, dtype=values.dtype)
+            self.columns[column][: self.size] = values
+        self.rows: dict[tuple, int] = {key: row for row, key in enumerate(self.keys({column: self.columns[column][: self.size] for column in key_columns}))}
+
+    def keys(self, keys: dict[str, np.ndarray]) -> list[tuple]:
+        # NA is None in the keys so that every NA (np.nan, pd.NA, None) matches
+        columns = [np.where(pd.isna(keys[column]), None, keys[column].astype(object)).tolist() for column in self.key_columns]  # type: ignore
+        return list(zip(*columns))
+
+    def find(self, keys: dict[str, np.ndarray]) -> np.ndarray:
+        """
+        The row of each key, or -1 if there isn't one
+        """
+        return np.array([self.rows.get(key, -1) for key in self.keys(keys)], dtype=np.int64)
+
+    def append(self, columns: dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Add rows, with the values in columns (the other columns are 0). A column is upcast if the new values don't fit its dtype. Returns the new rows
+        """
+        count = len(columns[self.key_columns[0]])
+        capacity = len(next(iter(self.columns.values())))
+        if self.size + count > capacity:
+            while self.size + count > capacity:
+                capacity *= 2
+            for column, values in self.columns.items():
+                grown = np.empty(capacity, dtype=values.dtype)
+                grown[: self.size] = values[: self.size]
+                self.columns[column] = grown
+        new_rows = np.arange(self.size, self.size + count)
+        for column, values in self.columns.items():
+            new_values = columns.get(column, np.zeros(count, dtype=values.dtype))
+            dtype = common_dtype(values.dtype, new_values.dtype)
+            if dtype != values.dtype:
+                values = self.columns[column] = values.astype(dtype)
+            values[new_rows] = new_values
+        for row, key in zip(new_rows.tolist(), self.keys(columns)):
+            self.rows[key] = row
+        self.size += count
+        return new_rows
+
+    def add(self, column: str, rows: np.ndarray, values: np.ndarray):
+        """
+        Add values to a column of rows (a row can be repeated)
+        """
+        np.add.at(self.columns[column], rows, values)
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame({column: values[: self.size] for column, values in self.columns.items()})
+
+
+def common_dtype(first: np.dtype, second: np.dtype) -> np.dtype:
+    """
+    The dtype of a column with values of both dtypes, like pd.concat gives (booleans only go with booleans)
+    """
+    if first == second:
+        return first
+    if first.kind in "OUSb" or second.kind in "OUSb":
+        return np.dtype(object)
+    return np.result_type(first, second)
 
 
 class StatCalculator:
+    # The columns of events the calculator uses (so StatSplits only has to read these)
+    event_columns: list[str] = ["GAME_ID", "year", "month", "day"]
+
     def __init__(
         self,
         events: pd.DataFrame,
         linear_weights: pd.DataFrame,
         find: str = "player",
         split: str = "year",
+        split_by: list[str] | None = None,
     ):
         """
         Parent class for all stat calculators. This class should not be instantiated directly.
@@ -28,13 +111,15 @@ class StatCalculator:
             "start_year",
             "end_year",
         ]
+        # Extra columns the stats are split by. They come right after the info columns above
+        self.split_by = split_by or []
+        self.info_columns += self.split_by
         self.basic_stat_columns = []
         self.calculated_stat_columns = []
         self.linear_weights = linear_weights
         self.events = events
-        self.events.loc[:, "year"] = self.events.loc[:, "GAME_ID"].str.slice(3, 7).astype(int)  # type: ignore
-        self.events.loc[:, "month"] = self.events.loc[:, "GAME_ID"].str.slice(7, 9).astype(int)  # type: ignore
-        self.events.loc[:, "day"] = self.events.loc[:, "GAME_ID"].str.slice(9, 11).astype(int)  # type: ignore
+        # Already there if the events were read from the event store with them (see event_columns)
+        add_derived_columns(self.events, ["year", "month", "day"])
         for year in self.linear_weights["year"].unique():  # type: ignore
             if year not in self.linear_weights["year"].unique():  # type: ignore
                 raise ValueError(
@@ -50,9 +135,33 @@ class StatCalculator:
                 f"split must be 'year', 'month', 'career', 'day', or 'game', not '{self.split}'"
             )
 
+        # Rows added or looked up by credit_players, create_player_row and get_player_row, until self.stats is read (see stats_accumulator)
+        self.accumulator: StatAccumulator | None = None
         # Dummy self.stats DataFrame to be overwritten by the child class
         self.stats: pd.DataFrame = pd.DataFrame(columns=self.info_columns + self.basic_stat_columns + self.calculated_stat_columns)  # type: ignore
 
+    @property
+    def stats(self) -> pd.DataFrame:
+        if self.accumulator is not None:
+            # Built once for all the rows added since self.stats was last read
+            self._stats = self.accumulator.frame()
+            self.accumulator = None
+        return self._stats
+
+    @stats.setter
+    def stats(self, stats: pd.DataFrame):
+        self._stats = stats
+        self.accumulator = None
+
+    def stats_accumulator(self) -> StatAccumulator:
+        """
+        The StatAccumulator of self.stats's rows, keyed by the info columns (other than start_year and end_year) and the split_by columns.
+        The same one is kept until self.stats is read or set, so rows can be looked up and added to without building self.stats each time
+        """
+        if self.accumulator is None:
+            self.accumulator = StatAccumulator(self._stats, self.row_key_columns())
+        return self.accumulator
+
     def calculate_all_stats(self):
         self.calculate_basic_stats()
         self.calculate_advanced_stats()
@@ -67,33 +176,154 @@ class StatCalculator:
             "calculate_advanced_stats must be implemented in the child class."
         )
 
-    def create_player_row(self, player_id: str = pd.NA, team: str = pd.NA, year: int = pd.NA, month: int = pd.NA, day: int = pd.NA, game_id: str = pd.NA):  # type: ignore
-        self.stats.loc[len(self.stats)] = [player_id, team, year, month, day, game_id, year, year] + [0] * len(self.stats.columns[8:])  # type: ignore
+    def stats_from_groups(self, groups: DataFrameGroupBy, sums: pd.DataFrame, player_column: str, team_column: str) -> pd.DataFrame:
+        """
+        Build the stats of every group at once, in the order of the groups. The info columns come from the group keys (pd.NA where they don't apply),
+        the stat columns from sums (one row per group, like any aggregation of groups), and the stat columns sums doesn't have are 0.
+
+        Parameters:
+        groups (DataFrameGroupBy): The events grouped by the split, the player or team column and split_by
+        sums (pd.DataFrame): Stat columns of each group
+        player_column (str): The column with the player when find is 'player'
+        team_column (str): The column with the team when find is 'team'
+        """
+        keys = sums.index.to_frame(index=False)
+        first = groups[["year", "month", "day"]].first()  # type: ignore
+        na = np.full(len(sums), np.nan, dtype=object)
+
+        def key(column: str) -> np.ndarray:
+            # Categorical keys become their values, like they are in the events
+            values = keys[column]
+            return values.to_numpy(dtype=object) if isinstance(values.dtype, pd.CategoricalDtype) else values.to_numpy()  # type: ignore
+
+        columns: dict[str, np.ndarray] = {
+            "player_id": key(player_column) if self.find == "player" else na,
+            "team": key(team_column) if self.find == "team" else na,
+            "year": first["year"].to_numpy() if self.split in ["year", "month", "day", "game"] else na,
+            "month": first["month"].to_numpy() if self.split in ["month", "day", "game"] else na,
+            "day": first["day"].to_numpy() if self.split in ["day", "game"] else na,
+            "game_id": key("GAME_ID") if self.split == "game" else na,
+            "start_year": groups["year"].min().to_numpy(),  # type: ignore
+            "end_year": groups["year"].max().to_numpy(),  # type: ignore
+        }
+        for column in ["year", "month", "day", "start_year", "end_year"]:
+            if columns[column].dtype != object:
+                # The derived columns are int16 and int8, while the stats have always had int64 dates
+                columns[column] = columns[column].astype(np.int64)
+        if self.split == "career":
+            # Like year, which they're set to before they're known
+            columns["start_year"] = columns["start_year"].astype(object)
+            columns["end_year"] = columns["end_year"].astype(object)
+        for column in self.split_by:
+            columns[column] = key(column)
+        for column in self.basic_stat_columns:
+            if column not in sums.columns:
+                columns[column] = np.zeros(len(sums), dtype=np.int64)
+            elif sums[column].dtype.kind in "iub":
+                # pandas keeps small int dtypes (e.g. int8) for sums that still fit in them, and bools sum to int64
+                columns[column] = sums[column].to_numpy(dtype=np.int64)
+            else:
+                columns[column] = sums[column].to_numpy()
+        for column in self.calculated_stat_columns:
+            columns[column] = np.zeros(len(sums), dtype=np.float64)
+        return pd.DataFrame(columns)
+
+    def credit_players(self, credits: pd.DataFrame):
+        """
+        Add stats that are credited to a player other than the one the events are grouped by (e.g. a stolen base to the runner). Only used when find is 'player'.
+        The credits are summed by player and by the split (and split_by) of their events, and added to the player's row.
+        Players without a row get one after the other rows, in the order of their first credit, with start_year and end_year 0 and every other stat 0.
 
-    def get_player_row(self, player_id: str = pd.NA, team: str = pd.NA, year: int = pd.NA, month: int = pd.NA, day: int = pd.NA, game_id: str = pd.NA) -> int:  # type: ignore
+        Parameters:
+        credits (pd.DataFrame): One row per credit, with the position of its event in self.events ("event"), an "order" that sorts the credits like the events they're from,
+            the player ("player_id") and the amount of each stat credited
+        """
+        stat_columns = [column for column in credits.columns if column not in ["event", "order", "player_id"]]
+        events = credits["event"].to_numpy()
+        na = np.full(len(credits), np.nan, dtype=object)
+
+        def event_values(column: str) -> np.ndarray:
+            values = self.events[column]
+            return (values.to_numpy(dtype=object) if isinstance(values.dtype, pd.CategoricalDtype) else values.to_numpy())[events]  # type: ignore
+
+        keys: dict[str, np.ndarray] = {
+            "player_id": credits["player_id"].to_numpy(dtype=object),
+            "team": na,
+            "year": event_values("year") if self.split in ["year", "month", "day", "game"] else na,
+            "month": event_values("month") if self.split in ["month", "day", "game"] else na,
+            "day": event_values("day") if self.split in ["day", "game"] else na,
+            "game_id": event_values("GAME_ID") if self.split == "game" else na,
+        }
+        for column in self.split_by:
+            keys[column] = event_values(column)
+        key_columns = self.row_key_columns()
+        table = pd.DataFrame({**keys, "order": credits["order"].to_numpy(), **{stat: credits[stat].to_numpy() for stat in stat_columns}})
+        summed = table.groupby(key_columns, dropna=False, sort=False).agg(order=("order", "min"), **{stat: (stat, "sum") for stat in stat_columns}).reset_index()  # type: ignore
+
+        # Sorted so the players without a row get theirs in the order of their first credit
+        summed = summed.sort_values("order")
+        accumulator = self.stats_accumulator()
+        rows = accumulator.find({column: summed[column].to_numpy() for column in key_columns})
+        found = rows >= 0
+        for stat in stat_columns:
+            accumulator.add(stat, rows[found], summed[stat].to_numpy()[found])
+
+        new = summed[~found]
+        if not len(new):
+            return
+        columns: dict[str, np.ndarray] = {}
+        for column in key_columns:
+            values = new[column].to_numpy()
+            # The dates of the stats are int64 (see stats_from_groups), while the split_by columns keep the dtype they have in the events
+            columns[column] = values.astype(np.int64) if column in ["year", "month", "day"] and values.dtype.kind in "iub" else values
+        columns["start_year"] = np.zeros(len(new), dtype=np.int64)
+        columns["end_year"] = np.zeros(len(new), dtype=np.int64)
+        for stat in stat_columns:
+            columns[stat] = new[stat].to_numpy().astype(accumulator.columns[stat].dtype)
+        accumulator.append(columns)
+
+    def create_player_row(self, player_id: str = pd.NA, team: str = pd.NA, year: int = pd.NA, month: int = pd.NA, day: int = pd.NA, game_id: str = pd.NA, dimensions: tuple = ()):  # type: ignore
+        """
+        Add a row to self.stats with start_year and end_year set to year and every stat 0. dimensions are the values of the split_by columns.
+        """
+        self.stats_accumulator().append({**self.row_key(player_id, team, year, month, day, game_id, dimensions), "start_year": np.array([year]), "end_year": np.array([year])})
 
-        player_row = self.stats.index[  # type: ignore
-            ((self.stats["player_id"] == player_id) | (pd.isna(self.stats["player_id"]) & pd.isna(player_id)))  # type: ignore
-            & ((self.stats["team"] == team) | (pd.isna(self.stats["team"]) & pd.isna(team)))  # type: ignore
-            & ((self.stats["year"] == year) | (pd.isna(self.stats["year"]) & pd.isna(year)))  # type: ignore
-            & ((self.stats["month"] == month) | (pd.isna(self.stats["month"]) & pd.isna(month)))  # type: ignore
-            & ((self.stats["day"] == day) | (pd.isna(self.stats["day"]) & pd.isna(day)))  # type: ignore
-            & ((self.stats["game_id"] == game_id) | (pd.isna(self.stats["game_id"]) & pd.isna(game_id)))  # type: ignore
-        ]
-        if len(player_row) == 0:  # type: ignore
-            self.stats.loc[len(self.stats)] = [player_id, team, year, month, day, game_id] + [0] * len(self.stats.columns[6:])  # type: ignore
-            player_row = [self.stats.index[-1]]  # type: ignore
+    def get_player_row(self, player_id: str = pd.NA, team: str = pd.NA, year: int = pd.NA, month: int = pd.NA, day: int = pd.NA, game_id: str = pd.NA, dimensions: tuple = ()) -> int:  # type: ignore
+        """
+        The position in self.stats of the row with these info columns (NA matches NA). If there isn't one, a row is added with start_year and end_year 0 and every stat 0.
+        Add to its stats with self.stats_accumulator().add, since writing to self.stats builds it again
+        """
+        accumulator = self.stats_accumulator()
+        key = self.row_key(player_id, team, year, month, day, game_id, dimensions)
+        row = int(accumulator.find(key)[0])
+        if row < 0:
+            row = int(accumulator.append({**key, "start_year": np.zeros(1, dtype=np.int64), "end_year": np.zeros(1, dtype=np.int64)})[0])
+        return row
 
-        return player_row[0]  # type: ignore
+    def row_key_columns(self) -> list[str]:
+        return ["player_id", "team", "year", "month", "day", "game_id"] + self.split_by
+
+    def row_key(self, player_id: str, team: str, year: int, month: int, day: int, game_id: str, dimensions: tuple) -> dict[str, np.ndarray]:
+        values = [player_id, team, year, month, day, game_id] + list(dimensions)
+        # NA and strings are kept as objects, numbers get their own dtype
+        return {column: np.array([value], dtype=object if pd.isna(value) or isinstance(value, str) else None) for column, value in zip(self.row_key_columns(), values)}
 
 
 class BattingStatsCalculator(StatCalculator):
+    event_columns = StatCalculator.event_columns + [
+        "RESP_BAT_ID", "BAT_TEAM_ID",
+        "PA", "AB", "H", "1B", "2B", "3B", "HR", "UBB", "IBB", "HBP", "SF", "SH", "K", "DP", "TP", "SB", "CS", "ROE", "FC", "R", "RBI", "GB", "LD", "FB", "PU",
+        # To credit stolen bases and caught stealing to the runner
+        "RUN1_SB_FL", "RUN2_SB_FL", "RUN3_SB_FL", "RUN1_CS_FL", "RUN2_CS_FL", "RUN3_CS_FL", "BASE1_RUN_ID", "BASE2_RUN_ID", "BASE3_RUN_ID",
+    ]
+
     def __init__(
         self,
         events: pd.DataFrame,
         linear_weights: pd.DataFrame,
         find: str = "player",
         split: str = "year",
+        split_by: list[str] | None = None,
     ):
         """
         Args:
@@ -101,8 +331,9 @@ class BattingStatsCalculator(StatCalculator):
             linear_weights (pd.DataFrame): A DataFrame that contains the linear weights for each event. Make sure that you have the linear weights for any year you're including in the events. If not, there will be an error.
             find (str): The split of the data. It can be "player" or "team".
             split (str): The split of the data. It can be "year", "month", "career", "day", or "game".
+            split_by (list[str] | None): Columns of the events to also split the stats by (e.g. RESP_PIT_HAND_CD), which are added to the stats after the info columns.
         """
-        super().__init__(events, linear_weights, find, split)
+        super().__init__(events, linear_weights, find, split, split_by)
         self.basic_stat_columns = [
             "G",
             "PA",
@@ -178,115 +409,36 @@ class BattingStatsCalculator(StatCalculator):
             to_group_by.append("RESP_BAT_ID")
         elif self.find == "team":
             to_group_by.append("BAT_TEAM_ID")
-
-        # Create a row for each player grouping
-        groups = self.events.groupby(to_group_by)  # type: ignore
-        for _, group in tqdm(groups):
-            # Set year, month, day, and game_id based on the grouping and what's relevant. pd.NA is used for irrelevant columns (based on find and split)
-            if self.split == "year":
-                year = group.iloc[0]["year"]  # type: ignore
-                month = pd.NA
-                day = pd.NA
-                game_id = pd.NA
-            elif self.split == "month":
-                year = group.iloc[0]["year"]  # type: ignore
-                month = group.iloc[0]["month"]  # type: ignore
-                day = pd.NA
-                game_id = pd.NA
-            elif self.split == "career":
-                year = pd.NA
-                month = pd.NA
-                day = pd.NA
-                game_id = pd.NA
-            elif self.split == "day":
-                year = group.iloc[0]["year"]  # type: ignore
-                month = group.iloc[0]["month"]  # type: ignore
-                day = group.iloc[0]["day"]  # type: ignore
-                game_id = pd.NA
-            elif self.split == "game":
-                year = group.iloc[0]["year"]  # type: ignore
-                month = group.iloc[0]["month"]  # type: ignore
-                day = group.iloc[0]["day"]  # type: ignore
-                game_id = group.iloc[0]["GAME_ID"]  # type: ignore
-            if self.find == "player":
-                player_id = group.iloc[0]["RESP_BAT_ID"]  # type: ignore
-                team = pd.NA
-            elif self.find == "team":
-                player_id = pd.NA
-                team = group.iloc[0]["BAT_TEAM_ID"]  # type: ignore
-            self.create_player_row(player_id, team, year, month, day, game_id)  # type: ignore
-            player_row_idx = len(self.stats) - 1
-            self.stats.loc[player_row_idx, "start_year"] = group["year"].min()  # type: ignore
-            self.stats.loc[player_row_idx, "end_year"] = group["year"].max()  # type: ignore
-            for stat in self.basic_stat_columns:
-                # These need to be handled separately because they belong to a runner rather than a hitter
-                if stat in ["SB", "CS"] and self.find == "player":
-                    continue
-                if stat == "G":
-                    # The number of games in this sample is the number of unique GAME_IDs
-                    self.stats.loc[player_row_idx, stat] = group["GAME_ID"].nunique()  # type: ignore
-                    continue
-                self.stats.loc[player_row_idx, stat] = group[stat].sum()  # type: ignore
-
-        # Calculate and correctly credit SBs and CSs
+        to_group_by += self.split_by
+
+        # A row for each player grouping, with every stat summed at once
+        groups = self.events.groupby(to_group_by, observed=True)  # type: ignore
+        # SB and CS belong to the runners rather than the hitter, so they're credited separately
+        summed = [stat for stat in self.basic_stat_columns if stat != "G" and not (stat in ["SB", "CS"] and self.find == "player")]
+        sums = groups[summed].sum()  # type: ignore
+        # The number of games in this sample is the number of unique GAME_IDs
+        sums["G"] = groups["GAME_ID"].nunique()  # type: ignore
+        self.stats = self.stats_from_groups(groups, sums, "RESP_BAT_ID", "BAT_TEAM_ID")
+
+        # Credit SBs and CSs to the runners
         if self.find == "player":
-            sb_cs = self.events[(self.events["SB"] != 0) | (self.events["CS"] != 0)]  # type: ignore
-            for _, event in tqdm(sb_cs.iterrows(), total=len(sb_cs)):  # type: ignore
-                if self.split == "year":
-                    year = event["year"]  # type: ignore
-                    month = pd.NA
-                    day = pd.NA
-                    game_id = pd.NA
-                elif self.split == "month":
-                    year = event["year"]  # type: ignore
-                    month = event["month"]  # type: ignore
-                    day = pd.NA
-                    game_id = pd.NA
-                elif self.split == "career":
-                    year = pd.NA
-                    month = pd.NA
-                    day = pd.NA
-                    game_id = pd.NA
-                elif self.split == "day":
-                    year = event["year"]  # type: ignore
-                    month = event["month"]  # type: ignore
-                    day = event["day"]  # type: ignore
-                    game_id = pd.NA
-                elif self.split == "game":
-                    year = event["year"]  # type: ignore
-                    month = event["month"]  # type: ignore
-                    day = event["day"]  # type: ignore
-                    game_id = event["GAME_ID"]  # type: ignore
-                if self.find == "player":
-                    player_id = event["RESP_BAT_ID"]  # type: ignore
-                    team = pd.NA
-                elif self.find == "team":
-                    player_id = pd.NA
-                    team = event["BAT_TEAM_ID"]  # type: ignore
-                if event["RUN1_SB_FL"] == True:
-                    runner_player_id = event["BASE1_RUN_ID"]  # type: ignore
-                    runner_row_idx = self.get_player_row(runner_player_id, team, year, month, day, game_id)  # type: ignore
-                    self.stats.loc[runner_row_idx, "SB"] += 1
-                if event["RUN2_SB_FL"] == True:
-                    runner_player_id = event["BASE2_RUN_ID"]  # type: ignore
-                    runner_row_idx = self.get_player_row(runner_player_id, team, year, month, day, game_id)  # type: ignore
-                    self.stats.loc[runner_row_idx, "SB"] += 1
-                if event["RUN3_SB_FL"] == True:
-                    runner_player_id = event["BASE3_RUN_ID"]  # type: ignore
-                    runner_row_idx = self.get_player_row(runner_player_id, team, year, month, day, game_id)  # type: ignore
-                    self.stats.loc[runner_row_idx, "SB"] += 1
-                if event["RUN1_CS_FL"] == True:
-                    runner_player_id = event["BASE1_RUN_ID"]  # type: ignore
-                    runner_row_idx = self.get_player_row(runner_player_id, team, year, month, day, game_id)  # type: ignore
-                    self.stats.loc[runner_row_idx, "CS"] += 1
-                if event["RUN2_CS_FL"] == True:
-                    runner_player_id = event["BASE2_RUN_ID"]  # type: ignore
-                    runner_row_idx = self.get_player_row(runner_player_id, team, year, month, day, game_id)  # type: ignore
-                    self.stats.loc[runner_row_idx, "CS"] += 1
-                if event["RUN3_CS_FL"] == True:
-                    runner_player_id = event["BASE3_RUN_ID"]  # type: ignore
-                    runner_row_idx = self.get_player_row(runner_player_id, team, year, month, day, game_id)  # type: ignore
-                    self.stats.loc[runner_row_idx, "CS"] += 1
+            slots = [
+                ("RUN1_SB_FL", "BASE1_RUN_ID", "SB"), ("RUN2_SB_FL", "BASE2_RUN_ID", "SB"), ("RUN3_SB_FL", "BASE3_RUN_ID", "SB"),
+                ("RUN1_CS_FL", "BASE1_RUN_ID", "CS"), ("RUN2_CS_FL", "BASE2_RUN_ID", "CS"), ("RUN3_CS_FL", "BASE3_RUN_ID", "CS"),
+            ]
+            credits: list[pd.DataFrame] = []
+            for slot, (flag, runner, stat) in enumerate(slots):
+                events = np.flatnonzero(self.events[flag].to_numpy(dtype=bool))  # type: ignore
+                credits.append(
+                    pd.DataFrame({
+                        "event": events,
+                        "order": events * len(slots) + slot,
+                        "player_id": self.events[runner].to_numpy(dtype=object)[events],  # type: ignore
+                        "SB": np.int64(stat == "SB"),
+                        "CS": np.int64(stat == "CS"),
+                    })
+                )
+            self.credit_players(pd.concat(credits, ignore_index=True))  # type: ignore
 
     @override
     def calculate_advanced_stats(self):
@@ -359,12 +511,20 @@ class BattingStatsCalculator(StatCalculator):
 
 
 class PitchingStatsCalculator(StatCalculator):
+    event_columns = StatCalculator.event_columns + [
+        "RESP_PIT_ID", "FLD_TEAM_ID", "RESP_BAT_ID", "PIT_START_FL", "EVENT_OUTS_CT",
+        "PA", "AB", "H", "R", "ER", "UER", "T_UER", "1B", "2B", "3B", "HR", "UBB", "IBB", "HBP", "DP", "TP", "WP", "BK", "K", "P", "GB", "LD", "FB", "PU", "SH", "SF",
+        # To charge runs to the pitcher responsible for each runner
+        "BAT_DEST_ID", "RUN1_DEST_ID", "RUN2_DEST_ID", "RUN3_DEST_ID", "RUN1_RESP_PIT_ID", "RUN2_RESP_PIT_ID", "RUN3_RESP_PIT_ID",
+    ]
+
     def __init__(
         self,
         events: pd.DataFrame,
         linear_weights: pd.DataFrame,
         find: str = "player",
         split: str = "year",
+        split_by: list[str] | None = None,
     ):
         """
         Args:
@@ -372,8 +532,9 @@ class PitchingStatsCalculator(StatCalculator):
             linear_weights (pd.DataFrame): A DataFrame that contains the linear weights for each event. Any rows other than the first row are ignored, so average the linear weights if necessary.
             find (str): The split of the data. It can be "player" or "team".
             split (str): The split of the data. It can be "year", "month", "career", "day", or "game".
+            split_by (list[str] | None): Columns of the events to also split the stats by (e.g. RESP_PIT_HAND_CD), which are added to the stats after the info columns.
         """
-        super().__init__(events, linear_weights, find, split)
+        super().__init__(events, linear_weights, find, split, split_by)
 
         self.basic_stat_columns = [
             "G",
@@ -431,13 +592,24 @@ class PitchingStatsCalculator(StatCalculator):
         dtypes_dict.update({column: "float64" for column in self.calculated_stat_columns})  # type: ignore
         dtypes_dict["IP"] = "float64"
         self.stats = self.stats.astype(dtypes_dict)  # type: ignore
+        # Set by calculate_basic_stats (see find_appearances)
+        self.appearances: pd.DataFrame | None = None
 
-    @override
-    def create_player_row(self, player_id: str = pd.NA, team: str = pd.NA, year: int = pd.NA, month: int = pd.NA, day: int = pd.NA, game_id: str = pd.NA):  # type: ignore
-        # This override is needed because IP isn't an integer
-        column = [player_id, team, year, month, day, game_id, year, year] + [0] * len(self.stats.columns[8:])  # type: ignore
-        column[8 + self.basic_stat_columns.index("IP")] = 0.0  # type: ignore
-        self.stats.loc[len(self.stats)] = column
+    def find_appearances(self) -> pd.DataFrame:
+        """
+        One row per appearance: each pitcher (each team when find is 'team') in each game, also split by split_by. Columns:
+        the pitcher or team, GAME_ID and the split_by columns, the position in self.events of its first event ("first_event")
+        and "start" (the starting pitcher was pitching at its first event).
+        A game is on a single day, so every split (year, month, career, game) counts its games started from these.
+        """
+        column = "RESP_PIT_ID" if self.find == "player" else "FLD_TEAM_ID"
+        keys = list(dict.fromkeys([column, "GAME_ID"] + self.split_by))
+        event = pd.Series(np.arange(len(self.events)), index=self.events.index)
+        by_appearance = event.groupby([self.events[key] for key in keys], observed=True, sort=False)  # type: ignore
+        appearances = by_appearance.min().rename("first_event").reset_index()  # type: ignore
+        first_event = appearances["first_event"].to_numpy()
+        appearances["start"] = self.events["PIT_START_FL"].to_numpy(dtype=bool)[first_event]  # type: ignore
+        return appearances
 
     @override
     def calculate_basic_stats(self):
@@ -459,146 +631,50 @@ class PitchingStatsCalculator(StatCalculator):
             to_group_by.append("RESP_PIT_ID")
         elif self.find == "team":
             to_group_by.append("FLD_TEAM_ID")
-
-        # Create a row for each player grouping
-        groups = self.events.groupby(to_group_by)  # type: ignore
-        for _, group in tqdm(groups):
-            # Set year, month, day, and game_id based on the grouping and what's relevant. pd.NA is used for irrelevant columns (based on find and split)
-            if self.split == "year":
-                year = group.iloc[0]["year"]  # type: ignore
-                month = pd.NA
-                day = pd.NA
-                game_id = pd.NA
-            elif self.split == "month":
-                year = group.iloc[0]["year"]  # type: ignore
-                month = group.iloc[0]["month"]  # type: ignore
-                day = pd.NA
-                game_id = pd.NA
-            elif self.split == "career":
-                year = pd.NA
-                month = pd.NA
-                day = pd.NA
-                game_id = pd.NA
-            elif self.split == "day":
-                year = group.iloc[0]["year"]  # type: ignore
-                month = group.iloc[0]["month"]  # type: ignore
-                day = group.iloc[0]["day"]  # type: ignore
-                game_id = pd.NA
-            elif self.split == "game":
-                year = group.iloc[0]["year"]  # type: ignore
-                month = group.iloc[0]["month"]  # type: ignore
-                day = group.iloc[0]["day"]  # type: ignore
-                game_id = group.iloc[0]["GAME_ID"]  # type: ignore
-            if self.find == "player":
-                player_id = group.iloc[0]["RESP_PIT_ID"]  # type: ignore
-                team = pd.NA
-            elif self.find == "team":
-                player_id = pd.NA
-                team = group.iloc[0]["FLD_TEAM_ID"]  # type: ignore
-            self.create_player_row(player_id, team, year, month, day, game_id)  # type: ignore
-            player_row_idx = len(self.stats) - 1
-            self.stats.loc[player_row_idx, "start_year"] = group["year"].min()  # type: ignore
-            self.stats.loc[player_row_idx, "end_year"] = group["year"].max()  # type: ignore
-            for stat in self.basic_stat_columns:
-                # These need to be handled separately because they may belong to another pitcher
-                if stat in ["R", "UER", "ER"] and self.find == "player":
-                    continue
-                elif stat == "UER" and self.find == "team":
-                    # This includes runs unearned for the team
-                    self.stats.loc[player_row_idx, stat] = group["UER"].sum() + group["T_UER"].sum()  # type: ignore
-                    continue
-                elif stat == "ER" and self.find == "team":
-                    # This includes runs earned for the team (earned runs - team unearned runs)
-                    self.stats.loc[player_row_idx, stat] = group["ER"].sum() - group["T_UER"].sum()  # type: ignore
-                    continue
-                if stat == "G":
-                    # The number of games in this sample is the number of unique GAME_IDs
-                    self.stats.loc[player_row_idx, stat] = group["GAME_ID"].nunique()  # type: ignore
-                    continue
-                if stat == "GS":
-                    for game_id in group["GAME_ID"].unique():  # type: ignore
-                        game = group[group["GAME_ID"] == game_id]  # type: ignore
-                        if game["PIT_START_FL"].iloc[0] == True:  # type: ignore
-                            self.stats.loc[player_row_idx, stat] += 1
-                    continue
-                if stat == "IP":
-                    self.stats.loc[player_row_idx, stat] = group["EVENT_OUTS_CT"].sum() / 3  # type: ignore
-                    continue
-                if stat == "TBF":
-                    self.stats.loc[player_row_idx, stat] = group["PA"].sum()  # type: ignore
-                    continue
-                self.stats.loc[player_row_idx, stat] = group[stat].sum()  # type: ignore
-
-        # Calculate and correctly credit runs
+        to_group_by += self.split_by
+
+        # A row for each player grouping, with every stat summed at once
+        groups = self.events.groupby(to_group_by, observed=True)  # type: ignore
+        # R, ER and UER may belong to another pitcher, so for players they're charged separately
+        summed = [stat for stat in self.basic_stat_columns if stat not in ["G", "GS", "IP", "TBF"] and not (stat in ["R", "ER", "UER"] and self.find == "player")]
+        # Summed as int64 so the team runs below can't overflow the small dtype pandas gives the sums
+        sums = groups[summed + ["EVENT_OUTS_CT", "PA", "T_UER"]].sum().astype(np.int64)  # type: ignore
+        # The number of games in this sample is the number of unique GAME_IDs
+        sums["G"] = groups["GAME_ID"].nunique()  # type: ignore
+        sums["IP"] = sums["EVENT_OUTS_CT"] / 3
+        sums["TBF"] = sums["PA"]
+        if self.find == "team":
+            # This includes runs unearned for the team
+            sums["UER"] = sums["UER"] + sums["T_UER"]
+            # This includes runs earned for the team (earned runs - team unearned runs)
+            sums["ER"] = sums["ER"] - sums["T_UER"]
+        # A game started is an appearance that started the game, counted in the group of its first event
+        self.appearances = self.find_appearances()
+        starts = self.events.iloc[self.appearances.loc[self.appearances["start"], "first_event"].to_numpy()]  # type: ignore
+        sums["GS"] = starts.groupby(to_group_by, observed=True).size().reindex(sums.index, fill_value=0)  # type: ignore
+        self.stats = self.stats_from_groups(groups, sums, "RESP_PIT_ID", "FLD_TEAM_ID")
+
+        # Charge runs to the pitcher responsible for each runner who scored
         if self.find == "player":
-            runs_scored = self.events[(self.events["R"] != 0)]  # type: ignore
-            for _, event in tqdm(runs_scored.iterrows(), total=len(runs_scored)):  # type: ignore
-                if self.split == "year":
-                    year = event["year"]  # type: ignore
-                    month = pd.NA
-                    day = pd.NA
-                    game_id = pd.NA
-                elif self.split == "month":
-                    year = event["year"]  # type: ignore
-                    month = event["month"]  # type: ignore
-                    day = pd.NA
-                    game_id = pd.NA
-                elif self.split == "career":
-                    year = pd.NA
-                    month = pd.NA
-                    day = pd.NA
-                    game_id = pd.NA
-                elif self.split == "day":
-                    year = event["year"]  # type: ignore
-                    month = event["month"]  # type: ignore
-                    day = event["day"]  # type: ignore
-                    game_id = pd.NA
-                elif self.split == "game":
-                    year = event["year"]  # type: ignore
-                    month = event["month"]  # type: ignore
-                    day = event["day"]  # type: ignore
-                    game_id = event["GAME_ID"]  # type: ignore
-                if self.find == "player":
-                    player_id = event["RESP_BAT_ID"]  # type: ignore
-                    team = pd.NA
-                elif self.find == "team":
-                    player_id = pd.NA
-                    team = event["BAT_TEAM_ID"]  # type: ignore
-                if event["BAT_DEST_ID"] >= 4:
-                    pitcher_player_id = event["RESP_PIT_ID"]  # type: ignore
-                    pitcher_row_idx = self.get_player_row(pitcher_player_id, team, year, month, day, game_id)  # type: ignore
-                    self.stats.loc[pitcher_row_idx, "R"] += 1
-                    if event["BAT_DEST_ID"] in [4, 6]:
-                        self.stats.loc[pitcher_row_idx, "ER"] += 1
-                    else:
-                        self.stats.loc[pitcher_row_idx, "UER"] += 1
-
-                if event["RUN1_DEST_ID"] >= 4:
-                    pitcher_player_id = event["RUN1_RESP_PIT_ID"]  # type: ignore
-                    pitcher_row_idx = self.get_player_row(pitcher_player_id, team, year, month, day, game_id)  # type: ignore
-                    self.stats.loc[pitcher_row_idx, "R"] += 1
-                    if event["RUN1_DEST_ID"] in [4, 6]:
-                        self.stats.loc[pitcher_row_idx, "ER"] += 1
-                    else:
-                        self.stats.loc[pitcher_row_idx, "UER"] += 1
-
-                if event["RUN2_DEST_ID"] >= 4:
-                    pitcher_player_id = event["RUN2_RESP_PIT_ID"]  # type: ignore
-                    pitcher_row_idx = self.get_player_row(pitcher_player_id, team, year, month, day, game_id)  # type: ignore
-                    self.stats.loc[pitcher_row_idx, "R"] += 1
-                    if event["RUN2_DEST_ID"] in [4, 6]:
-                        self.stats.loc[pitcher_row_idx, "ER"] += 1
-                    else:
-                        self.stats.loc[pitcher_row_idx, "UER"] += 1
-
-                if event["RUN3_DEST_ID"] >= 4:
-                    pitcher_player_id = event["RUN3_RESP_PIT_ID"]  # type: ignore
-                    pitcher_row_idx = self.get_player_row(pitcher_player_id, team, year, month, day, game_id)  # type: ignore
-                    self.stats.loc[pitcher_row_idx, "R"] += 1
-                    if event["RUN3_DEST_ID"] in [4, 6]:
-                        self.stats.loc[pitcher_row_idx, "ER"] += 1
-                    else:
-                        self.stats.loc[pitcher_row_idx, "UER"] += 1
+            slots = [("BAT_DEST_ID", "RESP_PIT_ID"), ("RUN1_DEST_ID", "RUN1_RESP_PIT_ID"), ("RUN2_DEST_ID", "RUN2_RESP_PIT_ID"), ("RUN3_DEST_ID", "RUN3_RESP_PIT_ID")]
+            runs_scored = self.events["R"].to_numpy() != 0  # type: ignore
+            credits: list[pd.DataFrame] = []
+            for slot, (destination, pitcher) in enumerate(slots):
+                destinations = self.events[destination].to_numpy()  # type: ignore
+                events = np.flatnonzero(runs_scored & (destinations >= 4))
+                # Runs with a destination of 4 or 6 are earned for the pitcher, the others are unearned
+                earned = np.isin(destinations[events], [4, 6])
+                credits.append(
+                    pd.DataFrame({
+                        "event": events,
+                        "order": events * len(slots) + slot,
+                        "player_id": self.events[pitcher].to_numpy(dtype=object)[events],  # type: ignore
+                        "R": np.ones(len(events), dtype=np.int64),
+                        "ER": earned.astype(np.int64),
+                        "UER": (~earned).astype(np.int64),
+                    })
+                )
+            self.credit_players(pd.concat(credits, ignore_index=True))  # type: ignore
 
     @override
     def calculate_advanced_stats(self):
@@ -1,33 +1,319 @@
-import h5py  # type: ignore
 from pathlib import Path
+import hashlib
+import json
+from typing import Any, Callable, Hashable
+import numpy as np
 import pandas as pd  # type: ignore
-from .stat_calculator import BattingStatsCalculator, PitchingStatsCalculator
+from .stat_calculator import StatCalculator, BattingStatsCalculator, PitchingStatsCalculator
+from .event_store import Predicate, get_store, predicate_mask, predicate_columns
+from .derived_columns import derived_columns, add_derived_columns
+from .result_cache import result_cache
+
+# (columns the filter uses, function that gives a boolean mask of the events to keep, the predicate if it's one (see StatSplits.add_predicate))
+Filter = tuple[list[str], Callable[[pd.DataFrame], Any], Predicate | None]
+
+
+def json_key(key: Any) -> Any:
+    """
+    A filter key as something json can save (tuples become lists), or None if it isn't made of strings, numbers and tuples (e.g. a function)
+    """
+    if isinstance(key, np.generic):
+        key = key.item()
+    if key is None or isinstance(key, (str, int, float, bool)):
+        return key
+    if isinstance(key, tuple):
+        items = [json_key(item) for item in key]  # type: ignore
+        if any(item is None and original is not None for item, original in zip(items, key)):  # type: ignore
+            return None
+        return items
+    return None
+
+
+def switch_hitters(events: pd.DataFrame) -> list[str]:
+    """
+    Batters with at least 5 PAs from each side of the plate in the events
+    """
+    counts = events.groupby(["RESP_BAT_ID", "RESP_BAT_HAND_CD"], observed=True).size().unstack(fill_value=0)  # type: ignore
+    return list(counts.index[(counts.get("L", 0) >= 5) & (counts.get("R", 0) >= 5)])  # type: ignore
 
 
 class StatSplits:
+    # The calculator used by calculate_stats. Its event_columns are the columns that are read
+    calculator_class: type[StatCalculator] = StatCalculator
+
     def __init__(self, start_year: int, end_year: int):
         """
         Parent class. Should not be instantiated directly
+        The events aren't read until calculate_stats is run (or self.events is used), so that only the columns and rows that are needed are loaded.
+        After that they're kept, and the set_ methods only add filters on top of them, so the filters can be changed (see reset_filters and push_filters)
+        and calculate_stats run again without reading the events again.
         """
-        cwd = Path(__file__).parent
-        self.chadwick = cwd / "chadwick.hdf5"
-        with h5py.File(self.chadwick) as f:
-            years: list[str] = list(f.keys())
+        self.store = get_store()
+        years = self.store.years()
 
-        if f"year_{start_year}" not in years:
+        if start_year not in years:
             raise ValueError(f"Start year {start_year} not found in database")
-        if f"year_{end_year}" not in years:
+        if end_year not in years:
             raise ValueError(f"End year {end_year} not found in database")
-        events_years_list = []
-        for year in range(start_year, end_year + 1):
-            events_years_list.append(pd.read_hdf(self.chadwick, f"year_{year}"))  # type: ignore
 
         cwd = Path(__file__).parent
         self.linear_weights = pd.read_csv(cwd / "linear_weights.csv")  # type: ignore
-        self.events = pd.concat(events_years_list)  # type: ignore
+        self.years = list(range(start_year, end_year + 1))
+        # What the set_ methods limit the data to, by key (see add_filter)
+        self.filters: dict[Hashable, Filter] = {}
+        # Filters saved by push_filters
+        self.filter_stack: list[dict[Hashable, Filter]] = []
+        # The events the filters are applied to. Never modified, only replaced when more columns (or rows) are needed
+        self._base_events: pd.DataFrame | None = None
+        # The columns of _base_events, or None for every column
+        self._base_columns: list[str] | None = None
+        # Keys of the predicates that were pushed down to the event store when _base_events was read, so they're already applied to it
+        self._base_filters: set[Hashable] = set()
+        # True if _base_events was set through self.events, so it can't be read again
+        self._base_set = False
+        # The mask of _base_events for each filter, so filters used by several queries are only computed once
+        self._masks: dict[Hashable, np.ndarray] = {}
+        # The last filtered events and the keys of the filters that were applied to them
+        self._filtered_events: tuple[frozenset[Hashable], pd.DataFrame] | None = None
+        # (year, batter) of the switch hitters of each season
+        self._switch_hitters: list[tuple[int, str]] | None = None
         self.stats: pd.DataFrame | None = None
         self.split = "year"
         self.find = "player"
+        # Columns of the events the stats are also split by (see set_split_by)
+        self.split_by: list[str] = []
+
+    @property
+    def events(self) -> pd.DataFrame:
+        """
+        Every column of the events, with the filters applied. Loaded the first time it's used, which isn't needed for calculate_stats.
+        Use this (and set it) for filters that the set_ methods don't have. Setting it makes those events the ones the filters are applied to,
+        so reset_filters goes back to them instead of every event.
+        """
+        return self.filtered_events()
+
+    @events.setter
+    def events(self, events: pd.DataFrame):
+        # Shallow copy, since derived columns may be added to it
+        self._base_events = events.copy(deep=False)
+        self._base_columns = None
+        # Whatever filters there are were applied to the events already
+        self._base_filters = set(self.filters)
+        self._base_set = True
+        self._masks = {}
+        self._filtered_events = None
+
+    @property
+    def predicates(self) -> list[Predicate]:
+        """
+        The filters that are predicates (see add_predicate)
+        """
+        return [predicate for _, _, predicate in self.filters.values() if predicate is not None]
+
+    def add_predicate(self, column: str, operator: str, value: Any):
+        """
+        Limit the data to the events where a column is equal to a value ("==") or one of a list of values ("in").
+        Unlike add_filter, these can be checked while the events are read, so use this whenever possible.
+
+        Parameters:
+        column (str): The column. It has to be a Chadwick field, not a derived column, or PLAYER_ID (see set_players)
+        operator (str): '==' or 'in'
+        value (Any): The value, or the list of values for 'in'
+        """
+        assert operator in ["==", "in"], f"Invalid operator {operator}. Valid operators are '==', 'in'"
+        if operator == "in":
+            # Copied so changing the list afterwards doesn't change the filter
+            value = list(value)
+        predicate: Predicate = (column, operator, value)
+        key = (column, operator, tuple(value) if operator == "in" else value)
+        self.filters[key] = (predicate_columns([predicate]), lambda events: predicate_mask(events, [predicate]), predicate)
+
+    def add_filter(self, columns: list[str], function: Callable[[pd.DataFrame], Any], key: Hashable = None):
+        """
+        Limit the data to the events where function(events) is True. Use add_predicate when possible.
+
+        Parameters:
+        columns (list[str]): The columns function uses, so they're read along with the rest
+        function (Callable[[pd.DataFrame], Any]): Gives a boolean mask of the events to keep
+        key (Hashable): Identifies the filter, so that adding the same one again reuses its mask. Defaults to the function.
+            A key made of strings, numbers and tuples is also used to look up results in result_cache, so it has to describe exactly what the filter does.
+            With the default key, results aren't cached.
+        """
+        self.filters[function if key is None else key] = (columns, function, None)
+
+    def reset_filters(self):
+        """
+        Remove every filter. The events that were loaded are kept (unless the removed filters were applied while reading them)
+        """
+        self.filters = {}
+
+    def push_filters(self):
+        """
+        Save the current filters so they can be restored by pop_filters, e.g. to try several extra filters on top of the same ones
+        """
+        self.filter_stack.append(dict(self.filters))
+
+    def pop_filters(self):
+        """
+        Restore the filters saved by the last push_filters
+        """
+        self.filters = self.filter_stack.pop()
+
+    def base_events(self, columns: list[str] | None = None) -> pd.DataFrame:
+        """
+        The loaded events the filters are applied to. They're read again if they don't have these columns (or the ones the filters use),
+        or if a predicate that was applied while reading them has been removed.
+        The first read only reads the events matching the predicates. Later reads only apply the predicates the previous read did,
+        since once a filter is removed it's likely other filters will be tried, and reading every event once is faster than reading them for each one.
+
+        Parameters:
+        columns (list[str] | None): Columns that are needed. Defaults to every column.
+        """
+        filter_columns = [column for filter_columns, _, _ in self.filters.values() for column in filter_columns]
+        if self._base_set:
+            # The events that were set may not have the derived columns that are needed
+            missing = [column for column in (columns or []) + filter_columns if column in derived_columns and column not in self._base_events.columns]  # type: ignore
+            if missing:
+                add_derived_columns(self._base_events, missing)  # type: ignore
+                self._filtered_events = None
+            return self._base_events  # type: ignore
+        if columns is not None:
+            columns = list(dict.fromkeys(columns + filter_columns))
+        if self._base_events is not None:
+            has_columns = self._base_columns is None or (columns is not None and set(columns) <= set(self._base_columns))
+            if has_columns and self._base_filters <= self.filters.keys():
+                return self._base_events
+            if columns is not None and self._base_columns is not None:
+                # Keep the columns that were already loaded, so switching between queries doesn't read them over and over
+                columns = list(dict.fromkeys(self._base_columns + columns))
+        pushed_down = {
+            key: predicate
+            for key, (_, _, predicate) in self.filters.items()
+            if predicate is not None and (self._base_events is None or key in self._base_filters)
+        }
+        self._base_events = self.store.read_years(self.years, columns, list(pushed_down.values()))
+        self._base_columns = columns
+        self._base_filters = set(pushed_down)
+        self._masks = {}
+        self._filtered_events = None
+        return self._base_events
+
+    def filtered_events(self, columns: list[str] | None = None) -> pd.DataFrame:
+        """
+        The events with the filters applied. The mask of each filter is kept, and so are the last filtered events,
+        so running calculate_stats again (or with a filter added or removed) doesn't compute everything again.
+
+        Parameters:
+        columns (list[str] | None): Columns that are needed (it may have others). Defaults to every column.
+        """
+        events = self.base_events(columns)
+        keys = frozenset(key for key in self.filters if key not in self._base_filters)
+        if self._filtered_events is not None and self._filtered_events[0] == keys:
+            return self._filtered_events[1]
+        if keys:
+            for key in keys:
+                if key not in self._masks:
+                    self._masks[key] = np.asarray(self.filters[key][1](events), dtype=bool)
+            events = events[np.logical_and.reduce([self._masks[key] for key in keys])]  # type: ignore
+        self._filtered_events = (keys, events)
+        return events
+
+    def calculation_events(self) -> pd.DataFrame:
+        """
+        The events for calculate_stats. Only the columns the calculator uses are read, unless every column has been loaded already (see events).
+        The calculators add columns to the events they're given, so this is a shallow copy to keep the loaded events unchanged.
+        """
+        return self.filtered_events(self.calculator_class.event_columns + self.split_by).copy(deep=False)
+
+    def result_key(self) -> str | None:
+        """
+        The key calculate_stats saves its result under in result_cache: a hash of the query and the version of the data and code it's calculated with.
+        None if the result can't be cached: the cache is off, the events were set through self.events, or a filter was added without a key that describes it.
+        """
+        if result_cache.max_bytes <= 0 or self._base_set:
+            return None
+        filters: list[str] = []
+        for key in self.filters:
+            key = json_key(key)
+            if key is None:
+                return None
+            filters.append(json.dumps(key))
+        code = hashlib.sha256()
+        for module in ["stat_calculator.py", "stat_splits.py", "derived_columns.py"]:
+            code.update((Path(__file__).parent / module).read_bytes())
+        query = {
+            "calculator": self.calculator_class.__name__,
+            "years": self.years,
+            "find": self.find,
+            "split": self.split,
+            "split_by": self.split_by,
+            "filters": sorted(filters),
+            "events": self.store.version(self.years),
+            "linear_weights": hashlib.sha256(pd.util.hash_pandas_object(self.linear_weights).to_numpy().tobytes()).hexdigest(),  # type: ignore
+            "code": code.hexdigest(),
+        }
+        return hashlib.sha256(json.dumps(query, sort_keys=True).encode()).hexdigest()
+
+    def calculate_splits(self, splits: dict[str, Callable[["StatSplits"], Any]]) -> dict[str, pd.DataFrame]:
+        """
+        Calculate the stats of several splits at once, e.g. {"vs LHP": lambda s: s.set_pitcher_handedness("L"), "home": lambda s: s.set_batter_home(True)}.
+        Each split is a function that limits the data with the set_ methods, on top of the limits that are already set (which stay set).
+        The calculator is run on the events of one split at a time, so only one split's events are filtered out of the loaded events at once (the splits may overlap,
+        so they can't share a single split label). self.stats is set to the stats of every split, with a split column. Returns the stats of each split.
+
+        Parameters:
+        splits (dict[str, Callable[[StatSplits], Any]]): The name of each split and the function that sets it
+        """
+        columns = self.calculator_class.event_columns + self.split_by
+        # Every column the splits use is loaded at once, so the events aren't read again for each split
+        for set_split in splits.values():
+            self.push_filters()
+            set_split(self)
+            columns = columns + [column for filter_columns, _, _ in self.filters.values() for column in filter_columns]
+            self.pop_filters()
+        self.base_events(columns)
+        split_stats: dict[str, pd.DataFrame] = {}
+        for name, set_split in splits.items():
+            self.push_filters()
+            set_split(self)
+            # Shallow copy, since the calculator adds columns to it
+            events = self.filtered_events(columns).copy(deep=False)
+            self.pop_filters()
+            calculator = self.calculator_class(events, self.linear_weights, find=self.find, split=self.split, split_by=self.split_by)  # type: ignore
+            calculator.calculate_all_stats()
+            split_stats[name] = self.player_stats(calculator.stats)
+        stats: list[pd.DataFrame] = []
+        for name, named_stats in split_stats.items():
+            named_stats = named_stats.copy(deep=False)
+            # Right after the info columns, before the split_by columns
+            named_stats.insert(list(named_stats.columns).index("end_year") + 1, "split", np.full(len(named_stats), name, dtype=object))
+            stats.append(named_stats)
+        self.stats = pd.concat(stats, ignore_index=True)  # type: ignore
+        return split_stats
+
+    def player_stats(self, stats: pd.DataFrame) -> pd.DataFrame:
+        """
+        Only the stats of the players set by set_players (if any). The events they're in have other players in them, whose stats would only count those events
+        """
+        if self.find != "player":
+            return stats
+        mask = np.ones(len(stats), dtype=bool)
+        for column, operator, value in self.predicates:
+            if column == "PLAYER_ID":
+                mask &= stats["player_id"].isin([value] if operator == "==" else value).to_numpy(dtype=bool)  # type: ignore
+        if mask.all():
+            return stats
+        return stats[mask].reset_index(drop=True)  # type: ignore
+
+    def switch_hitters(self) -> list[tuple[int, str]]:
+        """
+        (year, batter) of the batters with at least 5 PAs from each side of the plate in a season. Counted over every event of the season, regardless of the filters
+        """
+        if self._switch_hitters is None:
+            self._switch_hitters = [
+                (year, batter) for year in self.years for batter in switch_hitters(self.store.read_year(year, ["RESP_BAT_ID", "RESP_BAT_HAND_CD"]))
+            ]
+        return self._switch_hitters
 
     def set_split(self, split: str):
         """
@@ -59,6 +345,21 @@ class StatSplits:
         ], f"Invalid sub-division {subdivision}. Valid sub-divisions are 'player', 'team'"
         self.find = subdivision
 
+    def set_split_by(self, columns: list[str] | str | None):
+        """
+        Also split the stats by columns of the events, e.g. "RESP_PIT_HAND_CD" for vs LHP and vs RHP, or "BAT_LINEUP_ID" for each lineup spot.
+        Every value is calculated in one pass (instead of with a StatSplits for each), and the stats get a column for each of them.
+        Events where one of the columns is missing aren't counted.
+
+        Parameters:
+        columns (list[str] | str | None): The columns. None to stop splitting by them
+        """
+        if columns is None:
+            columns = []
+        elif isinstance(columns, str):
+            columns = [columns]
+        self.split_by = list(columns)
+
     def set_days_of_week(self, days_of_week: list[str]):
         """
         Limit the data to only include games played on certain days of the week.
@@ -79,9 +380,9 @@ class StatSplits:
             ]
             for day in days_of_week
         ), "Invalid day of week"
-        for idx, day in enumerate(days_of_week):
-            days_of_week[idx] = day.capitalize()
-        self.events = self.events[pd.to_datetime(self.events["GAME_ID"].str.slice(3, -1)).dt.day_name().isin(days_of_week)]  # type: ignore
+        # DAY_OF_WEEK is 0 for Monday
+        days = [["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"].index(day.capitalize()) for day in days_of_week]
+        self.add_filter(["DAY_OF_WEEK"], lambda events: events["DAY_OF_WEEK"].isin(days), ("days_of_week", tuple(sorted(days))))  # type: ignore
 
     def set_batter_handedness_pa(self, handedness: str):
         """
@@ -97,7 +398,7 @@ class StatSplits:
             "R",
             "L",
         ], "Invalid handedness. Valid values are 'R' and 'L'"
-        self.events = self.events[self.events["RESP_BAT_HAND_CD"] == handedness]  # type: ignore
+        self.add_predicate("RESP_BAT_HAND_CD", "==", handedness)
 
     def set_batter_handedness(self, handedness: str):
         """
@@ -113,10 +414,13 @@ class StatSplits:
             "S",
         ], "Invalid handedness. Valid values are 'R', 'L', and 'S'"
         if handedness == "S":
-            counts = self.events[self.events["RESP_BAT_ID"].values == self.events["RESP_BAT_ID"]]["RESP_BAT_HAND_CD"].value_counts()  # type: ignore
-            self.events = self.events[(counts["L"] >= 5) & (counts["R"] >= 5)]  # type: ignore
+            self.add_filter(
+                ["year", "RESP_BAT_ID"],
+                lambda events: pd.MultiIndex.from_arrays([events["year"], events["RESP_BAT_ID"]]).isin(self.switch_hitters()),  # type: ignore
+                ("switch_hitters",),
+            )
         else:
-            self.events = self.events[self.events["RESP_BAT_HAND_CD"] == handedness]  # type: ignore
+            self.add_predicate("RESP_BAT_HAND_CD", "==", handedness)
 
     def set_pitcher_handedness(self, handedness: str):
         """
@@ -134,7 +438,7 @@ class StatSplits:
             "L",
             "S",
         ], "Invalid handedness. Valid values are 'R' or 'L'"
-        self.events = self.events[self.events["RESP_BAT_HAND_CD"] == handedness]  # type: ignore
+        self.add_predicate("RESP_BAT_HAND_CD", "==", handedness)
 
     def set_batter_starter(self, starter: bool):
         """
@@ -143,7 +447,7 @@ class StatSplits:
         Parameters:
         starter (bool): True for starters, False for non-starters
         """
-        self.events = self.events[self.events["RESP_BAT_START_FL"] == starter]  # type: ignore
+        self.add_predicate("RESP_BAT_START_FL", "==", starter)
 
     def set_pitcher_starter(self, starter: bool):
         """
@@ -152,7 +456,7 @@ class StatSplits:
         Parameters:
         starter (bool): True for starters, False for non-starters
         """
-        self.events = self.events[self.events["RESP_PIT_START_FL"] == starter]  # type: ignore
+        self.add_predicate("RESP_PIT_START_FL", "==", starter)
 
     def set_batter_lineup_pos(self, lineup_pos: int):
         """
@@ -162,7 +466,33 @@ class StatSplits:
         lineup_pos (int): 1-9 for lineup position
         """
         assert 1 <= lineup_pos <= 9, "Invalid lineup position"
-        self.events = self.events[self.events["BAT_LINEUP_ID"] == lineup_pos]  # type: ignore
+        self.add_predicate("BAT_LINEUP_ID", "==", lineup_pos)
+
+    def set_players(self, players: list[str] | str):
+        """
+        Limit the data to the events these players were in (as the batter, the pitcher, a baserunner or the pitcher responsible for one), and the stats to these players.
+        Only their rows are read, using the player index of each year (see EventStore.player_rows), so a player's career doesn't need every event to be read.
+
+        Parameters:
+        players (list[str] | str): Retrosheet player IDs, e.g. 'troum001'
+        """
+        self.add_predicate("PLAYER_ID", "in", [players] if isinstance(players, str) else players)
+
+    def set_games(self, game_ids: list[str] | str):
+        """
+        Limit the data to the events of these games. Only their rows are read, using the game index of each year (see EventStore.game_rows).
+        Use games() to find the games, e.g. a team's games or the ones a pitcher started.
+
+        Parameters:
+        game_ids (list[str] | str): Retrosheet game IDs, e.g. 'NYA202304010'
+        """
+        self.add_predicate("GAME_ID", "in", [game_ids] if isinstance(game_ids, str) else game_ids)
+
+    def games(self) -> pd.DataFrame:
+        """
+        Every game of the years: its GAME_ID, date, teams, final score and starting pitchers (see EventStore.games). The filters don't apply to it
+        """
+        return self.store.games(self.years)
 
     def set_player_field_position(self, field_pos: int):
         """
@@ -173,7 +503,7 @@ class StatSplits:
             - 1-9 are the standard fielding positions, 10 is the DH, 11 is a pinch hitter, 12 is a pinch runner (this last one almost certainly will return 0 results)
         """
         assert 1 <= field_pos <= 12, "Invalid field position"
-        self.events = self.events[self.events["BAT_FLD_CD"] == field_pos]  # type: ignore
+        self.add_predicate("BAT_FLD_CD", "==", field_pos)
 
     def set_batter_home(self, home: bool):
         """
@@ -183,9 +513,9 @@ class StatSplits:
         home (bool): True for home, False for away
         """
         if home:
-            self.events = self.events[self.events["HOME_TEAM_ID"] == self.events["BAT_TEAM_ID"]]  # type: ignore
+            self.add_filter(["HOME_TEAM_ID", "BAT_TEAM_ID"], lambda events: events["HOME_TEAM_ID"] == events["BAT_TEAM_ID"], ("batter_home", True))  # type: ignore
         else:
-            self.events = self.events[self.events["HOME_TEAM_ID"] != self.events["BAT_TEAM_ID"]]  # type: ignore
+            self.add_filter(["HOME_TEAM_ID", "BAT_TEAM_ID"], lambda events: events["HOME_TEAM_ID"] != events["BAT_TEAM_ID"], ("batter_home", False))  # type: ignore
 
     def set_pitcher_home(self, home: bool):
         """
@@ -195,9 +525,9 @@ class StatSplits:
         home (bool): True for home, False for away
         """
         if home:
-            self.events = self.events[self.events["HOME_TEAM_ID"] == self.events["FLD_TEAM_ID"]]  # type: ignore
+            self.add_filter(["HOME_TEAM_ID", "FLD_TEAM_ID"], lambda events: events["HOME_TEAM_ID"] == events["FLD_TEAM_ID"], ("pitcher_home", True))  # type: ignore
         else:
-            self.events = self.events[self.events["HOME_TEAM_ID"] != self.events["FLD_TEAM_ID"]]  # type: ignore
+            self.add_filter(["HOME_TEAM_ID", "FLD_TEAM_ID"], lambda events: events["HOME_TEAM_ID"] != events["FLD_TEAM_ID"], ("pitcher_home", False))  # type: ignore
 
     def set_pitching_team(self, teams: list[str]):
         """
@@ -207,7 +537,7 @@ class StatSplits:
         teams (list): List of team abbreviations (the retrosheet ones, e.g. "BOS", "NYA")
         """
         assert all(len(team) == 3 for team in teams), "Invalid team abbreviation"
-        self.events = self.events[self.events["FLD_TEAM_ID"].isin(teams)]  # type: ignore
+        self.add_predicate("FLD_TEAM_ID", "in", teams)
 
     def set_batting_team(self, teams: list[str]):
         """
@@ -217,7 +547,7 @@ class StatSplits:
         teams (list): List of team abbreviations (the retrosheet ones, e.g. "BOS", "NYA")
         """
         assert all(len(team) == 3 for team in teams), "Invalid team abbreviation"
-        self.events = self.events[self.events["BAT_TEAM_ID"].isin(teams)]  # type: ignore
+        self.add_predicate("BAT_TEAM_ID", "in", teams)
 
     def set_innings(self, innings: list[int]):
         """
@@ -227,7 +557,7 @@ class StatSplits:
         innings (list[int]): 1-infinity for the inning number
         """
         assert all(1 <= inning for inning in innings), "Invalid inning"
-        self.events = self.events[self.events["INN_CT"].isin(innings)]  # type: ignore
+        self.add_predicate("INN_CT", "in", innings)
 
     def set_outs(self, outs: list[int]):
         """
@@ -237,7 +567,7 @@ class StatSplits:
         outs (list[int]): 0-2 for the number of outs
         """
         assert all(0 <= out < 3 for out in outs), "Invalid number of outs"
-        self.events = self.events[self.events["OUTS_CT"].isin(outs)]  # type: ignore
+        self.add_predicate("OUTS_CT", "in", outs)
 
     def set_strikes(self, strikes: list[int]):
         """
@@ -247,7 +577,7 @@ class StatSplits:
         strikes (list[int]): 0-3 for the number of strikes
         """
         assert all(0 <= strike <= 3 for strike in strikes), "Invalid number of strikes"
-        self.events = self.events[self.events["STRIKES_CT"].isin(strikes)]  # type: ignore
+        self.add_predicate("STRIKES_CT", "in", strikes)
 
     def set_balls(self, balls: list[int]):
         """
@@ -257,7 +587,7 @@ class StatSplits:
         balls (list[int]): 0-4 for the number of balls
         """
         assert all(0 <= ball <= 4 for ball in balls), "Invalid number of balls"
-        self.events = self.events[self.events["BALLS_CT"].isin(balls)]  # type: ignore
+        self.add_predicate("BALLS_CT", "in", balls)
 
     def set_score_diff(self, score_diff: list[int]):
         """
@@ -266,7 +596,7 @@ class StatSplits:
         Parameters:
         score_diff (list[int]): Any integer for the score difference
         """
-        self.events = self.events[(self.events["HOME_SCORE_CT"] - self.events["AWAY_SCORE_CT"]).isin(score_diff)]  # type: ignore
+        self.add_filter(["HOME_SCORE_CT", "AWAY_SCORE_CT"], lambda events: (events["HOME_SCORE_CT"] - events["AWAY_SCORE_CT"]).isin(score_diff), ("score_diff", tuple(score_diff)))  # type: ignore
 
     def set_home_score(self, scores: list[int]):
         """
@@ -275,7 +605,7 @@ class StatSplits:
         Parameters:
         scores (list[int]): Any integer for the home team score
         """
-        self.events = self.events[self.events["HOME_SCORE_CT"].isin(scores)]  # type: ignore
+        self.add_predicate("HOME_SCORE_CT", "in", scores)
 
     def set_away_score(self, scores: list[int]):
         """
@@ -284,7 +614,7 @@ class StatSplits:
         Parameters:
         scores (list[int]): Any integer for the away team score
         """
-        self.events = self.events[self.events["AWAY_SCORE_CT"].isin(scores)]  # type: ignore
+        self.add_predicate("AWAY_SCORE_CT", "in", scores)
 
     def set_base_situation(self, base_situations: list[str]):
         """
@@ -294,13 +624,15 @@ class StatSplits:
         base_situation (list[int]): List of integers no more than 2^3 for the base situation. 0 is empty, 1 is occupied. For example, 0b111 = 7 = bases loaded, 0b000 = 0 = bases empty, 0b001 = 1 = runner on first, 0b100 = 4 = runner on third
         """
         assert all((0 <= base_situation < 8) for base_situation in base_situations), "Invalid base situation"  # type: ignore
-        self.events = self.events[self.events["START_BASES_CD"].isin(base_situations)]  # type: ignore
+        self.add_predicate("START_BASES_CD", "in", base_situations)
 
 
 class BattingStatSplits(StatSplits):
+    calculator_class = BattingStatsCalculator
+
     def __init__(self, start_year: int, end_year: int):
         """
-        Class to calculate batting splits. Keep in mind that once you limit a split (other than "set_split" and "set_subdivision"), you cannot go back to the original data.
+        Class to calculate batting splits. Use reset_filters (or push_filters and pop_filters) to go back to the data before a split was limited.
         """
         super().__init__(start_year, end_year)
         self.batting_calculator: BattingStatsCalculator | None = None
@@ -309,17 +641,31 @@ class BattingStatSplits(StatSplits):
         """
         Calculate batting stats based on the set splits.
         This method should be run after all splits have been set.
+        If the same stats were calculated before from the same data, they're read from result_cache instead.
         """
 
-        self.batting_calculator = BattingStatsCalculator(self.events, self.linear_weights, find=self.find, split=self.split)  # type: ignore
+        key = self.result_key()
+        if key is not None:
+            stats = result_cache.get(key)
+            if stats is not None:
+                # Calculated before, so there's no calculator
+                self.batting_calculator = None
+                self.stats = stats
+                return
+
+        self.batting_calculator = BattingStatsCalculator(self.calculation_events(), self.linear_weights, find=self.find, split=self.split, split_by=self.split_by)  # type: ignore
         self.batting_calculator.calculate_all_stats()
-        self.stats = self.batting_calculator.stats
+        self.stats = self.player_stats(self.batting_calculator.stats)
+        if key is not None:
+            result_cache.put(key, self.stats)  # type: ignore
 
 
 class PitchingStatSplits(StatSplits):
+    calculator_class = PitchingStatsCalculator
+
     def __init__(self, start_year: int, end_year: int):
         """
-        Class to calculate pitching splits. Keep in mind that once you limit a split (other than "set_split" and "set_subdivision"), you cannot go back to the original data.
+        Class to calculate pitching splits. Use reset_filters (or push_filters and pop_filters) to go back to the data before a split was limited.
         """
         super().__init__(start_year, end_year)
         self.pitching_calculator: PitchingStatsCalculator | None = None
@@ -328,8 +674,20 @@ class PitchingStatSplits(StatSplits):
         """
         Calculate batting stats based on the set splits.
         This method should be run after all splits have been set.
+        If the same stats were calculated before from the same data, they're read from result_cache instead.
         """
 
-        self.pitching_calculator = PitchingStatsCalculator(self.events, self.linear_weights, find=self.find, split=self.split)  # type: ignore
+        key = self.result_key()
+        if key is not None:
+            stats = result_cache.get(key)
+            if stats is not None:
+                # Calculated before, so there's no calculator
+                self.pitching_calculator = None
+                self.stats = stats
+                return
+
+        self.pitching_calculator = PitchingStatsCalculator(self.calculation_events(), self.linear_weights, find=self.find, split=self.split, split_by=self.split_by)  # type: ignore
         self.pitching_calculator.calculate_all_stats()
-        self.stats = self.pitching_calculator.stats
+        self.stats = self.player_stats(self.pitching_calculator.stats)
+        if key is not None:
+            result_cache.put(key, self.stats)  # type: ignore
@@ -38,12 +38,13 @@ _ = setup(
     author="Jason R",
     author_email='mail4jasonr@gmail.com',
     url='https://github.com/jso8910/baseballquery',
-    packages=find_packages(exclude=['tests', 'tests.*', "baseballquery/chadwick", "baseballquery/chadwick.hdf5", "baseballquery/downloads",]),
+    packages=find_packages(exclude=['tests', 'tests.*', "baseballquery/chadwick", "baseballquery/chadwick.hdf5", "baseballquery/chadwick_parquet", "baseballquery/downloads", "baseballquery/download_cache",]),
     package_dir={
         'package': 'package',
     },
     include_package_data=True,
     install_requires=requirements,
+    extras_require={"parquet": ["pyarrow"]},
     license="MIT",
     zip_safe=False,
     keywords='python',
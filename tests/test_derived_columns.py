@@ -0,0 +1,16 @@
+import pandas as pd  # type: ignore
+from baseballquery.derived_columns import add_derived_columns
+
+
+def test_pitch_count_does_not_overflow():
+    # int8 counts, like the event store's. A 2 (single) ends the PA and a 4 (stolen base) doesn't
+    events = pd.DataFrame({
+        "EVENT_CD": pd.Series([20, 4, 2], dtype="int8"),
+        "EVENT_RUNS_CT": pd.Series([0, 0, 1], dtype="int8"),
+        "PA_BALL_CT": pd.Series([70, 3, 1], dtype="int8"),
+        "PA_STRIKE_CT": pd.Series([70, 2, 2], dtype="int8"),
+        "PA_OTHER_BALL_CT": pd.Series([0, 0, 0], dtype="int8"),
+        "PA_OTHER_STRIKE_CT": pd.Series([1, 0, 0], dtype="int8"),
+    })
+    add_derived_columns(events, ["P"])
+    assert events["P"].tolist() == [139, 0, 3]
@@ -0,0 +1,38 @@
+import io
+from pathlib import Path
+from typing import Any
+import pytest
+import requests
+from baseballquery import download
+
+
+def fake_get(statuses: list[int], calls: list[int]):
+    def get(url: str, *args: Any, **kwargs: Any) -> requests.Response:
+        response = requests.Response()
+        response.status_code = statuses[len(calls)]
+        response.url = url
+        response.raw = io.BytesIO(b"")
+        calls.append(response.status_code)
+        return response
+
+    return get
+
+
+@pytest.mark.parametrize("status", [403, 404, 410])
+def test_client_errors_are_not_retried(status: int, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    calls: list[int] = []
+    monkeypatch.setattr(download.requests, "get", fake_get([status] * 3, calls))
+    monkeypatch.setattr(download.time, "sleep", lambda seconds: None)
+    with pytest.raises(requests.HTTPError):
+        download.fetch_zip(f"{download.RETROSHEET_EVENTS_URL}/1800eve.zip", tmp_path)
+    assert calls == [status]
+
+
+@pytest.mark.parametrize("status", [408, 429, 500, 503])
+def test_server_errors_are_retried(status: int, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    calls: list[int] = []
+    monkeypatch.setattr(download.requests, "get", fake_get([status] * 3, calls))
+    monkeypatch.setattr(download.time, "sleep", lambda seconds: None)
+    with pytest.raises(requests.HTTPError):
+        download.fetch_zip(f"{download.RETROSHEET_EVENTS_URL}/1800eve.zip", tmp_path, retries=3)
+    assert calls == [status] * 3
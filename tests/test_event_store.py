@@ -0,0 +1,79 @@
+from pathlib import Path
+import pandas as pd  # type: ignore
+import pytest  # type: ignore
+from baseballquery.event_store import EventStore, HDF5EventStore, NpyEventStore, Predicate, categorical_column_groups, categorize_events, predicate_mask, season_cache
+from baseballquery.retrosheet_parser import read_event_file
+
+data = Path(__file__).parent / "data"
+
+
+def seasons() -> dict[int, pd.DataFrame]:
+    """
+    Two seasons made from the game in tests/data. The second has the same game again, and a game with other players (and teams)
+    whose IDs sort before the first season's, so the categories of the seasons are in a different order
+    """
+    game = read_event_file(data / "2021DDD.EVA")
+    renamed = game.copy()
+    # Player and team IDs
+    for column in categorical_column_groups[0] + categorical_column_groups[1]:
+        if column in renamed.columns:
+            renamed[column] = renamed[column].map(lambda value: "c" + value[1:], na_action="ignore")  # type: ignore
+    renamed["GAME_ID"] = "CDD202204190"
+    repeated = game.copy()
+    repeated["GAME_ID"] = "DDD202204180"
+    events = {2021: game, 2022: pd.concat([renamed, repeated], ignore_index=True)}  # type: ignore
+    for df in events.values():
+        categorize_events(df)
+    return events
+
+
+def test_npy_store_matches_source_store(tmp_path: Path):
+    source = HDF5EventStore(tmp_path / "chadwick.hdf5")
+    for year, df in seasons().items():
+        source.write_year(year, df)
+    npy = NpyEventStore(tmp_path / "chadwick_npy")
+    npy.write_year(2021, source.read_stored_year(2021))
+    codes_2021 = (npy.path / "RESP_BAT_ID.bin").read_bytes()
+    npy.write_year(2022, source.read_stored_year(2022))
+    # 2022's new players sort before 2021's, but they're added after them, so 2021's codes aren't written again
+    assert (npy.path / "RESP_BAT_ID.bin").read_bytes()[: len(codes_2021)] == codes_2021
+
+    assert npy.years() == [2021, 2022]
+    for year in source.years():
+        # The categories of a year read from the npy store are those of the whole store
+        pd.testing.assert_frame_equal(values(npy.read_year(year)), values(source.read_year(year)))  # type: ignore
+    npy_events = npy.read_years([2021, 2022])
+    source_events = source.read_years([2021, 2022])
+    pd.testing.assert_frame_equal(values(npy_events), values(source_events))  # type: ignore
+    # Both have every category of the store, sorted, so they sort the same way too
+    for column in source_events.columns:
+        if isinstance(source_events[column].dtype, pd.CategoricalDtype):
+            assert list(npy_events[column].cat.categories) == list(source_events[column].cat.categories)  # type: ignore
+
+
+@pytest.mark.parametrize("store_class", [HDF5EventStore, NpyEventStore])
+@pytest.mark.parametrize("season_cache_bytes", [0, 1_000_000_000])
+def test_index_reads_match_full_reads(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, store_class: type[EventStore], season_cache_bytes: int):
+    monkeypatch.setattr(season_cache, "max_bytes", season_cache_bytes)
+    season_cache.clear()
+    store = store_class(tmp_path / "store")
+    for year, df in seasons().items():
+        store.write_year(year, df)
+    predicates: list[list[Predicate]] = [
+        [("PLAYER_ID", "==", "cddb001")],
+        [("PLAYER_ID", "in", ["ddda000", "pddd0001", "nobody1"])],
+        [("GAME_ID", "in", ["CDD202204190", "DDD202104180", "DDD202104189"])],
+        [("GAME_ID", "==", "DDD202204180"), ("PLAYER_ID", "in", ["ddda000"]), ("OUTS_CT", "in", [1, 2])],
+    ]
+    for year in store.years():
+        full = store.read_year(year)
+        for year_predicates in predicates:
+            expected = full[predicate_mask(full, year_predicates)].reset_index(drop=True)
+            pd.testing.assert_frame_equal(values(store.read_year(year, predicates=year_predicates)), values(expected))  # type: ignore
+            columns = ["RESP_BAT_ID", "OUTS_CT", "AB"]
+            pd.testing.assert_frame_equal(values(store.read_year(year, columns, year_predicates)), values(expected[columns]))  # type: ignore
+    season_cache.clear()
+
+
+def values(df: pd.DataFrame) -> pd.DataFrame:
+    return df.apply(lambda column: column.astype(object) if isinstance(column.dtype, pd.CategoricalDtype) else column)  # type: ignore
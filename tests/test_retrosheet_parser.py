@@ -0,0 +1,26 @@
+import os
+import shutil
+from pathlib import Path
+import pandas as pd  # type: ignore
+import pytest  # type: ignore
+from baseballquery.retrosheet_parser import chadwick_dtypes, read_event_file, read_rosters
+
+data = Path(__file__).parent / "data"
+
+
+@pytest.mark.parametrize("file", ["2021DDD.EVA", "2021CCC.EVN"])
+def test_read_event_file_matches_cwevent(file: str):
+    # The .csv files are the output of retrosheet_cwevent_convert.read_cwevent's cwevent command for each event file
+    expected = pd.read_csv(data / f"{file}.csv", true_values=["t", "T"], false_values=["f", "F"], dtype=chadwick_dtypes)  # type: ignore
+    pd.testing.assert_frame_equal(read_event_file(data / file), expected)  # type: ignore
+
+
+def test_rosters_are_read_again_when_they_change(tmp_path: Path):
+    for file in ["TEAM2021", "DDD2021.ROS", "EEE2021.ROS"]:
+        shutil.copy(data / file, tmp_path / file)
+    assert read_rosters(str(tmp_path), "2021")["DDD"]["ddda000"] == ("R", "L")
+    roster_file = tmp_path / "DDD2021.ROS"
+    roster_file.write_text(roster_file.read_text().replace("ddda000,Lastddda000,First,R,L", "ddda000,Lastddda000,First,B,L"))
+    stat = roster_file.stat()
+    os.utime(roster_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert read_rosters(str(tmp_path), "2021")["DDD"]["ddda000"] == ("B", "L")
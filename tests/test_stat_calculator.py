@@ -0,0 +1,104 @@
+from pathlib import Path
+import numpy as np
+import pandas as pd  # type: ignore
+import pytest  # type: ignore
+from baseballquery.derived_columns import add_derived_columns
+from baseballquery.event_store import categorize_events
+from baseballquery.retrosheet_parser import read_event_file
+from baseballquery.stat_calculator import BattingStatsCalculator, PitchingStatsCalculator
+
+data = Path(__file__).parent / "data"
+
+
+@pytest.fixture(scope="module")
+def events():
+    # 2021CCC.EVN has caught/stolen bases, an inherited run and an unearned run; 2021DDD.EVA is a plain game
+    events = pd.concat([read_event_file(data / "2021CCC.EVN"), read_event_file(data / "2021DDD.EVA")], ignore_index=True)  # type: ignore
+    categorize_events(events)
+    return events
+
+
+def calculate(events, cls, find):
+    events = events.copy()
+    add_derived_columns(events, cls.event_columns)
+    calculator = cls(events, pd.DataFrame({"year": [2021]}), find=find, split="year")
+    calculator.calculate_basic_stats()
+    return calculator.stats.set_index("player_id" if find == "player" else "team")
+
+
+def test_batting_stats(events):
+    stats = calculate(events, BattingStatsCalculator, "player")
+    assert len(stats) == 31
+    # Stolen bases and caught stealing are credited to the runner, not the batter
+    expected = {
+        "ccca000": (5, 4, 1, 0, 1),
+        "cccd003": (6, 5, 1, 1, 0),
+        "cccg006": (5, 5, 3, 0, 1),
+        "dddi008": (8, 7, 1, 1, 0),
+        "eeea000": (4, 3, 3, 1, 0),
+        "dddd003": (8, 6, 3, 0, 0),
+    }
+    for player, values in expected.items():
+        assert tuple(stats.loc[player, ["PA", "AB", "H", "SB", "CS"]]) == values
+
+    teams = calculate(events, BattingStatsCalculator, "team")
+    assert teams[["PA", "AB", "H", "SB", "CS"]].to_dict("index") == {
+        "CCC": {"PA": 40, "AB": 37, "H": 10, "SB": 1, "CS": 2},
+        "DDD": {"PA": 77, "AB": 70, "H": 15, "SB": 1, "CS": 0},
+        "EEE": {"PA": 38, "AB": 36, "H": 8, "SB": 1, "CS": 0},
+    }
+    for frame in [stats, teams]:
+        assert frame["year"].dtype == "int64" and frame["start_year"].dtype == "int64"
+        assert (frame[["PA", "AB", "H", "SB", "CS"]].dtypes == "int64").all()
+
+
+def test_pitching_stats(events):
+    stats = calculate(events, PitchingStatsCalculator, "player")
+    # Runs are charged to the pitcher responsible for the runner, and only starters get GS
+    assert stats[["G", "GS", "R", "ER", "UER"]].to_dict("index") == {
+        "pccc0001": {"G": 1, "GS": 0, "R": 0, "ER": 0, "UER": 0},
+        "pccc0002": {"G": 1, "GS": 0, "R": 3, "ER": 3, "UER": 0},
+        "pccc0005": {"G": 1, "GS": 1, "R": 3, "ER": 2, "UER": 1},
+        "pddd0001": {"G": 2, "GS": 0, "R": 2, "ER": 2, "UER": 0},
+        "pddd0002": {"G": 2, "GS": 1, "R": 4, "ER": 4, "UER": 0},
+        "pddd0003": {"G": 1, "GS": 0, "R": 1, "ER": 1, "UER": 0},
+        "pddd0004": {"G": 1, "GS": 0, "R": 1, "ER": 1, "UER": 0},
+        "pddd0005": {"G": 1, "GS": 1, "R": 1, "ER": 1, "UER": 0},
+        "peee0001": {"G": 1, "GS": 0, "R": 1, "ER": 1, "UER": 0},
+        "peee0003": {"G": 1, "GS": 1, "R": 1, "ER": 1, "UER": 0},
+    }
+    assert stats.loc["pccc0002", "IP"] == pytest.approx(11 / 3)
+    assert stats.loc["pccc0005", "IP"] == pytest.approx(10 / 3)
+
+    teams = calculate(events, PitchingStatsCalculator, "team")
+    assert teams[["G", "GS", "IP", "R", "ER", "UER"]].to_dict("index") == {
+        "CCC": {"G": 1, "GS": 1, "IP": 9.0, "R": 6, "ER": 5, "UER": 1},
+        "DDD": {"G": 2, "GS": 2, "IP": 18.0, "R": 9, "ER": 9, "UER": 0},
+        "EEE": {"G": 1, "GS": 1, "IP": 9.0, "R": 2, "ER": 2, "UER": 0},
+    }
+    for frame in [stats, teams]:
+        assert frame["year"].dtype == "int64" and frame["start_year"].dtype == "int64"
+        assert (frame[["G", "GS", "R", "ER", "UER"]].dtypes == "int64").all()
+        assert frame["IP"].dtype == "float64"
+
+
+def test_player_rows_share_one_accumulator(events):
+    events = events.copy()
+    add_derived_columns(events, BattingStatsCalculator.event_columns)
+    calculator = BattingStatsCalculator(events, pd.DataFrame({"year": [2021]}), find="player", split="year")
+    calculator.calculate_basic_stats()
+    rows = len(calculator.stats)
+    assert calculator.get_player_row("ccca000", year=2021) == 0
+    accumulator = calculator.accumulator
+    new_row = calculator.get_player_row("newp001", year=2021)
+    assert new_row == rows and calculator.get_player_row("newp001", year=2021) == new_row
+    calculator.create_player_row("newp002", year=2021)
+    calculator.stats_accumulator().add("PA", np.array([new_row, new_row]), np.array([1, 2]))
+    # Nothing rebuilt self.stats until it was read
+    assert calculator.accumulator is accumulator
+
+    stats = calculator.stats
+    assert calculator.accumulator is None and len(stats) == rows + 2
+    assert stats.loc[new_row, ["player_id", "year", "start_year", "PA"]].tolist() == ["newp001", 2021, 0, 3]
+    assert stats.loc[rows + 1, ["player_id", "year", "start_year", "end_year"]].tolist() == ["newp002", 2021, 2021, 2021]
+    assert (stats[["PA", "AB", "H"]].dtypes == "int64").all()
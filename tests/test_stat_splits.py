@@ -0,0 +1,92 @@
+from pathlib import Path
+from typing import Any, Callable
+import pandas as pd  # type: ignore
+import pytest  # type: ignore
+from baseballquery import stat_splits
+from baseballquery.event_store import HDF5EventStore, categorize_events, season_cache
+from baseballquery.result_cache import ResultCache
+from baseballquery.retrosheet_parser import read_event_file
+from baseballquery.stat_splits import BattingStatSplits, PitchingStatSplits, StatSplits
+
+data = Path(__file__).parent / "data"
+
+filters: dict[str | None, Callable[[StatSplits], Any]] = {
+    None: lambda s: None,
+    "outs": lambda s: s.set_outs([1, 2]),
+    "pitcher hand": lambda s: s.set_pitcher_handedness("R"),
+    "players": lambda s: s.set_players(["dddd003", "pccc0002", "ccca000"]),
+    "games": lambda s: s.set_games(["CCC202105140"]),
+    "outs and score": lambda s: (s.set_outs([0]), s.set_score_diff([0, 1])),
+}
+
+
+@pytest.fixture
+def store(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """
+    An event store with the games in tests/data. StatSplits use it instead of the package's, with result_cache off
+    """
+    store = HDF5EventStore(tmp_path / "chadwick.hdf5")
+    events = pd.concat([read_event_file(data / "2021CCC.EVN"), read_event_file(data / "2021DDD.EVA")], ignore_index=True)  # type: ignore
+    categorize_events(events)
+    store.write_year(2021, events)
+    monkeypatch.setattr(stat_splits, "get_store", lambda: store)
+    monkeypatch.setattr(stat_splits, "result_cache", ResultCache(tmp_path / "result_cache", 0))
+    season_cache.clear()
+    yield store
+    season_cache.clear()
+
+
+def calculate(cls: type[StatSplits], name: str | None) -> pd.DataFrame:
+    splits = cls(2021, 2021)
+    splits.set_split("game")
+    filters[name](splits)
+    splits.calculate_stats()
+    return splits.stats  # type: ignore
+
+
+@pytest.mark.parametrize("cls", [BattingStatSplits, PitchingStatSplits])
+# Off, and too small for the season, so the predicates are pushed down to the store
+@pytest.mark.parametrize("season_cache_bytes", [0, 1])
+def test_pushed_down_filters_match_masks(store: HDF5EventStore, monkeypatch: pytest.MonkeyPatch, cls: type[StatSplits], season_cache_bytes: int):
+    monkeypatch.setattr(season_cache, "max_bytes", season_cache_bytes)
+    # Every event is loaded before the filters are added, so they're applied as masks
+    masked = cls(2021, 2021)
+    masked.set_split("game")
+    masked.calculate_stats()
+    for name in filters:
+        if name is None:
+            continue
+        pushed_down = cls(2021, 2021)
+        pushed_down.set_split("game")
+        filters[name](pushed_down)
+        pushed_down.calculate_stats()
+        masked.push_filters()
+        filters[name](masked)
+        masked.calculate_stats()
+        masked.pop_filters()
+        assert len(pushed_down.base_events()) < len(masked.base_events()), name
+        assert len(pushed_down.stats) > 0, name  # type: ignore
+        pd.testing.assert_frame_equal(pushed_down.stats, masked.stats, obj=name)  # type: ignore
+
+
+@pytest.mark.parametrize("cls", [BattingStatSplits, PitchingStatSplits])
+def test_cache_hits_match_misses(store: HDF5EventStore, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, cls: type[StatSplits]):
+    names = [None, "outs", "players"]
+    monkeypatch.setattr(season_cache, "max_bytes", 0)
+    uncached = {name: calculate(cls, name) for name in names}
+
+    # Rows read through the player index aren't added to the season cache, so only the other queries are read from it
+    monkeypatch.setattr(season_cache, "max_bytes", 1_000_000_000)
+    for name in [None, "outs"]:
+        pd.testing.assert_frame_equal(calculate(cls, name), uncached[name])
+    hits, misses = season_cache.hits, season_cache.misses
+    for name in [None, "outs"]:
+        pd.testing.assert_frame_equal(calculate(cls, name), uncached[name])
+    assert (season_cache.hits, season_cache.misses) == (hits + 2, misses)
+
+    results = ResultCache(tmp_path / "result_cache", 100_000_000)
+    monkeypatch.setattr(stat_splits, "result_cache", results)
+    for name in names:
+        pd.testing.assert_frame_equal(calculate(cls, name), uncached[name])
+        pd.testing.assert_frame_equal(calculate(cls, name), uncached[name])
+    assert (results.misses, results.hits) == (len(names), len(names))
@@ -0,0 +1,43 @@
+from typing import Any
+import pytest
+import baseballquery
+from baseballquery import download, ingest_metrics, linear_weights, retrosheet_cwevent_convert
+
+
+@pytest.fixture
+def offline(monkeypatch: pytest.MonkeyPatch) -> dict[str, Any]:
+    """
+    update() without downloading, converting or calculating anything. The season is always new, so it's always converted
+    """
+    calls: dict[str, Any] = {}
+    monkeypatch.setattr(download, "download_year", lambda year, source_dir=None: None)
+    monkeypatch.setattr(download, "download_zips", lambda urls, source_dir=None, *args, **kwargs: calls.setdefault("downloads", []).append(urls))
+    monkeypatch.setattr(retrosheet_cwevent_convert, "season_hash", lambda download_dir, year: "new")
+    monkeypatch.setattr(retrosheet_cwevent_convert, "read_season_hashes", lambda: {})
+    monkeypatch.setattr(retrosheet_cwevent_convert, "delete_downloads", lambda: None)
+
+    def convert(processes: int | None = None, years: list[int] | None = None, backend: str | None = None, parser: str | None = None):
+        calls["convert"] = years
+        ingest_metrics.record("parse", "1900TST.EVN", 0.1, rows=10)
+
+    monkeypatch.setattr(retrosheet_cwevent_convert, "convert_files_to_csv", convert)
+    monkeypatch.setattr(linear_weights, "calc_all_weights", lambda years=None, backend=None: calls.setdefault("linear_weights", years))
+    return calls
+
+
+def test_update_stops_measuring(offline: dict[str, Any], capsys: pytest.CaptureFixture[str]):
+    baseballquery.update(years=[1900, 1901])
+    # Every season's zip is downloaded in one call
+    assert offline == {"downloads": [[f"{download.RETROSHEET_EVENTS_URL}/1900eve.zip", f"{download.RETROSHEET_EVENTS_URL}/1901eve.zip"]], "convert": [1900, 1901], "linear_weights": [1900, 1901]}
+    assert "Ingest summary:" in capsys.readouterr().out
+    assert not ingest_metrics.ingesting()
+
+
+def test_failed_update_stops_measuring(offline: dict[str, Any], monkeypatch: pytest.MonkeyPatch):
+    def fail(*args: Any, **kwargs: Any):
+        raise RuntimeError("conversion failed")
+
+    monkeypatch.setattr(retrosheet_cwevent_convert, "convert_files_to_csv", fail)
+    with pytest.raises(RuntimeError):
+        baseballquery.update(years=[1900])
+    assert not ingest_metrics.ingesting()